@@ -0,0 +1,5 @@
+from .backlight import BacklightActuator, BrightnessctlBackend, SysfsBacklight, open_backlight
+from .control import BrightnessRegulator, ControlLog
+from .controller import GestureController
+from .detector import HandDetector
+from .strategies import STRATEGIES, SmoothedContinuous, ThresholdStep
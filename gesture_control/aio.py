@@ -0,0 +1,237 @@
+import asyncio
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .frames import recycler
+from .pipeline import StageStats
+
+class AsyncLatest:
+    # asyncio twin of pipeline.LatestSlot: put() replaces the pending item,
+    # get() waits for one. This is the backpressure: a slow consumer skips
+    # straight to the newest item instead of queueing. close() marks the end
+    # of the stream without replacing what is still pending; get() then
+    # returns None once that has been taken. on_drop(item) runs for each
+    # overwritten item.
+
+    def __init__(self, on_drop=None):
+        self._item = None
+        self._event = asyncio.Event()
+        self._closed = False
+        self.on_drop = on_drop
+        self.dropped = 0
+
+    def put(self, item):
+        old, self._item = self._item, item
+        if old is not None:
+            self.dropped += 1
+            if self.on_drop is not None:
+                self.on_drop(old)
+        self._event.set()
+
+    async def get(self):
+        await self._event.wait()
+        return self.take()
+
+    def take(self):
+        # Non-waiting get, None when empty
+        if not self._closed:
+            self._event.clear()
+        item, self._item = self._item, None
+        return item
+
+    def close(self):
+        self._closed = True
+        self._event.set()
+
+    @property
+    def pending(self):
+        return self._item is not None
+
+    @property
+    def closed(self):
+        return self._closed and self._item is None
+
+
+class AsyncActuator:
+    # One per sink: last-value-wins with the sink's own max write rate
+
+    def __init__(self, sink, max_rate=None):
+        self.sink = sink
+        self.min_interval = 1.0 / max_rate if max_rate else 0.0
+        self.slot = AsyncLatest()
+        self.writes = 0
+        self.last_written = None
+
+    async def run(self):
+        last_time = 0.0
+        while True:
+            level = await self.slot.get()
+            wait = last_time + self.min_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                # Anything newer that arrived while we slept wins
+                if self.slot.pending:
+                    level = self.slot.take()
+            if level != self.last_written:
+                await self.sink.write(level)
+                self.writes += 1
+                self.last_written = level
+            last_time = time.monotonic()
+
+
+class SinkGroup:
+    # What the controller sees as its actuator: fans set() out to every sink
+
+    def __init__(self, actuators):
+        self.actuators = actuators
+
+    def set(self, level):
+        level = max(0, min(100, int(level)))
+        for act in self.actuators:
+            act.slot.put(level)
+
+    def close(self):
+        for act in self.actuators:
+            act.sink.close()
+
+
+class AsyncRuntime:
+    # Capture, inference and actuation as asyncio tasks. The blocking
+    # cap.read() and the model each get their own single worker thread
+    # (hands.process drops the GIL in native code); the event loop itself
+    # only moves frames between single-slot mailboxes and drives the sinks.
+
+    def __init__(self, controller, sinks):
+        # sinks: [(sink, max_rate or None), ...]
+        self.controller = controller
+        self.actuators = [AsyncActuator(sink, rate) for sink, rate in sinks]
+        self.capture_stats = StageStats("capture")
+        self.inference_stats = StageStats("inference")
+        self.display_stats = StageStats("display")
+        self._frames = None
+        self._results = None
+        self._stop = None
+        self.recycle = None
+
+    async def capture(self, cap, pool):
+        loop = asyncio.get_running_loop()
+        try:
+            while not self._stop.is_set():
+                with self.controller.metrics.stage("cap_read"):
+                    success, img = await loop.run_in_executor(pool, cap.read)
+                if not success:
+                    break
+                self._frames.put((time.perf_counter(), img))
+                self.capture_stats.tick()
+        finally:
+            self._frames.close()
+
+    async def inference(self, pool):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                item = await self._frames.get()
+                if item is None:
+                    return  # stream ended and the last frame is done
+                t_capture, img = item
+                result = await loop.run_in_executor(pool, self.controller.detect, img)
+                self._results.put((t_capture, img) + result)
+                self.inference_stats.tick(time.perf_counter() - t_capture)
+        finally:
+            self._results.close()
+
+    async def actuation(self):
+        ctrl = self.controller
+        while True:
+            item = await self._results.get()
+            if item is None:
+                return
+            t_capture, img, hand, points, gesture = item
+            ctrl.handle(img, hand, points, gesture)
+            if ctrl.show and ctrl.show_frame(img) == ord('q'):
+                return
+            self.display_stats.tick(time.perf_counter() - t_capture)
+            self.recycle(img)
+
+    async def main(self):
+        ctrl = self.controller
+        loop = asyncio.get_running_loop()
+        self._frames = AsyncLatest()
+        self._results = AsyncLatest()
+        self._stop = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self._stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass
+
+        cap = ctrl.open_capture()
+        # Frames go back to the FrameRing once shown or dropped by a mailbox
+        self.recycle = recycler(cap)
+        self._frames.on_drop = lambda item: self.recycle(item[1])
+        self._results.on_drop = lambda item: self.recycle(item[1])
+        ctrl.actuator = SinkGroup(self.actuators)
+        ctrl.pipeline = self  # so ctrl.report()/stats() show these stages
+        if ctrl.strategy.current is not None:
+            ctrl.actuator.set(ctrl.strategy.current)
+
+        cap_pool = ThreadPoolExecutor(1, thread_name_prefix="capture")
+        infer_pool = ThreadPoolExecutor(1, thread_name_prefix="inference")
+        sink_tasks = [asyncio.create_task(act.run()) for act in self.actuators]
+        capture = asyncio.create_task(self.capture(cap, cap_pool))
+        inference = asyncio.create_task(self.inference(infer_pool))
+        actuation = asyncio.create_task(self.actuation())
+        stopper = asyncio.create_task(self._stop.wait())
+        try:
+            # Runs until the stream ends, 'q', a signal, or a task fails; a
+            # sink task only ends by failing (a write raised)
+            pending = {capture, inference, actuation, stopper, *sink_tasks}
+            while actuation in pending and stopper in pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task is not stopper and task.exception() is not None:
+                        raise task.exception()
+        finally:
+            self._stop.set()
+            for task in (stopper, actuation, inference):
+                task.cancel()
+            await asyncio.gather(stopper, actuation, inference, return_exceptions=True)
+            # capture exits on the stop flag after its in-flight read
+            await asyncio.gather(capture, return_exceptions=True)
+            cap_pool.shutdown()
+            infer_pool.shutdown()
+            await self.flush(sink_tasks)
+            for task in sink_tasks:
+                task.cancel()
+            await asyncio.gather(*sink_tasks, return_exceptions=True)
+            cap.release()
+            if ctrl.show:
+                import cv2
+                cv2.destroyAllWindows()
+
+    async def flush(self, tasks, timeout=1.0):
+        # Give rate-limited sinks a chance to write the final level; tasks
+        # are the sinks' run() tasks, a failed one writes nothing more
+        deadline = time.monotonic() + timeout
+        while any(act.slot.pending and not task.done() for act, task in zip(self.actuators, tasks)):
+            if time.monotonic() > deadline:
+                break
+            await asyncio.sleep(0.01)
+
+    def run(self):
+        asyncio.run(self.main())
+        if self.controller.verbose:
+            print("[stats]", self.controller.report())
+
+    def stats(self):
+        return [self.capture_stats.summary(), self.inference_stats.summary(),
+                self.display_stats.summary()]
+
+    def report(self):
+        parts = []
+        for s in self.stats():
+            parts.append(f"{s['stage']}: {s['fps']:.1f} fps, p50 {s['latency_p50_ms']:.1f} ms")
+        dropped = self._frames.dropped + self._results.dropped
+        writes = ", ".join(f"{type(a.sink).__name__} {a.writes}" for a in self.actuators)
+        return " | ".join(parts) + f" | dropped {dropped} | writes: {writes}"
@@ -0,0 +1,120 @@
+import glob
+import os
+import shutil
+import subprocess
+import threading
+import time
+
+SYSFS_BACKLIGHT = "/sys/class/backlight"
+
+
+class SysfsBacklight:
+    # Writes straight to /sys/class/backlight/<dev>/brightness through a handle
+    # that stays open, so a brightness change is one write() instead of a fork.
+
+    def __init__(self, device=None, sysfs_root=SYSFS_BACKLIGHT):
+        if device is None:
+            devices = sorted(glob.glob(os.path.join(sysfs_root, "*")))
+            if not devices:
+                raise FileNotFoundError(f"no backlight device under {sysfs_root}")
+            device = devices[0]
+        elif not os.path.isabs(device):
+            device = os.path.join(sysfs_root, device)
+
+        self.device = device
+        with open(os.path.join(device, "max_brightness")) as f:
+            self.max_brightness = int(f.read().strip())
+        self._fh = open(os.path.join(device, "brightness"), "w")
+
+    def write(self, level):
+        raw = round(self.max_brightness * level / 100)
+        self._fh.seek(0)
+        self._fh.write(f"{raw}\n")
+        try:
+            # Real sysfs ignores this, a plain file (tests) needs it
+            self._fh.truncate()
+        except OSError:
+            pass
+        self._fh.flush()
+
+    def close(self):
+        self._fh.close()
+
+
+class BrightnessctlBackend:
+    # Old behaviour, kept as a fallback for machines without a writable sysfs node
+
+    def __init__(self, exe="brightnessctl"):
+        self.exe = exe
+
+    def write(self, level):
+        subprocess.run([self.exe, "set", f"{level}%"],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def close(self):
+        pass
+
+
+class BacklightActuator:
+    # Owns a backend and a worker thread. set() never blocks the frame loop:
+    # it only replaces the pending value, the worker writes the newest one
+    # at most max_rate times a second.
+
+    def __init__(self, backend, max_rate=30.0):
+        self.backend = backend
+        self.min_interval = 1.0 / max_rate if max_rate else 0.0
+        self.writes = 0
+        self.last_written = None
+        self._pending = None
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="backlight", daemon=True)
+        self._thread.start()
+
+    def set(self, level):
+        level = max(0, min(100, int(level)))
+        with self._cond:
+            self._pending = level
+            self._cond.notify()
+
+    def _run(self):
+        last_time = 0.0
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._pending is None:
+                    return
+                wait = last_time + self.min_interval - time.monotonic()
+                if wait > 0:
+                    # Sleep off the rate limit, newer values overwrite _pending meanwhile
+                    self._cond.wait(wait)
+                    continue
+                level, self._pending = self._pending, None
+
+            if level != self.last_written:
+                self.backend.write(level)
+                self.writes += 1
+                self.last_written = level
+            last_time = time.monotonic()
+
+    def close(self):
+        # Flushes whatever is still pending, then stops the worker
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        self.backend.close()
+
+
+def open_backend(sysfs_root=SYSFS_BACKLIGHT, device=None):
+    try:
+        return SysfsBacklight(device, sysfs_root)
+    except OSError:
+        if shutil.which("brightnessctl"):
+            return BrightnessctlBackend()
+        raise
+
+
+def open_backlight(sysfs_root=SYSFS_BACKLIGHT, device=None, max_rate=30.0):
+    return BacklightActuator(open_backend(sysfs_root, device), max_rate)
@@ -0,0 +1,237 @@
+import argparse
+import csv
+import glob
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from .detector import HandDetector
+from .landmarks import INDEX_TIP, NUM_LANDMARKS, THUMB_TIP, UNKNOWN, classify, to_pixels
+from .strategies import SmoothedContinuous, ThresholdStep
+
+FORMATS = ("npz", "csv", "parquet")
+SCALAR_COLUMNS = ("frame", "t", "hand", "dist", "brightness_v1", "brightness_v3", "gesture")
+LANDMARK_COLUMNS = tuple(f"{axis}{i}" for i in range(NUM_LANDMARKS) for axis in "xyz")
+
+
+def iter_frames(path, start=0, stop=None):
+    # Decodes [start, stop) lazily into one reused buffer: each yielded frame
+    # is only valid until the next one is read
+    import cv2
+    from .frames import FrameRing
+    cap = FrameRing(cv2.VideoCapture(path), count=1)
+    try:
+        if start:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+        index = start
+        while stop is None or index < stop:
+            success, img = cap.read()
+            if not success:
+                break
+            yield index, img
+            cap.recycle(img)
+            index += 1
+    finally:
+        cap.release()
+
+
+def video_info(path):
+    # -> (frame count from the container, fps). The count is an estimate
+    # only (VFR and some VBR files get it wrong): chunks are planned from
+    # it, but the last one reads until EOF
+    import cv2
+    cap = cv2.VideoCapture(path)
+    try:
+        frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    finally:
+        cap.release()
+    return frames, fps
+
+
+def process_chunk(path, start, stop, fps, options):
+    # Worker: -> dict of columns for frames [start, stop), or from start to
+    # EOF with stop=None. Each chunk gets a fresh detector: ROI and model
+    # tracking state left over from the worker's previous chunk would make
+    # the output depend on scheduling, and a resumed run differ.
+    detector = HandDetector(**options)
+    hands = {}
+    height = width = 0
+    count = 0
+    try:
+        for index, img in iter_frames(path, start, stop):
+            height, width = img.shape[:2]
+            hand = detector.detect(img)
+            if hand is not None:
+                hands[index - start] = hand.copy()
+            count += 1
+    finally:
+        detector.close()
+    # `count` is what was decoded: the file can end early or run past its
+    # reported length
+    frame = np.arange(start, start + count, dtype=np.int32)
+    landmarks = np.full((count, NUM_LANDMARKS, 3), np.nan, dtype=np.float32)
+    found = np.zeros(count, dtype=bool)
+    if hands:
+        rows = list(hands)
+        landmarks[rows] = np.stack(list(hands.values()))
+        found[rows] = True
+
+    # Everything below runs once per chunk on whole columns
+    px = to_pixels(landmarks, width, height)
+    tips = px[:, [THUMB_TIP, INDEX_TIP], :2]
+    dist = np.hypot(*(tips[:, 1] - tips[:, 0]).T).astype(np.float32)
+    gesture = np.full(count, UNKNOWN, dtype=np.int8)
+    if found.any():
+        gesture[found] = classify(px[found])
+    return {
+        "frame": frame,
+        "t": (frame / fps).astype(np.float64),
+        "hand": found,
+        "dist": dist,
+        "brightness_v1": ThresholdStep().level(dist).astype(np.float32),
+        "brightness_v3": SmoothedContinuous().level(dist).astype(np.float32),
+        "gesture": gesture,
+        "landmarks": landmarks,
+    }
+
+
+def part_path(out_dir, start, fmt):
+    return os.path.join(out_dir, f"part-{start:09d}.{fmt}")
+
+
+def write_part(columns, path, fmt):
+    # tmp + rename: a part file either exists complete or not at all,
+    # which is what makes resuming safe
+    tmp = path + ".tmp"
+    flat = dict(columns)
+    landmarks = flat.pop("landmarks").reshape(len(flat["frame"]), len(LANDMARK_COLUMNS))
+    if fmt == "npz":
+        with open(tmp, "wb") as f:
+            np.savez_compressed(f, landmarks=landmarks, **flat)
+    elif fmt == "csv":
+        with open(tmp, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(SCALAR_COLUMNS + LANDMARK_COLUMNS)
+            scalars = zip(*(flat[c].tolist() for c in SCALAR_COLUMNS))
+            for row, lms in zip(scalars, landmarks.round(5).tolist()):
+                writer.writerow(row + tuple(lms))
+    else:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = {c: flat[c] for c in SCALAR_COLUMNS}
+        table.update({c: landmarks[:, i] for i, c in enumerate(LANDMARK_COLUMNS)})
+        pq.write_table(pa.table(table), tmp)
+    os.replace(tmp, path)
+
+
+def read_timeline(out_dir):
+    # Yields the npz parts back in frame order, one chunk of columns at a time
+    for path in sorted(glob.glob(os.path.join(out_dir, "part-*.npz"))):
+        with np.load(path) as data:
+            columns = {k: data[k] for k in data.files}
+        columns["landmarks"] = columns["landmarks"].reshape(-1, NUM_LANDMARKS, 3)
+        yield columns
+
+
+def write_manifest(path, manifest):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, path)
+
+
+def run_batch(path, out_dir, workers=None, chunk=900, fmt="npz", resume=True, options=None):
+    # Splits the video into frame ranges, runs them across worker processes
+    # (each decoding its own range, so frames never cross processes) and
+    # writes one part file per range. The manifest lists every finished part
+    # with the frames it actually decoded; with resume, those are skipped.
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {FORMATS}")
+    os.makedirs(out_dir, exist_ok=True)
+    reported, fps = video_info(path)
+    run = {"video": os.path.abspath(path), "frames_reported": reported, "fps": fps,
+           "chunk": chunk, "format": fmt}
+    manifest_path = os.path.join(out_dir, "manifest.json")
+    parts = {}
+    if resume and os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            old = json.load(f)
+        if {k: old.get(k) for k in run} != run:
+            raise ValueError(f"{out_dir} holds a different run; use another directory or --no-resume")
+        parts = {int(s): n for s, n in old.get("parts", {}).items()
+                 if os.path.exists(part_path(out_dir, int(s), fmt))}
+
+    starts = list(range(0, max(reported, 1), chunk))
+    last = starts[-1]
+    manifest = dict(run)
+
+    def record():
+        manifest["parts"] = {str(s): parts[s] for s in sorted(parts)}
+        manifest["frames"] = sum(parts.values())  # decoded so far
+        manifest["complete"] = len(parts) == len(starts)
+        write_manifest(manifest_path, manifest)
+
+    record()
+    todo = [s for s in starts if s not in parts]
+    print(f"[*] about {reported} frames in {len(starts)} chunks, "
+          f"{len(starts) - len(todo)} already done")
+
+    options = options or {}
+    workers = workers or os.cpu_count()
+    done = 0
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(workers) as pool:
+        pending = {}
+        todo = iter(todo)
+        while True:
+            # Keep a couple of chunks per worker in flight, not the whole video
+            while len(pending) < workers * 2:
+                start = next(todo, None)
+                if start is None:
+                    break
+                stop = None if start == last else start + chunk
+                fut = pool.submit(process_chunk, path, start, stop, fps, options)
+                pending[fut] = start
+            if not pending:
+                break
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                start = pending.pop(fut)
+                columns = fut.result()
+                count = len(columns["frame"])
+                write_part(columns, part_path(out_dir, start, fmt), fmt)
+                parts[start] = count
+                record()
+                done += count
+                rate = done / (time.perf_counter() - t0)
+                print(f"[+] frames {start}-{start + count} done ({rate:.1f} fps)")
+    if manifest["frames"] != reported:
+        print(f"[!] decoded {manifest['frames']} frames, the container said {reported}")
+    return done
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m gesture_control.batch",
+        description="Turn a recorded video into a per-frame gesture/brightness timeline.")
+    parser.add_argument("video")
+    parser.add_argument("out_dir")
+    parser.add_argument("--workers", type=int, default=None, help="default: CPU count")
+    parser.add_argument("--chunk", type=int, default=900, help="frames per part file")
+    parser.add_argument("--format", choices=FORMATS, default="npz",
+                        help="npz (default), csv, or parquet (needs pyarrow)")
+    parser.add_argument("--no-resume", action="store_true", help="redo chunks that already exist")
+    parser.add_argument("--no-roi", action="store_true")
+    parser.add_argument("--complexity", type=int, default=1, choices=(0, 1))
+    args = parser.parse_args(argv)
+    options = {"roi": not args.no_roi, "model_complexity": args.complexity}
+    run_batch(args.video, args.out_dir, args.workers, args.chunk, args.format,
+              not args.no_resume, options)
+
+
+if __name__ == "__main__":
+    main()
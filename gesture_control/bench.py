@@ -0,0 +1,356 @@
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+from .aio import AsyncRuntime
+from .control import BrightnessRegulator
+from .controller import GestureController
+from .detector import HandDetector
+from .frames import FrameRing
+from .idle import IdleManager
+from .metrics import Metrics
+from .multicam import MultiCameraRunner
+from .sources import LandmarkTrace, TraceDetector, TraceSource, open_source
+from .strategies import STRATEGIES
+from .synthetic import PATTERNS, synthetic_trace
+
+# name -> GestureController / HandDetector settings
+MODES = {
+    "v1-inline": {"strategy": "v1", "threaded": False},
+    "v1-threaded": {"strategy": "v1", "threaded": True},
+    "v3-inline": {"strategy": "v3", "threaded": False},
+    "v3-threaded": {"strategy": "v3", "threaded": True},
+    "v3-asyncio": {"strategy": "v3", "runtime": "asyncio"},
+    "v3-noskip": {"strategy": "v3", "threaded": True, "skip": False},
+    "v3-noroi": {"strategy": "v3", "threaded": True, "roi": False},
+    # Drawing cost without a window; the modes above are fully headless
+    "v3-overlay-full": {"strategy": "v3", "threaded": False, "overlay": "full"},
+    "v3-overlay-reduced": {"strategy": "v3", "threaded": False, "overlay": "reduced"},
+    # Idle gating; pair with --absent so there is something to idle through
+    "v3-idle": {"strategy": "v3", "threaded": True, "idle": True},
+    # Dead-band/hysteresis/slew stage in front of the actuator; compare actuator calls
+    "v1-regulated": {"strategy": "v1", "threaded": True, "regulate": True},
+    "v3-regulated": {"strategy": "v3", "threaded": True, "regulate": True},
+}
+
+# --frame-path: capture + colour conversion only, per-frame allocation vs buffers
+FRAME_PATHS = {
+    "alloc": {"buffers": 0, "reuse": False, "color": "bgr"},
+    "buffers": {"buffers": 6, "reuse": True, "color": "bgr"},
+    "buffers-rgb": {"buffers": 6, "reuse": True, "color": "rgb"},
+}
+
+
+class CountingActuator:
+    def __init__(self):
+        self.calls = 0
+        self.last = None
+
+    def set(self, level):
+        self.calls += 1
+        self.last = level
+
+    async def write(self, level):
+        # Sink protocol, for the asyncio runtime
+        self.set(level)
+
+    def close(self):
+        pass
+
+
+def load_input(args):
+    if args.source:
+        if args.source.lower().endswith((".json", ".npz")):
+            return LandmarkTrace.load(args.source)
+        return args.source
+    absent = [tuple(float(v) for v in span.split(":")) for span in args.absent]
+    return synthetic_trace(seconds=args.seconds, pattern=args.pattern, absent=absent, seed=args.seed)
+
+
+def run_mode(name, args):
+    # Runs in a fresh process so peak RSS belongs to this mode only
+    mode = dict(MODES[name])
+    roi = mode.pop("roi", True)
+    idle = IdleManager(idle_after=30) if mode.pop("idle", False) else None
+    strategy = STRATEGIES[mode.pop("strategy")]()
+    if mode.pop("regulate", False):
+        strategy = BrightnessRegulator(strategy)
+    spec = load_input(args)
+    metrics = Metrics()
+    if isinstance(spec, LandmarkTrace):
+        # The motion gate needs pixels, so idle runs draw the hand into frames.
+        # Without realtime the source waits for each frame to be consumed, so
+        # the threaded modes see every frame too instead of only the newest
+        source = TraceSource(spec, realtime=args.realtime, render_hand=idle is not None,
+                             paced=not args.realtime)
+        detector = TraceDetector(spec, delay=args.detect_ms / 1000, metrics=metrics)
+    else:
+        source = open_source(spec)
+        detector = HandDetector(roi=roi, metrics=metrics)
+
+    use_asyncio = mode.pop("runtime", None) == "asyncio"
+    actuator = CountingActuator()
+    controller = GestureController(
+        strategy, actuator=actuator, detector=detector,
+        source=source, show=False, verbose=False, metrics=metrics, idle=idle, **mode)
+
+    t0 = time.perf_counter()
+    if use_asyncio:
+        AsyncRuntime(controller, [(actuator, None)]).run()
+    else:
+        controller.run(report_every=0)
+    elapsed = time.perf_counter() - t0
+    controller.close()
+
+    stages = controller.stats()
+    frames = stages[-1]["frames"]
+    return {
+        "mode": name,
+        "frames": frames,
+        "seconds": round(elapsed, 3),
+        "fps": round(frames / elapsed, 1) if elapsed else 0.0,
+        "stages": stages,
+        "stage_timings": controller.metrics.snapshot(),
+        "actuator_calls": actuator.calls,
+        "actuator_calls_per_min": round(60 * actuator.calls / elapsed, 1) if elapsed else 0.0,
+        "inference_saved": round(controller.skipper.cpu_saved, 3),
+        "idle_frames": idle.idle_frames if idle is not None else 0,
+        "motion_gated": idle.gated if idle is not None else 0,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+class NullHands:
+    # Stands in for the mediapipe model: takes the pixels, never finds a hand
+    multi_hand_landmarks = None
+
+    def process(self, img):
+        return self
+
+    def close(self):
+        pass
+
+
+class SpinDetector:
+    # Multicam stand-in for the model: frames reach the worker process as
+    # plain pixels (no trace index), so instead of looking landmarks up it
+    # converts the colour and keeps one core busy for `delay` CPU seconds,
+    # like native inference does. Never finds a hand.
+
+    def __init__(self, delay=0.008):
+        self.delay = delay
+
+    def detect(self, frame):
+        import cv2
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        # CPU time, not wall time: workers sharing a core each take longer,
+        # as real inference would, instead of overlapping their waits
+        stop = time.thread_time() + self.delay
+        while time.thread_time() < stop:
+            pass
+        return None
+
+    def close(self):
+        pass
+
+
+def run_multicam(cameras, args):
+    # One trace replayed on `cameras` cameras, one SpinDetector process each
+    # -> per-camera detection rate. Runs in the bench process itself: the
+    # runner spawns its own workers, which a pool process could not.
+    trace = load_input(args)
+    if not isinstance(trace, LandmarkTrace):
+        raise SystemExit("--multicam replays landmark traces; drop --source or pass a .json/.npz")
+    sources = [TraceSource(trace, realtime=args.realtime, render_hand=True, paced=not args.realtime)
+               for _ in range(cameras)]
+    controller = GestureController(STRATEGIES["v3"](), actuator=CountingActuator(), show=False,
+                                   verbose=False, skip=False)
+    runner = MultiCameraRunner(controller, sources, factory=SpinDetector,
+                               options={"delay": args.detect_ms / 1000})
+    runner.run(report_every=0)
+    controller.close()
+    # Rates count from each camera's first frame, not from worker start-up
+    fps = [round(feed.fps, 1) for feed in runner.feeds]
+    return {
+        "mode": f"multicam-{cameras}",
+        "cameras": cameras,
+        "fps_per_camera": fps,
+        "fps_total": round(sum(fps), 1),
+        "captured": [feed.captured for feed in runner.feeds],
+        "processed": [feed.processed for feed in runner.feeds],
+    }
+
+
+def render_video(args, path):
+    # Synthetic trace drawn into real frames, for --frame-path without --source
+    import cv2
+    trace = load_input(args)
+    src = TraceSource(trace, render_hand=True)
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), trace.fps, (trace.width, trace.height))
+    while True:
+        success, img = src.read()
+        if not success:
+            break
+        out.write(img)
+    out.release()
+
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def run_frame_path(name, video, frames):
+    # read + detect() on a looping video; pass 1 times it, pass 2 traces allocations
+    import tracemalloc
+
+    import cv2
+    mode = FRAME_PATHS[name]
+    cap = open_source(video)
+    if mode["buffers"]:
+        cap = FrameRing(cap, mode["buffers"])
+    detector = HandDetector(roi=False, reuse=mode["reuse"], color=mode["color"])
+    detector._hands = NullHands()
+
+    def step():
+        success, img = cap.read()
+        if not success:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            success, img = cap.read()
+        detector.detect(img)
+        if mode["buffers"]:
+            cap.recycle(img)
+        return img
+
+    frame_bytes = step().nbytes
+    t0 = time.perf_counter()
+    for _ in range(frames):
+        step()
+    ms = 1000 * (time.perf_counter() - t0) / frames
+    rss_start = rss_mb()
+
+    tracemalloc.start()
+    transient = []
+    for _ in range(frames):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        step()
+        transient.append(tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+    transient.sort()
+    return {
+        "mode": name,
+        "frames": frames,
+        "ms_per_frame": round(ms, 3),
+        # Bytes allocated and still alive at the peak of one read+detect
+        "alloc_kb_p50": round(transient[len(transient) // 2] / 1024, 1),
+        "alloc_kb_max": round(transient[-1] / 1024, 1),
+        "frame_kb": round(frame_bytes / 1024, 1),
+        "rss_mb_start": round(rss_start, 1),
+        "rss_mb_end": round(rss_mb(), 1),
+    }
+
+
+def frame_path_main(args, ctx):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        video = args.source
+        if video is None or video.lower().endswith((".json", ".npz")):
+            video = os.path.join(tmp, "frames.avi")
+            render_video(args, video)
+        for name in FRAME_PATHS:
+            with ctx.Pool(1) as pool:
+                res = pool.apply(run_frame_path, (name, video, args.frames))
+            results.append(res)
+            print(f"{name:12s} {res['ms_per_frame']:6.2f} ms/frame  "
+                  f"alloc p50 {res['alloc_kb_p50']:7.1f} KB (frame {res['frame_kb']:.0f} KB)  "
+                  f"rss {res['rss_mb_start']:.1f} -> {res['rss_mb_end']:.1f} MB")
+    return results
+
+
+def multicam_main(args):
+    # Total detections/s against camera count. Only uncapped runs
+    # (--no-realtime) say anything about scaling, and only up to one
+    # camera per core: each worker spins a core of its own
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    if args.realtime:
+        print("note: realtime replay caps every camera at the trace's frame rate")
+    if args.multicam > cpus:
+        print(f"note: {cpus} cores for up to {args.multicam} detector processes")
+    results = []
+    for cameras in range(1, args.multicam + 1):
+        res = run_multicam(cameras, args)
+        res["cpus"] = cpus
+        res["scaling"] = round(res["fps_total"] / results[0]["fps_total"], 2) if results else 1.0
+        results.append(res)
+        rates = " ".join(f"{fps:6.1f}" for fps in res["fps_per_camera"])
+        print(f"{res['mode']:12s} {res['fps_total']:8.1f} detections/s total  "
+              f"x{res['scaling']:.2f} of 1 camera  per camera: {rates}")
+    return results
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m gesture_control.bench",
+        description="Benchmark the gesture pipeline modes without a camera.")
+    parser.add_argument("--source", help="video file, image dir/glob or landmark trace "
+                                         "(default: synthetic trace)")
+    parser.add_argument("--pattern", choices=PATTERNS, default="sine")
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--absent", action="append", default=[], metavar="START:END",
+                        help="seconds of the synthetic trace with no hand in view (repeatable)")
+    parser.add_argument("--detect-ms", type=float, default=8.0,
+                        help="simulated inference time for traces")
+    parser.add_argument("--realtime", action=argparse.BooleanOptionalAction, default=True,
+                        help="replay traces at their recorded frame rate like a camera "
+                             "(--no-realtime feeds the next frame once the previous one "
+                             "has been taken, so every mode sees every frame)")
+    parser.add_argument("--modes", nargs="+", choices=sorted(MODES), default=list(MODES))
+    parser.add_argument("--frame-path", action="store_true",
+                        help="instead of the modes, measure per-frame allocations and RSS of "
+                             "capture + colour conversion with and without reused buffers")
+    parser.add_argument("--frames", type=int, default=600, help="frames per --frame-path run")
+    parser.add_argument("--multicam", type=int, metavar="N",
+                        help="instead of the modes, run the multi-camera runner with 1..N "
+                             "cameras and report the detection rate per camera")
+    parser.add_argument("--json", metavar="PATH", help="append results as JSON lines")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    ctx = multiprocessing.get_context("spawn")
+    if args.frame_path:
+        results = frame_path_main(args, ctx)
+    elif args.multicam:
+        results = multicam_main(args)
+    else:
+        results = run_modes(args, ctx)
+    if args.json:
+        with open(args.json, "a") as f:
+            for res in results:
+                f.write(json.dumps(res) + "\n")
+    return results
+
+
+def run_modes(args, ctx):
+    results = []
+    for name in args.modes:
+        with ctx.Pool(1) as pool:
+            res = pool.apply(run_mode, (name, args))
+        results.append(res)
+        stage_txt = ", ".join(
+            f"{s['stage']} p50 {s['latency_p50_ms']:.1f}/p99 {s['latency_p99_ms']:.1f} ms"
+            for s in res["stages"])
+        print(f"{name:18s} {res['fps']:8.1f} fps  {res['actuator_calls']:5d} calls  "
+              f"{res['inference_saved']:4.0%} skipped  {res['peak_rss_mb']:6.1f} MB  {stage_txt}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
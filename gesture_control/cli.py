@@ -0,0 +1,196 @@
+import argparse
+
+from .aio import AsyncRuntime
+from .backlight import SYSFS_BACKLIGHT, open_backlight
+from .control import BrightnessRegulator, ControlLog
+from .controller import GestureController
+from .detector import HandDetector
+from .idle import IdleManager
+from .sinks import BacklightSink, parse_sink
+from .metrics import Metrics, MetricsExporter
+from .multicam import MultiCameraRunner
+from .sources import TraceDetector, TraceRecorder, TraceSource, open_source
+from .strategies import STRATEGIES
+
+# Hands() settings the original scripts used for each mode
+MODEL_OPTIONS = {
+    "v1": {},
+    "v3": {"min_detection_confidence": 0.7, "min_tracking_confidence": 0.8},
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="gesture_control",
+        description="Control screen brightness with the thumb-index distance.")
+    parser.add_argument("--mode", choices=sorted(STRATEGIES), default="v3",
+                        help="v1: 5%% threshold steps, v3: smoothed continuous (default)")
+    parser.add_argument("--camera", action="append",
+                        help="camera index, video file/URL, image dir/glob or "
+                             "landmark trace .json/.npz (default 0). Repeat it for "
+                             "multi-camera mode: one detector process per camera")
+    parser.add_argument("--arbitration", choices=("priority", "nearest"), default="priority",
+                        help="multi-camera: which hand controls brightness")
+    parser.add_argument("--priority", type=int, nargs="+", metavar="N",
+                        help="multi-camera: camera order for --arbitration priority "
+                             "(default: as given)")
+    parser.add_argument("--record", metavar="TRACE",
+                        help="save the detected landmarks to a .json/.npz trace on exit")
+    parser.add_argument("--sysfs-root", default=SYSFS_BACKLIGHT)
+    parser.add_argument("--device", default=None, help="backlight device name")
+    parser.add_argument("--max-rate", type=float, default=30.0,
+                        help="max backlight writes per second (and per --sink without @RATE)")
+    parser.add_argument("--regulate", action=argparse.BooleanOptionalAction, default=None,
+                        help="dead-band/hysteresis/slew control stage before the actuator "
+                             "(mode default: on for v3, off for v1)")
+    parser.add_argument("--deadband", type=float, default=2.0, help="ignore moves up to this many %%")
+    parser.add_argument("--hysteresis", type=float, default=3.0,
+                        help="extra %% needed to reverse direction")
+    parser.add_argument("--slew", type=float, default=250.0,
+                        help="max brightness change in %%/s (0: no limit)")
+    parser.add_argument("--ramp", type=float, default=0.15,
+                        help="seconds for the slew limit to ease in at the start of a move")
+    parser.add_argument("--control-log", metavar="PATH",
+                        help="append every control decision as a JSON line")
+    parser.add_argument("--runtime", choices=("asyncio", "threads", "inline"), default="asyncio",
+                        help="asyncio tasks (default), capture/inference threads, "
+                             "or everything on one thread")
+    parser.add_argument("--sink", action="append", metavar="NAME[:TARGET][@RATE]",
+                        help="asyncio runtime outputs: backlight, volume, socket:HOST:PORT or "
+                             "socket:/unix/path, each with an optional writes/s limit (default --max-rate) "
+                             "(repeatable, default: backlight)")
+    parser.add_argument("--headless", action="store_true",
+                        help="no window and no drawing; stop with Ctrl-C or SIGTERM")
+    parser.add_argument("--overlay", choices=("full", "reduced", "none"), default=None,
+                        help="preview drawing: full, reduced (HUD redrawn only on change) "
+                             "or none (default: full, none when headless)")
+    parser.add_argument("--no-roi", action="store_true", help="always run full-frame detection")
+    parser.add_argument("--frame-buffers", type=int, default=6, metavar="N",
+                        help="read frames into N preallocated buffers (0: new array per frame)")
+    parser.add_argument("--camera-format", choices=("bgr", "rgb"), default="bgr",
+                        help="pixel order the source delivers; rgb skips the colour "
+                             "conversion before detection (e.g. a GStreamer RGB appsink)")
+    parser.add_argument("--smooth", action=argparse.BooleanOptionalAction, default=None,
+                        help="One-Euro filter the fingertips (mode default)")
+    parser.add_argument("--skip", action=argparse.BooleanOptionalAction, default=None,
+                        help="adaptive inference frame skipping (mode default)")
+    parser.add_argument("--max-skip", type=int, default=4)
+    parser.add_argument("--idle-after", type=int, default=150,
+                        help="frames without a hand before going idle (0 disables)")
+    parser.add_argument("--idle-size", default="320x240", help="camera resolution while idle")
+    parser.add_argument("--idle-fps", type=float, default=5.0, help="camera FPS while idle")
+    parser.add_argument("--complexity", type=int, default=1, choices=(0, 1))
+    parser.add_argument("--no-metrics", action="store_true", help="disable per-stage timing")
+    parser.add_argument("--metrics-jsonl", metavar="PATH", help="append stage timings as JSON lines")
+    parser.add_argument("--metrics-prom", metavar="PATH",
+                        help="Prometheus textfile for the node exporter textfile collector")
+    parser.add_argument("--metrics-interval", type=float, default=10.0)
+    parser.add_argument("--hud", action="store_true", help="show stage timings on the preview")
+    return parser
+
+
+def make_strategy(args):
+    strategy = STRATEGIES[args.mode]()
+    if not args.regulate:
+        return strategy
+    return BrightnessRegulator(strategy, deadband=args.deadband, hysteresis=args.hysteresis,
+                               max_rate=args.slew or None, ramp=args.ramp,
+                               log=ControlLog(args.control_log))
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.regulate is None:
+        args.regulate = STRATEGIES[args.mode].regulate
+    if args.sink and args.runtime != "asyncio":
+        parser.error("--sink needs --runtime asyncio")
+    cameras = [int(c) if c.isdigit() else c for c in (args.camera or ["0"])]
+    if len(cameras) > 1:
+        return run_multicam(args, cameras)
+    source = open_source(cameras[0], realtime=True)
+    if isinstance(source, TraceSource) and args.idle_after:
+        # Idle wakes on the motion gate, which looks at pixels: blank replay
+        # frames would never wake it once the hand has been gone a while
+        source.render_hand = True
+
+    strategy = make_strategy(args)
+    metrics = Metrics(enabled=not args.no_metrics)
+    if isinstance(source, TraceSource):
+        detector = TraceDetector(source.trace, metrics=metrics)
+    else:
+        detector = HandDetector(
+            roi=not args.no_roi,
+            model_complexity=args.complexity,
+            metrics=metrics,
+            color=args.camera_format,
+            **MODEL_OPTIONS[args.mode],
+        )
+    if args.record:
+        detector = TraceRecorder(detector)
+    runtime = None
+    if args.runtime == "asyncio":
+        # The runtime installs its own SinkGroup as the controller's actuator
+        actuator = None
+        if args.sink:
+            # A spec without @RATE gets --max-rate, like the default sink
+            sinks = []
+            for spec in args.sink:
+                sink, rate = parse_sink(spec)
+                sinks.append((sink, args.max_rate if rate is None else rate))
+        else:
+            sinks = [(BacklightSink(args.sysfs_root, args.device), args.max_rate)]
+    else:
+        actuator = open_backlight(args.sysfs_root, args.device, args.max_rate)
+    controller = GestureController(
+        strategy, actuator=actuator, detector=detector, source=source,
+        threaded=args.runtime == "threads", smooth=args.smooth, skip=args.skip,
+        max_skip=args.max_skip, metrics=metrics, hud=args.hud,
+        show=not args.headless, overlay=args.overlay,
+        frame_buffers=args.frame_buffers, color=args.camera_format,
+    )
+    if args.idle_after:
+        low_size = tuple(int(v) for v in args.idle_size.lower().split("x"))
+        controller.idle = IdleManager(args.idle_after, low_size, args.idle_fps)
+    if args.runtime == "asyncio":
+        runtime = AsyncRuntime(controller, sinks)
+    exporter = None
+    if metrics.enabled and (args.metrics_jsonl or args.metrics_prom):
+        exporter = MetricsExporter(metrics, args.metrics_jsonl, args.metrics_prom,
+                                   args.metrics_interval)
+        exporter.start()
+
+    quit_hint = "Ctrl-C to quit" if args.headless else "Press 'q' to quit"
+    print(f"[*] Move thumb and index apart to change brightness. {quit_hint}.")
+    try:
+        if runtime is not None:
+            runtime.run()
+        else:
+            controller.run()
+    finally:
+        if exporter is not None:
+            exporter.stop()
+        if args.record:
+            detector.trace().save(args.record)
+            print(f"[*] Landmark trace saved to {args.record}")
+        controller.close()
+        if args.regulate:
+            strategy.close()
+
+
+def run_multicam(args, cameras):
+    # Headless: the frames live in shared memory for the detector processes
+    strategy = make_strategy(args)
+    actuator = open_backlight(args.sysfs_root, args.device, args.max_rate)
+    controller = GestureController(strategy, actuator=actuator, show=False,
+                                   smooth=args.smooth, skip=False)
+    options = dict(roi=not args.no_roi, model_complexity=args.complexity,
+                   color=args.camera_format, **MODEL_OPTIONS[args.mode])
+    runner = MultiCameraRunner(controller, cameras, args.arbitration, args.priority, options=options)
+    print(f"[*] {len(cameras)} cameras, {args.arbitration} arbitration. Ctrl-C to quit.")
+    try:
+        runner.run()
+    finally:
+        controller.close()
+        if args.regulate:
+            strategy.close()
@@ -0,0 +1,148 @@
+import json
+import time
+
+import numpy as np
+
+
+class ControlLog:
+    # One record per control decision, optionally appended to a JSON-lines
+    # file, plus the counters behind the calls-per-minute figure.
+
+    def __init__(self, path=None):
+        self.path = path
+        self._file = open(path, "a", buffering=1) if path else None
+        self.decisions = 0
+        self.calls = 0
+        self.reasons = {}
+        self.t_first = None
+        self.t_last = None
+
+    def record(self, t, dist, target, setpoint, output, level, reason, emitted):
+        if self.t_first is None:
+            self.t_first = t
+        self.t_last = t
+        self.decisions += 1
+        self.calls += emitted
+        self.reasons[reason] = self.reasons.get(reason, 0) + 1
+        if self._file is not None:
+            self._file.write(json.dumps({
+                "t": round(t, 4),
+                "dist": None if dist is None else round(float(dist), 2),
+                "target": None if target is None else round(target, 2),
+                "setpoint": round(setpoint, 2),
+                "output": round(output, 2),
+                "level": level,
+                "reason": reason,
+                "call": emitted,
+            }) + "\n")
+
+    def calls_per_minute(self):
+        if self.t_first is None or self.t_last == self.t_first:
+            return 0.0
+        return 60 * self.calls / (self.t_last - self.t_first)
+
+    def report(self):
+        reasons = ", ".join(f"{k} {v}" for k, v in sorted(self.reasons.items()))
+        return (f"control: {self.calls}/{self.decisions} calls "
+                f"({self.calls_per_minute():.0f}/min; {reasons})")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class BrightnessRegulator:
+    # Control stage between a strategy's distance -> level mapping and the
+    # actuator. Stands in for the strategy (same update/level/current API)
+    # and only returns a level when the integer output actually changes.
+    #
+    #   deadband    target moves smaller than this (in %) are ignored
+    #   hysteresis  extra % needed to reverse the last direction of travel,
+    #               so jitter around a level can't flip-flop it
+    #   max_rate    slew limit in %/s (None: jump straight to the setpoint)
+    #   ramp        seconds over which the slew limit eases in from 0 at the
+    #               start of each move
+
+    def __init__(self, strategy, deadband=2.0, hysteresis=3.0, max_rate=250.0, ramp=0.15,
+                 log=None, max_dt=0.25):
+        self.strategy = strategy
+        self.name = strategy.name
+        self.smooth = strategy.smooth
+        self.skip = strategy.skip
+        self.announce = strategy.announce
+        self.deadband = deadband
+        self.hysteresis = hysteresis
+        self.max_rate = max_rate
+        self.ramp = ramp
+        self.max_dt = max_dt
+        self.log = log if log is not None else ControlLog()
+        self.current = strategy.current
+        self.setpoint = self.output = None if self.current is None else float(self.current)
+        self.direction = 0
+        self._move_start = None
+        self._last_t = None
+
+    def level(self, dist):
+        return self.strategy.level(dist)
+
+    def update(self, dist, now=None):
+        now = time.perf_counter() if now is None else now
+        target = float(self.level(dist))
+        if self.setpoint is None:
+            self.setpoint = self.output = target
+            return self._emit(now, dist, target, "init")
+        return self._step(now, dist, target, self._retarget(target, now))
+
+    def settle(self, now=None):
+        # No measurement this frame (hand lost, skipped): keep slewing towards
+        # the last setpoint so a quick gesture still lands where it ended
+        if self.output is None or self.output == self.setpoint:
+            self._last_t = None
+            return None
+        now = time.perf_counter() if now is None else now
+        return self._step(now, None, None, "settle")
+
+    def _retarget(self, target, now):
+        delta = target - self.setpoint
+        band = self.deadband
+        if self.direction and np.sign(delta) != self.direction:
+            band += self.hysteresis
+        if abs(delta) <= band:
+            return "deadband" if abs(delta) <= self.deadband else "hysteresis"
+        direction = int(np.sign(delta))
+        if direction != self.direction or self.output == self.setpoint:
+            self._move_start = now
+        self.direction = direction
+        self.setpoint = target
+        return "move"
+
+    def _step(self, now, dist, target, reason):
+        dt = 0.0 if self._last_t is None else min(now - self._last_t, self.max_dt)
+        self._last_t = now
+        gap = self.setpoint - self.output
+        if gap:
+            if self.max_rate is None:
+                self.output = self.setpoint
+            else:
+                rate = self.max_rate
+                if self.ramp and self._move_start is not None:
+                    rate *= min(1.0, (now - self._move_start) / self.ramp)
+                self.output += float(np.clip(gap, -rate * dt, rate * dt))
+        return self._emit(now, dist, target, reason)
+
+    def _emit(self, now, dist, target, reason):
+        level = int(round(self.output))
+        emitted = level != self.current
+        if emitted:
+            self.current = level
+        elif reason == "move":
+            reason = "slew"
+        self.log.record(now, dist, target, self.setpoint, self.output, level, reason, emitted)
+        return level if emitted else None
+
+    def report(self):
+        return self.log.report()
+
+    def close(self):
+        self.log.close()
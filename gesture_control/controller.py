@@ -0,0 +1,299 @@
+import signal
+import threading
+import time
+
+import numpy as np
+
+from .detector import HandDetector
+from .filters import AdaptiveSkipper, TipPredictor
+from .frames import COLORS, FrameRing, Scratch, recycler
+from .idle import IdleCapture
+from .landmarks import FIST, INDEX_TIP, STATE_NAMES, THUMB_TIP, UNKNOWN, classify, to_pixels
+from .metrics import Metrics, draw_hud
+from .pipeline import Pipeline, StageStats
+from .sources import open_source
+
+TIPS = [THUMB_TIP, INDEX_TIP]
+
+OVERLAYS = ("full", "reduced", "none")
+
+
+class GestureController:
+    # Thumb-index distance -> brightness. The strategy decides how distance
+    # maps to a level; the controller owns capture, detection, overlay and
+    # actuation. Nothing touches the camera or the model until run().
+    #
+    # show=False never touches HighGUI. overlay picks what gets drawn:
+    # "full" (landmarks, tips, HUD), "reduced" (cached HUD only, re-rendered
+    # when the level changes) or "none".
+    #
+    # frame_buffers=N reads frames into a ring of N preallocated arrays (0 =
+    # a new array per frame), each reused once the frame has been shown. color="rgb" declares that the source already
+    # delivers RGB, so detection skips its colour conversion.
+
+    def __init__(self, strategy, actuator=None, detector=None, source=0, show=True,
+                 threaded=True, smooth=None, skip=None, max_skip=4,
+                 window="Gesture Brightness Control", verbose=True, metrics=None, hud=False,
+                 overlay=None, fist_lock=True, lock_frames=5, idle=None,
+                 frame_buffers=6, color="bgr"):
+        if color not in COLORS:
+            raise ValueError(f"color must be one of {COLORS}, got {color!r}")
+        self.strategy = strategy
+        self.actuator = actuator
+        # Per-stage timings are always on; pass Metrics(enabled=False) to opt out
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.hud = hud
+        self.color = color
+        self.detector = detector if detector is not None else HandDetector(metrics=self.metrics, color=color)
+        self.source = source
+        self.frame_buffers = frame_buffers
+        self._scratch = Scratch()
+        self.show = show
+        self.overlay = overlay if overlay is not None else ("full" if show else "none")
+        if self.overlay not in OVERLAYS:
+            raise ValueError(f"overlay must be one of {OVERLAYS}, got {overlay!r}")
+        self._hud_level = None
+        self._hud_patch = None
+        self._stop = threading.Event()
+        self.threaded = threaded
+        self.window = window
+        self.verbose = verbose
+
+        smooth = strategy.smooth if smooth is None else smooth
+        skip = strategy.skip if skip is None else skip
+        # Skipping needs the predictor for the in-between frames
+        self.tips = TipPredictor() if smooth or skip else None
+        self.skip = skip
+        self.skipper = AdaptiveSkipper(max_skip if skip else 1)
+        self.idle = idle  # IdleManager or None
+        self.pipeline = None
+        self.inline_stats = StageStats("loop")
+
+        # Holding a fist for `lock_frames` detections toggles the brightness lock
+        self.fist_lock = fist_lock
+        self.lock_frames = lock_frames
+        self.locked = False
+        self.gesture = UNKNOWN
+        self._fist_count = 0
+
+    def open_capture(self):
+        cap = open_source(self.source)
+        if self.idle is not None:
+            cap = IdleCapture(cap, self.idle)
+        if self.frame_buffers:
+            cap = FrameRing(cap, self.frame_buffers)
+        return cap
+
+    def detect(self, frame):
+        # -> (21x3 pixel landmarks or None, (thumb, index) points or None, gesture)
+        now = time.perf_counter()
+        if self.tips is not None and not self.skipper.should_detect():
+            return None, self.tips.predict(now), self.gesture
+        if self.idle is not None and not self.idle.should_detect(frame):
+            return None, None, UNKNOWN
+
+        hand = self.detector.detect(frame)
+        if self.idle is not None:
+            self.idle.update(hand is not None)
+            if not self.idle.tracking(frame):
+                hand = None
+        return self.track(hand, frame.shape, now)
+
+    def track(self, hand, frame_shape, now=None):
+        # Normalised detection (or None) -> pixel landmarks, gesture, filtered tips.
+        # The pixel landmarks are a new array: `hand` is a detector pool buffer
+        # that later detections reuse, while these go on to the display
+        # thread, which may still be drawing them by then.
+        if now is None:
+            now = time.perf_counter()
+        if hand is None:
+            if self.tips is not None:
+                self.tips.reset()
+            self.skipper.lost()
+            self.gesture = UNKNOWN
+            return None, None, UNKNOWN
+
+        h, w = frame_shape[:2]
+        hand = to_pixels(hand, w, h, out=np.empty_like(hand))
+        self.gesture = int(classify(hand))
+        points = hand[TIPS, :2]
+        if self.tips is not None:
+            points = self.tips.observe(points, now)
+            self.skipper.update(self.tips.speed)
+        return hand, points, self.gesture
+
+    def update_lock(self, gesture):
+        self._fist_count = self._fist_count + 1 if gesture == FIST else 0
+        if self._fist_count == self.lock_frames:
+            self.locked = not self.locked
+            if self.verbose:
+                print(f"[+] Brightness {'locked' if self.locked else 'unlocked'}")
+
+    def handle(self, img, hand, points, gesture=UNKNOWN):
+        brightness = None
+        held = False
+        if self.fist_lock:
+            self.update_lock(gesture)
+            held = self.locked or gesture == FIST
+        if not held:
+            with self.metrics.stage("brightness"):
+                if points is not None:
+                    (x1, y1), (x2, y2) = points
+                    brightness = self.strategy.update(np.hypot(x2 - x1, y2 - y1))
+                else:
+                    brightness = self.strategy.settle()
+                if brightness is not None and self.actuator is not None:
+                    self.actuator.set(brightness)
+            if brightness is not None and self.verbose and self.strategy.announce:
+                print(f"[+] Brightness set to {brightness}%")
+        if self.overlay == "full":
+            with self.metrics.stage("draw"):
+                self.draw(img, hand, points, gesture)
+        elif self.overlay == "reduced":
+            with self.metrics.stage("draw"):
+                self.draw_reduced(img)
+        return brightness
+
+    def draw(self, img, hand, points, gesture=UNKNOWN):
+        import cv2
+
+        if hand is not None:
+            self.detector.draw(img, hand)
+        if self.hud:
+            draw_hud(img, self.metrics)
+        if points is None:
+            return
+
+        (x1, y1), (x2, y2) = np.asarray(points).astype(int)
+        cv2.circle(img, (x1, y1), 10, (255, 0, 0), cv2.FILLED)
+        cv2.circle(img, (x2, y2), 10, (255, 0, 0), cv2.FILLED)
+        cv2.line(img, (x1, y1), (x2, y2), (0, 255, 0), 2)
+
+        level = self.strategy.current
+        if level is None:
+            return
+        label = f"Brightness: {level}%" + (" [locked]" if self.locked else "")
+        cv2.putText(img, label, (10, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
+        cv2.putText(img, STATE_NAMES[gesture], (10, 120), cv2.FONT_HERSHEY_PLAIN, 1.2, (255, 255, 0), 1)
+        bar_width = int((level / 100) * 300)
+        cv2.rectangle(img, (10, 70), (310, 100), (255, 255, 255), 2)
+        cv2.rectangle(img, (10, 70), (10 + bar_width, 100), (0, 255, 255), cv2.FILLED)
+
+    def draw_reduced(self, img):
+        level = self.strategy.current
+        if level is None:
+            return
+        if (level, self.locked) != self._hud_level:
+            import cv2
+            patch = np.zeros((60, 320, 3), dtype=np.uint8)
+            label = f"Brightness: {level}%" + (" [locked]" if self.locked else "")
+            cv2.putText(patch, label, (5, 22),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+            bar_width = int((level / 100) * 300)
+            cv2.rectangle(patch, (5, 32), (305, 52), (255, 255, 255), 2)
+            cv2.rectangle(patch, (5, 32), (5 + bar_width, 52), (0, 255, 255), cv2.FILLED)
+            self._hud_patch, self._hud_level = patch, (level, self.locked)
+        # Same level as last frame: just copy the cached pixels back in
+        h, w = self._hud_patch.shape[:2]
+        img[10:10 + h, 5:5 + w] = self._hud_patch[:img.shape[0] - 10, :img.shape[1] - 5]
+        if self.hud:
+            draw_hud(img, self.metrics)
+
+    def show_frame(self, img):
+        # Preview window (HighGUI wants BGR) -> the key pressed, 0xFF for none
+        import cv2
+        with self.metrics.stage("imshow"):
+            if self.color == "rgb":
+                img = cv2.cvtColor(img, cv2.COLOR_RGB2BGR, dst=self._scratch.get("show", img.shape))
+            cv2.imshow(self.window, img)
+            return cv2.waitKey(1) & 0xFF
+
+    def frames(self, cap):
+        # Yields (frame, hand, points, gesture), threaded or on the calling thread
+        if self.threaded:
+            self.pipeline = Pipeline(cap, self.detect, self.metrics).start()
+            try:
+                for packet in self.pipeline:
+                    yield (packet.frame,) + packet.result
+            finally:
+                self.pipeline.stop()
+            return
+
+        recycle = recycler(cap)
+        while True:
+            with self.metrics.stage("cap_read"):
+                success, img = cap.read()
+            if not success:
+                break
+            t0 = time.perf_counter()
+            yield (img,) + self.detect(img)
+            self.inline_stats.tick(time.perf_counter() - t0)
+            recycle(img)
+
+    def stats(self):
+        if self.pipeline is not None:
+            return self.pipeline.stats()
+        return [self.inline_stats.summary()]
+
+    def report(self):
+        if self.pipeline is not None:
+            parts = [self.pipeline.report()]
+        else:
+            s = self.inline_stats.summary()
+            parts = [f"loop: {s['fps']:.1f} fps, p50 {s['latency_p50_ms']:.1f} ms"]
+        parts.append(self.detector.report())
+        parts.append(self.strategy.report())
+        if self.skip:
+            parts.append(self.skipper.report())
+        if self.idle is not None:
+            parts.append(self.idle.report())
+        return " | ".join(p for p in parts if p)
+
+    def stop(self, *_):
+        self._stop.set()
+
+    def run(self, report_every=5.0):
+        # Ctrl-C / SIGTERM end the loop cleanly (the only way out when headless)
+        handlers = {}
+        if threading.current_thread() is threading.main_thread():
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                handlers[sig] = signal.signal(sig, self.stop)
+        try:
+            self._run(report_every)
+        finally:
+            for sig, handler in handlers.items():
+                signal.signal(sig, handler)
+
+    def _run(self, report_every):
+        self._stop.clear()
+        cap = self.open_capture()
+        if self.actuator is not None and self.strategy.current is not None:
+            self.actuator.set(self.strategy.current)
+        last_report = time.time()
+        frames = self.frames(cap)
+
+        try:
+            for img, hand, points, gesture in frames:
+                self.handle(img, hand, points, gesture)
+                if self._stop.is_set():
+                    break
+
+                if report_every and time.time() - last_report > report_every:
+                    print("[stats]", self.report())
+                    last_report = time.time()
+
+                if self.show and self.show_frame(img) == ord('q'):
+                    break
+        finally:
+            frames.close()
+            cap.release()
+            if self.show:
+                import cv2
+                cv2.destroyAllWindows()
+        if self.verbose:
+            print("[stats]", self.report())
+
+    def close(self):
+        self.detector.close()
+        if self.actuator is not None:
+            self.actuator.close()
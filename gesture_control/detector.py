@@ -0,0 +1,56 @@
+from . import landmarks
+from .frames import Scratch, to_rgb
+from .metrics import NULL_METRICS
+from .roi import HandROITracker
+
+
+class HandDetector:
+    # MediaPipe Hands behind a tiny detect(frame) -> (21, 3) array | None API.
+    # The array is normalised and lives in a preallocated LandmarkPool buffer,
+    # valid only until the pool comes round to it again.
+    # mediapipe is imported and the model built on the first detect() call,
+    # so constructing a controller costs nothing.
+    #
+    # color="rgb" is for sources that already deliver RGB: no conversion at
+    # all. reuse=True keeps the crop/RGB images in buffers allocated once.
+
+    def __init__(self, roi=True, metrics=NULL_METRICS, color="bgr", reuse=True, **options):
+        self.options = {"max_num_hands": 1, **options}
+        self.metrics = metrics
+        self.color = color
+        self.scratch = Scratch() if reuse else None
+        self.tracker = HandROITracker(metrics=metrics, color=color, scratch=self.scratch) if roi else None
+        self.pool = landmarks.LandmarkPool()
+        self._hands = None
+
+    @property
+    def hands(self):
+        if self._hands is None:
+            import mediapipe as mp
+            self._hands = mp.solutions.hands.Hands(**self.options)
+        return self._hands
+
+    def detect(self, frame):
+        # `frame` is BGR straight from the camera (RGB with color="rgb")
+        out = self.pool.take()
+        if self.tracker is not None:
+            return self.tracker.process(self.hands, frame, out)
+
+        with self.metrics.stage("cvt_color"):
+            img_rgb = to_rgb(frame, self.color, self.scratch)
+        with self.metrics.stage("hands_process"):
+            results = self.hands.process(img_rgb)
+        if not results.multi_hand_landmarks:
+            return None
+        return landmarks.from_mediapipe(results.multi_hand_landmarks[0], out)
+
+    def draw(self, img, points):
+        landmarks.draw(img, points)
+
+    def report(self):
+        return self.tracker.report() if self.tracker is not None else ""
+
+    def close(self):
+        if self._hands is not None:
+            self._hands.close()
+            self._hands = None
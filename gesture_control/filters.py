@@ -0,0 +1,140 @@
+import math
+
+import numpy as np
+
+
+class OneEuroFilter:
+    # One-Euro filter (Casiez et al.): a low-pass whose cutoff rises with speed.
+    # min_cutoff trades jitter at rest, beta trades lag while moving.
+    # Works on floats and on numpy arrays alike.
+
+    def __init__(self, min_cutoff=1.0, beta=0.01, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self.x = None
+        self.dx = 0.0
+        self.t = None
+
+    @staticmethod
+    def alpha(cutoff, dt):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def __call__(self, x, t):
+        if self.x is None:
+            self.x, self.t = x, t
+            return x
+        dt = t - self.t
+        if dt <= 0:
+            return self.x
+        dx = (x - self.x) / dt
+        self.dx = self.dx + self.alpha(self.d_cutoff, dt) * (dx - self.dx)
+        cutoff = self.min_cutoff + self.beta * abs(self.dx)
+        self.x = self.x + self.alpha(cutoff, dt) * (x - self.x)
+        self.t = t
+        return self.x
+
+
+class TipPredictor:
+    # Smooths the thumb/index tip points on every detection and extrapolates
+    # them with the filtered velocity on frames where detection is skipped.
+
+    def __init__(self, min_cutoff=1.0, beta=0.01, horizon=0.25):
+        self.filter = OneEuroFilter(min_cutoff, beta)
+        self.horizon = horizon
+        self.points = None
+        self.velocity = None
+        self.t = None
+
+    @property
+    def ready(self):
+        return self.points is not None
+
+    @property
+    def speed(self):
+        # Fastest tip, px/s
+        if self.velocity is None or not np.ndim(self.velocity):
+            return 0.0
+        return float(np.hypot(self.velocity[:, 0], self.velocity[:, 1]).max())
+
+    def observe(self, points, t):
+        points = self.filter(np.asarray(points, dtype=np.float32), t)
+        self.velocity = self.filter.dx
+        self.points, self.t = points, t
+        return points
+
+    def predict(self, t):
+        if self.velocity is None or not np.ndim(self.velocity):
+            return self.points
+        # Don't extrapolate further than `horizon` seconds past the last detection
+        dt = min(t - self.t, self.horizon)
+        return self.points + self.velocity * dt
+
+    def reset(self):
+        self.filter.reset()
+        self.points = self.velocity = self.t = None
+
+
+class AdaptiveSkipper:
+    # Decides whether the model runs on this frame. The detection interval
+    # grows by one frame while the hand is slow and snaps back to 1 on fast motion.
+
+    def __init__(self, max_interval=4, slow=80.0, fast=400.0):
+        self.max_interval = max_interval
+        self.slow = slow
+        self.fast = fast
+        self.interval = 1
+        self.since = 0
+        self.frames = 0
+        self.detections = 0
+
+    def should_detect(self):
+        self.frames += 1
+        self.since += 1
+        if self.since >= self.interval:
+            self.since = 0
+            self.detections += 1
+            return True
+        return False
+
+    def update(self, speed):
+        if speed >= self.fast:
+            self.interval = 1
+        elif speed <= self.slow:
+            self.interval = min(self.interval + 1, self.max_interval)
+        else:
+            self.interval = max(self.interval - 1, 1)
+
+    def lost(self):
+        self.interval = 1
+        self.since = 0
+
+    @property
+    def cpu_saved(self):
+        # Share of frames that skipped inference vs. running it every frame
+        return 1 - self.detections / self.frames if self.frames else 0.0
+
+    def report(self):
+        return f"inference on {self.detections}/{self.frames} frames ({self.cpu_saved:.0%} saved)"
+
+
+def tuning_surface(times, values, truth=None, min_cutoffs=(0.3, 1.0, 3.0), betas=(0.0, 0.01, 0.1)):
+    # Jitter vs. latency over a grid of filter settings, for picking
+    # min_cutoff/beta from a recorded or synthetic trace. Jitter is the RMS
+    # second difference of the output; lag is the mean error against `truth`
+    # (or against the raw input when there is no ground truth).
+    values = np.asarray(values, dtype=np.float64)
+    ref = values if truth is None else np.asarray(truth, dtype=np.float64)
+    rows = []
+    for min_cutoff in min_cutoffs:
+        for beta in betas:
+            f = OneEuroFilter(min_cutoff, beta)
+            out = np.array([f(v, t) for t, v in zip(times, values)])
+            jitter = float(np.sqrt(np.mean(np.diff(out, 2, axis=0) ** 2))) if len(out) > 2 else 0.0
+            lag = float(np.mean(np.abs(out - ref)))
+            rows.append({"min_cutoff": min_cutoff, "beta": beta, "jitter": jitter, "lag": lag})
+    return rows
@@ -0,0 +1,104 @@
+import threading
+
+import numpy as np
+
+COLORS = ("bgr", "rgb")
+
+
+class FrameRing:
+    # Wraps the capture so cap.read() decodes into one of `count` preallocated
+    # buffers instead of a fresh array per frame. A frame belongs to whoever
+    # holds it until they hand it back with recycle(frame), and read() only
+    # decodes into buffers that were handed back, so a frame never changes
+    # under a consumer. The pipelines recycle a frame once it has been shown
+    # or a mailbox dropped it, and hold at most five at once (reading, two
+    # mailboxes, model, display), hence the default of 6. When every buffer
+    # is out anyway, read() lets the source allocate (counted in `spills`).
+    #
+    # The buffers are sized from the first frame and re-sized whenever the
+    # source hands back something else (idle mode switching resolution);
+    # frames of the old size are just dropped when they come back.
+
+    def __init__(self, cap, count=6):
+        self.cap = cap
+        self.count = count
+        self.buffers = []
+        self.free = []
+        self.reallocs = 0
+        self.spills = 0
+        self._lock = threading.Lock()
+
+    def _allocate(self, shape, dtype):
+        self.buffers = [np.empty(shape, dtype) for _ in range(self.count)]
+        self.free = list(self.buffers)
+        self.reallocs += 1
+
+    def read(self):
+        with self._lock:
+            buf = self.free.pop() if self.free else None
+        if buf is None:
+            success, img = self.cap.read()
+            if success:
+                with self._lock:
+                    if not self.buffers:
+                        self._allocate(img.shape, img.dtype)
+                    else:
+                        self.spills += 1
+            return success, img
+
+        success, img = self.cap.read(buf)
+        if img is not buf:
+            # Source ignored the buffer: new resolution, or it makes its own frames
+            with self._lock:
+                if success and img.shape != buf.shape:
+                    self._allocate(img.shape, img.dtype)
+                else:
+                    self.free.append(buf)
+        return success, img
+
+    def recycle(self, frame):
+        # A frame from read() that nothing looks at any more. Anything that
+        # is not one of the current buffers goes on to the source, if it
+        # wants frames back too (a paced TraceSource)
+        with self._lock:
+            if any(frame is b for b in self.buffers):
+                if not any(frame is b for b in self.free):
+                    self.free.append(frame)
+                return
+        recycler(self.cap)(frame)
+
+    def release(self):
+        self.cap.release()
+
+    def __getattr__(self, name):
+        return getattr(self.cap, name)
+
+
+def recycler(cap):
+    # -> cap.recycle, or a no-op for captures that are not a FrameRing
+    return getattr(cap, "recycle", None) or (lambda frame: None)
+
+
+class Scratch:
+    # Named reusable output arrays (cvtColor/resize dst=), reallocated only
+    # when the requested shape changes. Not thread-safe: one per consumer.
+
+    def __init__(self):
+        self._bufs = {}
+
+    def get(self, name, shape, dtype=np.uint8):
+        buf = self._bufs.get(name)
+        if buf is None or buf.shape != shape or buf.dtype != dtype:
+            buf = self._bufs[name] = np.empty(shape, dtype)
+        return buf
+
+
+def to_rgb(frame, color="bgr", scratch=None, name="rgb"):
+    # The model wants RGB. Sources that already deliver RGB skip the conversion;
+    # with a Scratch the result lands in a reused buffer.
+    if color == "rgb":
+        return frame
+    import cv2
+    if scratch is None:
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=scratch.get(name, frame.shape))
@@ -0,0 +1,132 @@
+import queue
+
+import numpy as np
+
+ACTIVE = "active"
+IDLE = "idle"
+
+
+class MotionGate:
+    # Frame difference on tiny grayscale thumbnails: motion when more than
+    # `area` of the thumbnail pixels changed by over `threshold` levels.
+    # Costs a resize of the frame, nowhere near a model run.
+
+    def __init__(self, size=(32, 24), threshold=20, area=0.01):
+        self.size = size
+        self.threshold = threshold
+        self.area = area
+        self._prev = None
+        self._small = np.empty((size[1], size[0], 3), dtype=np.uint8)
+
+    def moved(self, frame):
+        import cv2
+        cv2.resize(frame, self.size, dst=self._small, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY)
+        prev, self._prev = self._prev, gray
+        if prev is None:
+            return False
+        changed = cv2.absdiff(gray, prev) > self.threshold
+        return changed.mean() > self.area
+
+    def reset(self):
+        self._prev = None
+
+
+class IdleManager:
+    # ACTIVE: every frame goes to the model. After `idle_after` detections in
+    # a row without a hand we go IDLE: the camera is asked for `low_size` at
+    # `low_fps` and the model only runs on frames the motion gate lets
+    # through. `confirm` hands in a row bring back full-rate tracking;
+    # tracking(frame) says when a detection may drive the output again.
+
+    def __init__(self, idle_after=150, low_size=(320, 240), low_fps=5, confirm=2, gate=None):
+        self.idle_after = idle_after
+        self.low_size = low_size
+        self.low_fps = low_fps
+        self.confirm = confirm
+        self.gate = gate if gate is not None else MotionGate()
+        self.state = ACTIVE
+        self.misses = 0
+        self.hits = 0
+        self.frames = 0
+        self.gated = 0
+        self.idle_frames = 0
+        self.full_shape = None  # (h, w) of the first frame, before any idling
+        # Camera settings ("low"/"full") for the capture thread to apply
+        self.requests = queue.SimpleQueue()
+
+    def should_detect(self, frame):
+        self.frames += 1
+        if self.full_shape is None:
+            self.full_shape = frame.shape[:2]
+        if self.state == ACTIVE:
+            return True
+        self.idle_frames += 1
+        # A hand just showed up: keep looking until it is confirmed, even if
+        # it holds still after the motion that woke us
+        if self.gate.moved(frame) or self.hits:
+            return True
+        self.gated += 1
+        return False
+
+    def update(self, found):
+        if found:
+            self.misses = 0
+            if self.state == IDLE:
+                self.hits += 1
+                if self.hits >= self.confirm:
+                    self.state = ACTIVE
+                    self.requests.put("full")
+        else:
+            self.hits = 0
+            self.misses += 1
+            if self.state == ACTIVE and self.misses >= self.idle_after:
+                self.state = IDLE
+                self.gate.reset()
+                self.requests.put("low")
+
+    def tracking(self, frame):
+        # Pinch distances are in pixels of the full-size frame: the wake-up
+        # detections, and low_size frames still in flight after the switch
+        # back, would read short
+        return self.state == ACTIVE and frame.shape[:2] == self.full_shape
+
+    def report(self):
+        share = self.idle_frames / self.frames if self.frames else 0.0
+        return f"{self.state}, {share:.0%} of frames idle, {self.gated} gated by motion"
+
+
+class IdleCapture:
+    # Wraps the capture object so camera re-configuration happens on the
+    # thread that calls read(); VideoCapture must not be poked concurrently.
+
+    def __init__(self, cap, idle):
+        self.cap = cap
+        self.idle = idle
+        self._full = None
+
+    def _apply(self, mode):
+        import cv2
+        props = (cv2.CAP_PROP_FRAME_WIDTH, cv2.CAP_PROP_FRAME_HEIGHT, cv2.CAP_PROP_FPS)
+        if not hasattr(self.cap, "set"):
+            return
+        if mode == "low":
+            self._full = [self.cap.get(p) for p in props]
+            values = (*self.idle.low_size, self.idle.low_fps)
+        elif self._full is not None:
+            values = self._full
+        else:
+            return
+        for prop, value in zip(props, values):
+            self.cap.set(prop, value)
+
+    def read(self, *args):
+        while not self.idle.requests.empty():
+            self._apply(self.idle.requests.get_nowait())
+        return self.cap.read(*args)
+
+    def release(self):
+        self.cap.release()
+
+    def __getattr__(self, name):
+        return getattr(self.cap, name)
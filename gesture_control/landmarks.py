@@ -0,0 +1,91 @@
+import numpy as np
+
+NUM_LANDMARKS = 21
+WRIST = 0
+THUMB_TIP, INDEX_TIP, MIDDLE_TIP, RING_TIP, PINKY_TIP = 4, 8, 12, 16, 20
+FINGERTIPS = np.array([THUMB_TIP, INDEX_TIP, MIDDLE_TIP, RING_TIP, PINKY_TIP])
+# (base, joint, tip) per finger; the bend at `joint` says if it is extended
+FINGER_CHAINS = np.array([(2, 3, 4), (5, 6, 8), (9, 10, 12), (13, 14, 16), (17, 18, 20)])
+
+# Same topology as mediapipe.solutions.hands.HAND_CONNECTIONS
+HAND_CONNECTIONS = (
+    (0, 1), (1, 2), (2, 3), (3, 4), (0, 5), (5, 6), (6, 7), (7, 8),
+    (5, 9), (9, 10), (10, 11), (11, 12), (9, 13), (13, 14), (14, 15), (15, 16),
+    (13, 17), (0, 17), (17, 18), (18, 19), (19, 20),
+)
+
+UNKNOWN, OPEN, FIST, PINCH, POINT = range(5)
+STATE_NAMES = ("unknown", "open", "fist", "pinch", "point")
+
+
+class LandmarkPool:
+    # A few preallocated (21, 3) float32 buffers handed out round-robin, so
+    # the detector does not allocate per frame. Nothing tracks who still
+    # reads a buffer: it is only valid until the pool wraps around, so
+    # anything that keeps a detection past the next detect() (another
+    # thread, a mailbox, a recording) must copy it out first.
+
+    def __init__(self, size=4):
+        self._buffers = np.zeros((size, NUM_LANDMARKS, 3), dtype=np.float32)
+        self._next = 0
+
+    def take(self):
+        buf = self._buffers[self._next]
+        self._next = (self._next + 1) % len(self._buffers)
+        return buf
+
+
+def from_mediapipe(hand_landmarks, out):
+    # One pass over the protobuf, everything after this is array maths
+    out[:] = [(lm.x, lm.y, lm.z) for lm in hand_landmarks.landmark]
+    return out
+
+
+def to_pixels(landmarks, width, height, out=None):
+    # Normalised -> pixel coordinates for all 21 points at once (z scales with width)
+    return np.multiply(landmarks, (width, height, width), out=out)
+
+
+def features(points):
+    # points: (21, 3) or (N, 21, 3) in pixels. Returns per-finger thumb-tip
+    # distances, bend angles (degrees) and the hand scale, all batched.
+    p = np.asarray(points, dtype=np.float32)[..., :2]
+    scale = np.linalg.norm(p[..., 9, :] - p[..., WRIST, :], axis=-1)
+
+    tips = p[..., FINGERTIPS, :]
+    tip_dist = np.linalg.norm(tips - p[..., THUMB_TIP:THUMB_TIP + 1, :], axis=-1)
+
+    a = p[..., FINGER_CHAINS[:, 0], :]
+    b = p[..., FINGER_CHAINS[:, 1], :]
+    c = p[..., FINGER_CHAINS[:, 2], :]
+    v1, v2 = b - a, c - b
+    cos = (v1 * v2).sum(-1) / (np.linalg.norm(v1, axis=-1) * np.linalg.norm(v2, axis=-1) + 1e-6)
+    bend = np.degrees(np.arccos(np.clip(cos, -1.0, 1.0)))
+    return tip_dist, bend, scale
+
+
+def classify(points, pinch_ratio=0.3, bend_limit=50.0):
+    # Gesture state per hand: PINCH (thumb on index tip), FIST (no finger
+    # extended), OPEN (all four fingers extended), POINT (index only).
+    tip_dist, bend, scale = features(points)
+    extended = bend[..., 1:] < bend_limit
+    pinched = tip_dist[..., 1] < pinch_ratio * scale
+
+    fist = ~extended.any(-1)
+
+    state = np.full(scale.shape, UNKNOWN, dtype=np.int8)
+    state[extended.all(-1)] = OPEN
+    state[extended[..., 0] & ~extended[..., 1:].any(-1)] = POINT
+    state[fist] = FIST
+    state[pinched & ~fist] = PINCH
+    return state
+
+
+def draw(img, points):
+    # Landmark skeleton with plain cv2 calls, from pixel coordinates
+    import cv2
+    pts = np.asarray(points)[:, :2].astype(np.int32)
+    for a, b in HAND_CONNECTIONS:
+        cv2.line(img, tuple(pts[a]), tuple(pts[b]), (0, 255, 0), 2)
+    for x, y in pts:
+        cv2.circle(img, (int(x), int(y)), 4, (0, 0, 255), cv2.FILLED)
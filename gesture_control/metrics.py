@@ -0,0 +1,190 @@
+import json
+import math
+import os
+import threading
+import time
+
+# Upper bounds in seconds, fixed so memory per stage never grows
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.002, 0.004, 0.008, 0.016,
+           0.033, 0.066, 0.133, 0.266, 0.533, math.inf)
+
+
+class StageHistogram:
+    # Cumulative bucket counts for Prometheus plus `windows` rotating
+    # sub-histograms of `window_seconds` each for the rolling percentiles.
+
+    def __init__(self, windows=6, window_seconds=10.0):
+        self.window_seconds = window_seconds
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.n = 0
+        self._windows = [[0] * len(BUCKETS) for _ in range(windows)]
+        self._current = 0
+        self._window_start = time.monotonic()
+
+    def observe(self, seconds):
+        now = time.monotonic()
+        if now - self._window_start >= self.window_seconds:
+            self._rotate(now)
+        i = 0
+        while seconds > BUCKETS[i]:
+            i += 1
+        self.counts[i] += 1
+        self._windows[self._current][i] += 1
+        self.total += seconds
+        self.n += 1
+
+    def _rotate(self, now):
+        skipped = int((now - self._window_start) // self.window_seconds)
+        for _ in range(min(skipped, len(self._windows))):
+            self._current = (self._current + 1) % len(self._windows)
+            self._windows[self._current] = [0] * len(BUCKETS)
+        self._window_start += skipped * self.window_seconds
+
+    def rolling(self):
+        return [sum(col) for col in zip(*self._windows)]
+
+    def percentile(self, pct):
+        # Linear interpolation inside the bucket, in milliseconds
+        counts = self.rolling()
+        n = sum(counts)
+        if not n:
+            return 0.0
+        rank = n * pct / 100
+        seen = 0
+        for i, c in enumerate(counts):
+            if c and seen + c >= rank:
+                lo = BUCKETS[i - 1] if i else 0.0
+                hi = BUCKETS[i] if BUCKETS[i] != math.inf else lo * 2
+                return (lo + (hi - lo) * (rank - seen) / c) * 1000
+            seen += c
+        return BUCKETS[-2] * 1000
+
+
+class _StageTimer:
+    __slots__ = ("hist", "t0")
+
+    def __init__(self, hist):
+        self.hist = hist
+        self.t0 = 0.0
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.observe(time.perf_counter() - self.t0)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_TIMER = _NullTimer()
+
+
+class Metrics:
+    # `with metrics.stage("hands_process"): ...` around each step of the loop.
+    # One cached timer per stage; every stage only ever runs on one thread.
+    # Disabled metrics hand out a shared no-op timer.
+
+    def __init__(self, enabled=True, windows=6, window_seconds=10.0):
+        self.enabled = enabled
+        self.windows = windows
+        self.window_seconds = window_seconds
+        self.stages = {}
+        self._timers = {}
+
+    def histogram(self, name):
+        hist = self.stages.get(name)
+        if hist is None:
+            hist = self.stages[name] = StageHistogram(self.windows, self.window_seconds)
+        return hist
+
+    def stage(self, name):
+        if not self.enabled:
+            return NULL_TIMER
+        timer = self._timers.get(name)
+        if timer is None:
+            timer = self._timers[name] = _StageTimer(self.histogram(name))
+        return timer
+
+    def observe(self, name, seconds):
+        if self.enabled:
+            self.histogram(name).observe(seconds)
+
+    def snapshot(self):
+        out = {}
+        for name, hist in list(self.stages.items()):
+            out[name] = {
+                "count": hist.n,
+                "mean_ms": round(hist.total / hist.n * 1000, 3) if hist.n else 0.0,
+                "p50_ms": round(hist.percentile(50), 3),
+                "p99_ms": round(hist.percentile(99), 3),
+            }
+        return out
+
+    def to_prometheus(self, prefix="gesture_stage_seconds"):
+        lines = [f"# HELP {prefix} Time spent in each gesture pipeline stage.",
+                 f"# TYPE {prefix} histogram"]
+        for name, hist in sorted(self.stages.items()):
+            running = 0
+            for le, c in zip(BUCKETS, hist.counts):
+                running += c
+                bound = "+Inf" if le == math.inf else repr(le)
+                lines.append(f'{prefix}_bucket{{stage="{name}",le="{bound}"}} {running}')
+            lines.append(f'{prefix}_sum{{stage="{name}"}} {hist.total:.6f}')
+            lines.append(f'{prefix}_count{{stage="{name}"}} {hist.n}')
+        return "\n".join(lines) + "\n"
+
+
+NULL_METRICS = Metrics(enabled=False)
+
+
+class MetricsExporter(threading.Thread):
+    # Every `interval` seconds appends a JSON line and rewrites the Prometheus
+    # textfile (tmp + rename, so node_exporter never reads half a file).
+
+    def __init__(self, metrics, jsonl_path=None, prom_path=None, interval=10.0):
+        super().__init__(name="metrics-export", daemon=True)
+        self.metrics = metrics
+        self.jsonl_path = jsonl_path
+        self.prom_path = prom_path
+        self.interval = interval
+        self._stop_evt = threading.Event()
+
+    def export(self):
+        if self.jsonl_path:
+            with open(self.jsonl_path, "a") as f:
+                f.write(json.dumps({"ts": time.time(), "stages": self.metrics.snapshot()}) + "\n")
+        if self.prom_path:
+            tmp = self.prom_path + ".tmp"
+            with open(tmp, "w") as f:
+                f.write(self.metrics.to_prometheus())
+            os.replace(tmp, self.prom_path)
+
+    def run(self):
+        while not self._stop_evt.wait(self.interval):
+            self.export()
+
+    def stop(self):
+        self._stop_evt.set()
+        self.join()
+        self.export()
+
+
+def draw_hud(img, metrics, origin=(10, 130)):
+    # Small per-stage p50/p99 table on the preview frame
+    import cv2
+    x, y = origin
+    for name, s in metrics.snapshot().items():
+        cv2.putText(img, f"{name:14s} {s['p50_ms']:6.2f} / {s['p99_ms']:6.2f} ms", (x, y),
+                    cv2.FONT_HERSHEY_PLAIN, 1, (0, 255, 0), 1)
+        y += 16
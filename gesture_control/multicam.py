@@ -0,0 +1,286 @@
+import queue
+import signal
+import threading
+import time
+from multiprocessing import get_context, shared_memory
+
+import numpy as np
+
+from .detector import HandDetector
+from .frames import recycler
+from .landmarks import WRIST
+from .sources import open_source
+
+SLOTS = 2  # per camera: one being read by the worker, one holding the newest frame
+
+
+def detector_worker(cam, shm_name, shape, tasks, results, ready, factory, options):
+    # Child process: one detector per camera, frames read straight out of
+    # shared memory, only the (21, 3) landmarks travel back through the queue
+    shm = shared_memory.SharedMemory(name=shm_name)
+    frames = np.ndarray((SLOTS,) + shape, dtype=np.uint8, buffer=shm.buf)
+    detector = factory(**options)
+    ready.set()
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            slot, t_capture = task
+            hand = detector.detect(frames[slot])
+            results.put((cam, t_capture, None if hand is None else hand.copy()))
+    finally:
+        detector.close()
+        del frames
+        shm.close()
+
+
+class CameraFeed:
+    # Main-process side of one camera: a capture thread that copies frames
+    # into the shared-memory slots and hands the newest one to the worker
+    # whenever the worker is free. Frames go back to the source (recycle)
+    # once the worker has them or they were overwritten, so a paced
+    # TraceSource feeds the worker every frame instead of only the newest.
+
+    def __init__(self, cam, cap, first_frame, ctx):
+        self.cam = cam
+        self.cap = cap
+        self.shape = first_frame.shape
+        self.shm = shared_memory.SharedMemory(create=True, size=SLOTS * first_frame.nbytes)
+        self.frames = np.ndarray((SLOTS,) + self.shape, dtype=np.uint8, buffer=self.shm.buf)
+        self.tasks = ctx.Queue()
+        self.lock = threading.Lock()
+        self.busy_slot = None   # slot the worker is reading
+        self.ready = None       # (slot, t) newest frame waiting for the worker
+        self.waiting = None     # source frame behind self.ready
+        self.recycle = recycler(cap)
+        self.captured = 0
+        self.processed = 0
+        self.t_start = self.t_done = None
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self._capture, name=f"capture-{cam}", daemon=True)
+        self._buf = np.empty_like(first_frame)  # decode target, copied into a slot
+        self._store(first_frame)
+
+    def _store(self, frame):
+        with self.lock:
+            slot = 0 if self.busy_slot != 0 else 1
+            np.copyto(self.frames[slot], frame)
+            self.captured += 1
+            if self.busy_slot is None:
+                self.busy_slot = slot
+                self.tasks.put((slot, time.perf_counter()))
+                self.recycle(frame)
+            else:
+                # Worker busy: this overwrites any older frame that was waiting
+                if self.waiting is not None:
+                    self.recycle(self.waiting)
+                self.ready = (slot, time.perf_counter())
+                self.waiting = frame
+
+    def _capture(self):
+        self.t_start = time.perf_counter()
+        while not self._stop.is_set():
+            success, img = self.cap.read(self._buf)
+            if not success or img.shape != self.shape:
+                break
+            self._store(img)
+        self._stop.set()
+
+    def done(self):
+        # Worker finished a frame: give it the waiting one, if any
+        with self.lock:
+            self.processed += 1
+            self.t_done = time.perf_counter()
+            if self.ready is not None:
+                self.busy_slot, t = self.ready
+                self.ready = None
+                self.tasks.put((self.busy_slot, t))
+                self.recycle(self.waiting)
+                self.waiting = None
+            else:
+                self.busy_slot = None
+
+    @property
+    def fps(self):
+        # Detections per second since capture started
+        if self.t_start is None or self.t_done is None or self.t_done <= self.t_start:
+            return 0.0
+        return self.processed / (self.t_done - self.t_start)
+
+    @property
+    def finished(self):
+        return self._stop.is_set() and self.busy_slot is None
+
+    def stop(self):
+        self._stop.set()
+        self.thread.join()
+        self.cap.release()
+
+    def close(self):
+        del self.frames
+        self.shm.close()
+        self.shm.unlink()
+
+
+class Arbiter:
+    # Picks the camera whose hand drives the brightness.
+    #   priority: first camera in `order` that currently sees a hand
+    #   nearest:  biggest hand (wrist to middle knuckle, in frame diagonals)
+    # The current owner keeps control until its hand is older than `stale`
+    # seconds or, for nearest, another hand is `margin` times bigger.
+
+    def __init__(self, policy="priority", order=(), stale=0.3, margin=1.25):
+        if policy not in ("priority", "nearest"):
+            raise ValueError(f"unknown arbitration policy {policy!r}")
+        self.policy = policy
+        self.order = list(order)
+        self.stale = stale
+        self.margin = margin
+        self.owner = None
+        self.switches = 0
+        self._latest = {}  # cam -> (t, size)
+
+    def update(self, cam, t, hand, shape):
+        if hand is None:
+            self._latest.pop(cam, None)
+        else:
+            h, w = shape[:2]
+            d = (hand[9, :2] - hand[WRIST, :2]) * (w, h)
+            self._latest[cam] = (t, float(np.hypot(*d)) / np.hypot(w, h))
+        return self.choose()
+
+    def choose(self):
+        now = time.perf_counter()
+        live = {cam: size for cam, (t, size) in self._latest.items() if now - t < self.stale}
+        if not live:
+            owner = None
+        elif self.policy == "priority":
+            ranked = [c for c in self.order if c in live] + sorted(c for c in live if c not in self.order)
+            owner = ranked[0]
+        else:
+            best = max(live, key=live.get)
+            owner = self.owner
+            if owner not in live or live[best] > live[owner] * self.margin:
+                owner = best
+        if owner != self.owner and owner is not None:
+            self.switches += 1
+        self.owner = owner
+        return owner
+
+
+class MultiCameraRunner:
+    # One detector process per camera, the controller's strategy/actuation
+    # in the main process fed by whichever camera the arbiter picks.
+
+    def __init__(self, controller, sources, policy="priority", order=None,
+                 factory=HandDetector, options=None):
+        self.controller = controller
+        self.sources = list(sources)
+        self.arbiter = Arbiter(policy, order if order is not None else range(len(self.sources)))
+        self.factory = factory
+        self.options = options or {}
+        self.feeds = []
+        self.workers = []
+        self._ready = []
+        self._stop = threading.Event()
+
+    def start(self):
+        ctx = get_context("spawn")
+        self.results = ctx.Queue()
+        for cam, spec in enumerate(self.sources):
+            cap = open_source(spec)
+            success, first = cap.read()
+            if not success:
+                raise RuntimeError(f"camera {spec!r} gave no frames")
+            feed = CameraFeed(cam, cap, first, ctx)
+            self.feeds.append(feed)
+            ready = ctx.Event()
+            proc = ctx.Process(
+                target=detector_worker, name=f"detector-{cam}", daemon=True,
+                args=(cam, feed.shm.name, feed.shape, feed.tasks, self.results, ready,
+                      self.factory, self.options))
+            proc.start()
+            self.workers.append(proc)
+            self._ready.append(ready)
+        # Spawning and importing the model takes a while; don't start
+        # grabbing frames until every worker can take them
+        for ready in self._ready:
+            while not ready.wait(0.1):
+                self.check_workers()
+        for feed in self.feeds:
+            feed.thread.start()
+
+    def check_workers(self):
+        # A worker that died (model import failed, crash) would never answer
+        # again and the loop would wait on its camera forever
+        for cam, proc in enumerate(self.workers):
+            if not proc.is_alive():
+                raise RuntimeError(f"detector process for camera {cam} exited "
+                                   f"with code {proc.exitcode}")
+
+    def request_stop(self, *_):
+        self._stop.set()
+
+    def run(self, report_every=5.0):
+        # Ctrl-C / SIGTERM end the loop through the same cleanup, so the
+        # shared-memory segments are always unlinked
+        handlers = {}
+        if threading.current_thread() is threading.main_thread():
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                handlers[sig] = signal.signal(sig, self.request_stop)
+        try:
+            self._run(report_every)
+        finally:
+            for sig, handler in handlers.items():
+                signal.signal(sig, handler)
+
+    def _run(self, report_every):
+        ctrl = self.controller
+        self._stop.clear()
+        last_report = time.time()
+        owner = None
+        try:
+            self.start()
+            while not self._stop.is_set() and not all(feed.finished for feed in self.feeds):
+                self.check_workers()
+                try:
+                    cam, t_capture, hand = self.results.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                feed = self.feeds[cam]
+                feed.done()
+                chosen = self.arbiter.update(cam, t_capture, hand, feed.shape)
+                if chosen != owner:
+                    # New camera, new coordinates: don't filter across the jump
+                    if ctrl.tips is not None:
+                        ctrl.tips.reset()
+                    owner = chosen
+                if cam == chosen:
+                    ctrl.handle(None, *ctrl.track(hand, feed.shape))
+
+                if report_every and time.time() - last_report > report_every:
+                    print("[stats]", self.report())
+                    last_report = time.time()
+        finally:
+            self.stop()
+        if ctrl.verbose:
+            print("[stats]", self.report())
+
+    def stop(self):
+        for feed in self.feeds:
+            if feed.thread.ident is not None:
+                feed.stop()
+            else:
+                feed.cap.release()
+            feed.tasks.put(None)
+        for proc in self.workers:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+        for feed in self.feeds:
+            feed.close()
+
+    def report(self):
+        cams = ", ".join(f"cam{f.cam} {f.processed}/{f.captured} ({f.fps:.1f} fps)" for f in self.feeds)
+        return f"processed/captured: {cams} | owner cam{self.arbiter.owner} | {self.arbiter.switches} switches"
@@ -0,0 +1,189 @@
+import threading
+import time
+from collections import deque
+
+from .frames import recycler
+from .metrics import NULL_METRICS
+
+
+class LatestSlot:
+    # Single-slot mailbox: put() overwrites whatever the consumer hasn't taken
+    # yet, so a slow consumer always gets the newest item and never a backlog.
+    # on_drop(item) runs for each overwritten item (to recycle its frame).
+
+    def __init__(self, on_drop=None):
+        self._cond = threading.Condition()
+        self._item = None
+        self._closed = False
+        self.on_drop = on_drop
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            old, self._item = self._item, item
+            if old is not None:
+                self.dropped += 1
+            self._cond.notify()
+        if old is not None and self.on_drop is not None:
+            self.on_drop(old)
+
+    def get(self, timeout=None):
+        with self._cond:
+            if self._item is None and not self._closed:
+                self._cond.wait(timeout)
+            item, self._item = self._item, None
+            return item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self):
+        return self._closed and self._item is None
+
+
+class StageStats:
+    # Rolling FPS + latency over the last `window` items of one stage
+
+    def __init__(self, name, window=120):
+        self.name = name
+        self.count = 0
+        self._times = deque(maxlen=window)
+        self._latency = deque(maxlen=window)
+
+    def tick(self, latency=None):
+        self.count += 1
+        self._times.append(time.perf_counter())
+        if latency is not None:
+            self._latency.append(latency)
+
+    @property
+    def fps(self):
+        if len(self._times) < 2:
+            return 0.0
+        span = self._times[-1] - self._times[0]
+        return (len(self._times) - 1) / span if span > 0 else 0.0
+
+    def latency_ms(self, pct=50):
+        if not self._latency:
+            return 0.0
+        ordered = sorted(self._latency)
+        idx = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+        return ordered[idx] * 1000
+
+    def summary(self):
+        return {
+            "stage": self.name,
+            "frames": self.count,
+            "fps": round(self.fps, 1),
+            "latency_p50_ms": round(self.latency_ms(50), 2),
+            "latency_p99_ms": round(self.latency_ms(99), 2),
+        }
+
+
+class Packet:
+    __slots__ = ("seq", "t_capture", "frame", "result")
+
+    def __init__(self, seq, t_capture, frame):
+        self.seq = seq
+        self.t_capture = t_capture
+        self.frame = frame
+        self.result = None
+
+
+class CaptureStage(threading.Thread):
+    def __init__(self, cap, out, metrics=NULL_METRICS):
+        super().__init__(name="capture", daemon=True)
+        self.cap = cap
+        self.metrics = metrics
+        self.out = out
+        self.stats = StageStats("capture")
+        self._stop_evt = threading.Event()
+
+    def run(self):
+        seq = 0
+        try:
+            while not self._stop_evt.is_set():
+                with self.metrics.stage("cap_read"):
+                    success, img = self.cap.read()
+                if not success:
+                    break
+                self.out.put(Packet(seq, time.perf_counter(), img))
+                self.stats.tick()
+                seq += 1
+        finally:
+            self.out.close()
+
+    def stop(self):
+        self._stop_evt.set()
+
+
+class InferenceStage(threading.Thread):
+    # Runs `process(frame)` (the old hands.process step) on the newest frame only
+
+    def __init__(self, process, inp, out):
+        super().__init__(name="inference", daemon=True)
+        self.process = process
+        self.inp = inp
+        self.out = out
+        self.stats = StageStats("inference")
+
+    def run(self):
+        try:
+            while not self.inp.closed:
+                packet = self.inp.get(timeout=0.1)
+                if packet is None:
+                    continue
+                packet.result = self.process(packet.frame)
+                self.out.put(packet)
+                self.stats.tick(time.perf_counter() - packet.t_capture)
+        finally:
+            self.out.close()
+
+
+class Pipeline:
+    # capture thread -> LatestSlot -> inference thread -> LatestSlot -> caller.
+    # The caller iterates the pipeline on its own thread (HighGUI wants the
+    # main thread) and does drawing/actuation there. Frames go back to a
+    # FrameRing capture when the caller is done with them or a slot drops them.
+
+    def __init__(self, cap, process, metrics=NULL_METRICS):
+        self.recycle = recycler(cap)
+        drop = lambda packet: self.recycle(packet.frame)
+        self._frames = LatestSlot(drop)
+        self._results = LatestSlot(drop)
+        self.capture = CaptureStage(cap, self._frames, metrics)
+        self.inference = InferenceStage(process, self._frames, self._results)
+        self.display = StageStats("display")
+
+    def start(self):
+        self.capture.start()
+        self.inference.start()
+        return self
+
+    def __iter__(self):
+        while not self._results.closed:
+            packet = self._results.get(timeout=0.1)
+            if packet is None:
+                continue
+            yield packet
+            # Back from the caller: the frame has been drawn/actuated
+            self.display.tick(time.perf_counter() - packet.t_capture)
+            self.recycle(packet.frame)
+
+    def stop(self):
+        self.capture.stop()
+        self.capture.join()
+        self.inference.join()
+
+    def stats(self):
+        return [self.capture.stats.summary(), self.inference.stats.summary(), self.display.summary()]
+
+    def report(self):
+        parts = []
+        for s in self.stats():
+            parts.append(f"{s['stage']}: {s['fps']:.1f} fps, p50 {s['latency_p50_ms']:.1f} ms")
+        dropped = self._frames.dropped + self._results.dropped
+        return " | ".join(parts) + f" | dropped {dropped}"
@@ -0,0 +1,86 @@
+import numpy as np
+
+from .frames import to_rgb
+from .landmarks import from_mediapipe
+from .metrics import NULL_METRICS
+
+
+class HandROITracker:
+    # Feeds the model a small square crop around last frame's hand instead of
+    # the whole frame. Landmarks come back normalised to the crop and are
+    # remapped to full-frame coordinates before anyone reads them.
+
+    def __init__(self, size=192, pad=0.4, min_side=96, metrics=NULL_METRICS,
+                 color="bgr", scratch=None):
+        self.metrics = metrics
+        self.color = color
+        self.scratch = scratch  # frames.Scratch to reuse crop/RGB buffers, or None
+        self.size = size
+        self.pad = pad
+        self.min_side = min_side
+        self.box = None  # (x0, y0, side) in full-frame pixels
+        self.roi_frames = 0
+        self.full_frames = 0
+
+    def crop(self, frame):
+        import cv2
+        x0, y0, side = self.box
+        roi = frame[y0:y0 + side, x0:x0 + side]
+        dst = None
+        if self.scratch is not None:
+            dst = self.scratch.get("crop", (self.size, self.size) + frame.shape[2:])
+        return cv2.resize(roi, (self.size, self.size), dst=dst, interpolation=cv2.INTER_AREA)
+
+    def remap(self, landmarks, frame_shape):
+        # In place on the (21, 3) array, crop-normalised -> frame-normalised
+        h, w = frame_shape[:2]
+        x0, y0, side = self.box
+        landmarks[:, 0] = (x0 + landmarks[:, 0] * side) / w
+        landmarks[:, 1] = (y0 + landmarks[:, 1] * side) / h
+        landmarks[:, 2] *= side / w
+
+    def next_box(self, landmarks, frame_shape):
+        h, w = frame_shape[:2]
+        lo = landmarks[:, :2].min(axis=0) * (w, h)
+        hi = landmarks[:, :2].max(axis=0) * (w, h)
+        cx, cy = (lo + hi) / 2
+        side = float(np.max(hi - lo)) * (1 + 2 * self.pad)
+        side = int(min(max(side, self.min_side), w, h))
+        # Keep the square inside the frame instead of shrinking it at the edges
+        x0 = int(min(max(cx - side / 2, 0), w - side))
+        y0 = int(min(max(cy - side / 2, 0), h - side))
+        return x0, y0, side
+
+    def process(self, hands, frame, out):
+        # `frame` is BGR (or RGB, see `color`); the colour conversion runs on the
+        # small crop when tracking. Fills `out` and returns it, or None when
+        # there is no hand.
+        stage = self.metrics.stage
+        if self.box is not None:
+            with stage("cvt_color"):
+                img_rgb = to_rgb(self.crop(frame), self.color, self.scratch, "crop_rgb")
+            with stage("hands_process"):
+                results = hands.process(img_rgb)
+            if results.multi_hand_landmarks:
+                self.roi_frames += 1
+                self.remap(from_mediapipe(results.multi_hand_landmarks[0], out), frame.shape)
+                self.box = self.next_box(out, frame.shape)
+                return out
+            # Lost the hand: fall through to full-frame detection on this frame
+            self.box = None
+
+        self.full_frames += 1
+        with stage("cvt_color"):
+            img_rgb = to_rgb(frame, self.color, self.scratch)
+        with stage("hands_process"):
+            results = hands.process(img_rgb)
+        if not results.multi_hand_landmarks:
+            return None
+        from_mediapipe(results.multi_hand_landmarks[0], out)
+        self.box = self.next_box(out, frame.shape)
+        return out
+
+    def report(self):
+        total = self.roi_frames + self.full_frames
+        share = 100 * self.roi_frames / total if total else 0
+        return f"roi {self.roi_frames} / full {self.full_frames} ({share:.0f}% cropped)"
@@ -0,0 +1,86 @@
+import asyncio
+import json
+import shutil
+import socket
+
+from .backlight import SYSFS_BACKLIGHT, open_backend
+
+
+class BacklightSink:
+    # Same sysfs/brightnessctl backends as BacklightActuator, without the thread
+
+    def __init__(self, sysfs_root=SYSFS_BACKLIGHT, device=None):
+        self.backend = open_backend(sysfs_root, device)
+
+    async def write(self, level):
+        # A sysfs write is a few microseconds; only the brightnessctl fork
+        # is worth pushing off the event loop
+        if hasattr(self.backend, "exe"):
+            await asyncio.to_thread(self.backend.write, level)
+        else:
+            self.backend.write(level)
+
+    def close(self):
+        self.backend.close()
+
+
+class VolumeSink:
+    # Default audio output volume through pactl, or amixer without PulseAudio/PipeWire
+
+    def __init__(self):
+        if shutil.which("pactl"):
+            self.command = ["pactl", "set-sink-volume", "@DEFAULT_SINK@"]
+        elif shutil.which("amixer"):
+            self.command = ["amixer", "-q", "sset", "Master"]
+        else:
+            raise FileNotFoundError("neither pactl nor amixer is installed")
+
+    async def write(self, level):
+        proc = await asyncio.create_subprocess_exec(
+            *self.command, f"{level}%",
+            stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL)
+        await proc.wait()
+
+    def close(self):
+        pass
+
+
+class SocketSink:
+    # One JSON datagram per change, to "host:port" (UDP) or a unix socket path
+
+    def __init__(self, target):
+        if target.startswith("/"):
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self.addr = target
+        else:
+            host, port = target.rsplit(":", 1)
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.addr = (host, int(port))
+        self.sock.setblocking(False)
+
+    async def write(self, level):
+        try:
+            self.sock.sendto(json.dumps({"level": level}).encode(), self.addr)
+        except (BlockingIOError, ConnectionRefusedError, FileNotFoundError):
+            # Nobody listening (or a full buffer): the next change will try again
+            pass
+
+    def close(self):
+        self.sock.close()
+
+
+SINKS = {"backlight": BacklightSink, "volume": VolumeSink, "socket": SocketSink}
+
+
+def parse_sink(spec):
+    # "name[:target][@rate]", e.g. "volume@10" or "socket:127.0.0.1:9000@30"
+    # -> (sink, max_rate or None)
+    rate = None
+    if "@" in spec:
+        spec, rate = spec.rsplit("@", 1)
+        rate = float(rate)
+    name, _, target = spec.partition(":")
+    if name not in SINKS:
+        raise ValueError(f"unknown sink {name!r}, expected one of {sorted(SINKS)}")
+    sink = SINKS[name](target) if target else SINKS[name]()
+    return sink, rate
@@ -0,0 +1,234 @@
+import glob
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from . import landmarks as lm
+from .landmarks import NUM_LANDMARKS
+from .metrics import NULL_METRICS
+
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".bmp")
+TRACE_EXTS = (".json", ".npz")
+
+
+class ImageSequenceSource:
+    # cv2.VideoCapture-like reader over a directory or glob of still images
+
+    def __init__(self, pattern):
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "*")
+        self.paths = sorted(p for p in glob.glob(pattern) if p.lower().endswith(IMAGE_EXTS))
+        self.index = 0
+
+    def read(self, image=None):
+        import cv2
+        while self.index < len(self.paths):
+            img = cv2.imread(self.paths[self.index])
+            self.index += 1
+            if img is not None:
+                # Same contract as VideoCapture.read(image): fill it when it fits
+                if image is not None and image.shape == img.shape:
+                    np.copyto(image, img)
+                    img = image
+                return True, img
+        return False, None
+
+    def release(self):
+        pass
+
+
+class LandmarkTrace:
+    # Pre-extracted landmarks: times (N,), landmarks (N, 21, 3) float32 in
+    # normalised image coordinates, NaN rows where no hand was found.
+    # Synthetic traces also carry the true thumb-index distance in px.
+
+    def __init__(self, times, landmarks, width=640, height=480, fps=30.0, truth=None):
+        self.times = np.asarray(times, dtype=np.float64)
+        self.landmarks = np.asarray(landmarks, dtype=np.float32)
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.truth = truth
+
+    def __len__(self):
+        return len(self.times)
+
+    def hand(self, i):
+        row = self.landmarks[i]
+        if np.isnan(row[0, 0]):
+            return None
+        return row
+
+    @classmethod
+    def load(cls, path):
+        if path.endswith(".npz"):
+            data = np.load(path)
+            return cls(data["times"], data["landmarks"], int(data["width"]),
+                       int(data["height"]), float(data["fps"]))
+        with open(path) as f:
+            doc = json.load(f)
+        empty = [[float("nan")] * 3] * NUM_LANDMARKS
+        landmarks = [fr["landmarks"] if fr["landmarks"] else empty for fr in doc["frames"]]
+        return cls([fr["t"] for fr in doc["frames"]], landmarks,
+                   doc["width"], doc["height"], doc["fps"])
+
+    def save(self, path):
+        if path.endswith(".npz"):
+            np.savez_compressed(path, times=self.times, landmarks=self.landmarks,
+                                width=self.width, height=self.height, fps=self.fps)
+            return
+        frames = []
+        for t, row in zip(self.times.tolist(), self.landmarks):
+            lms = None if np.isnan(row[0, 0]) else np.round(row, 5).tolist()
+            frames.append({"t": t, "landmarks": lms})
+        with open(path, "w") as f:
+            json.dump({"width": self.width, "height": self.height,
+                       "fps": self.fps, "frames": frames}, f)
+
+
+class TraceFrame(np.ndarray):
+    # Blank frame that remembers which trace row it stands for, so the
+    # detector finds the right landmarks even when capture runs ahead
+    index = -1
+
+
+class TraceSource:
+    # Replays a LandmarkTrace as if it came from a camera. Frames are views
+    # of one blank image; pair it with TraceDetector. render_hand=True draws
+    # the hand into each frame instead, for anything that looks at pixels
+    # (the idle motion gate).
+    #
+    # paced=True (for replays that are not realtime) makes read() wait until
+    # the previous frame has been handed back with recycle(), so a threaded
+    # pipeline gets every frame instead of dropping all but the newest.
+    # `wait` bounds that, for a consumer that stopped without handing back.
+
+    def __init__(self, trace, realtime=False, render_hand=False, paced=False, wait=1.0):
+        self.trace = trace
+        self.realtime = realtime
+        self.render_hand = render_hand
+        self.paced = paced
+        self.wait = wait
+        self.index = 0
+        self.outstanding = 0
+        self._blank = np.zeros((trace.height, trace.width, 3), dtype=np.uint8)
+        self._start = None
+        self._returned = threading.Condition()
+
+    def read(self, image=None):
+        # `image` is accepted for VideoCapture compatibility; frames are views anyway
+        if self.index >= len(self.trace):
+            return False, None
+        if self.paced:
+            with self._returned:
+                self._returned.wait_for(lambda: self.outstanding == 0, self.wait)
+                self.outstanding += 1
+        if self.realtime:
+            if self._start is None:
+                self._start = time.perf_counter() - self.trace.times[0]
+            wait = self._start + self.trace.times[self.index] - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+        if self.render_hand:
+            frame = np.zeros_like(self._blank).view(TraceFrame)
+            row = self.trace.hand(self.index)
+            if row is not None:
+                lm.draw(frame, lm.to_pixels(row, self.trace.width, self.trace.height))
+        else:
+            frame = self._blank.view(TraceFrame)
+        frame.index = self.index
+        self.index += 1
+        return True, frame
+
+    def recycle(self, frame):
+        # Consumer is done with a frame from read() (shown, or dropped by a mailbox)
+        with self._returned:
+            self.outstanding = max(self.outstanding - 1, 0)
+            self._returned.notify_all()
+
+    def release(self):
+        pass
+
+
+class TraceDetector:
+    # Detector that returns the recorded landmarks instead of running a model.
+    # `delay` (seconds) simulates inference cost for benchmarks.
+
+    def __init__(self, trace, delay=0.0, metrics=NULL_METRICS):
+        self.trace = trace
+        self.delay = delay
+        self.metrics = metrics
+        self.pool = lm.LandmarkPool()
+
+    def detect(self, frame):
+        with self.metrics.stage("hands_process"):
+            if self.delay:
+                time.sleep(self.delay)
+            row = self.trace.hand(frame.index)
+        if row is None:
+            return None
+        # Copy out of the trace, like a model filling its output buffer
+        out = self.pool.take()
+        out[:] = row
+        return out
+
+    def draw(self, img, points):
+        lm.draw(img, points)
+
+    def report(self):
+        return ""
+
+    def close(self):
+        pass
+
+
+class TraceRecorder:
+    # Wraps a real detector and records what it returned, for later replay
+
+    def __init__(self, detector, width=640, height=480, fps=30.0):
+        self.detector = detector
+        self.width, self.height, self.fps = width, height, fps
+        self.times = []
+        self.rows = []
+        self._start = time.perf_counter()
+
+    def detect(self, frame):
+        hand = self.detector.detect(frame)
+        self.height, self.width = frame.shape[:2]
+        self.times.append(time.perf_counter() - self._start)
+        if hand is None:
+            self.rows.append(np.full((NUM_LANDMARKS, 3), np.nan, dtype=np.float32))
+        else:
+            self.rows.append(hand.copy())
+        return hand
+
+    def draw(self, img, points):
+        self.detector.draw(img, points)
+
+    def report(self):
+        return self.detector.report()
+
+    def trace(self):
+        landmarks = np.stack(self.rows) if self.rows else np.empty((0, NUM_LANDMARKS, 3))
+        return LandmarkTrace(self.times, landmarks, self.width, self.height, self.fps)
+
+    def close(self):
+        self.detector.close()
+
+
+def open_source(spec, realtime=False):
+    # Camera index, video file/URL, image directory/glob or landmark trace
+    if hasattr(spec, "read"):
+        return spec
+    if isinstance(spec, LandmarkTrace):
+        return TraceSource(spec, realtime)
+    if isinstance(spec, str):
+        if spec.lower().endswith(TRACE_EXTS):
+            return TraceSource(LandmarkTrace.load(spec), realtime)
+        if os.path.isdir(spec) or any(c in spec for c in "*?[") or spec.lower().endswith(IMAGE_EXTS):
+            return ImageSequenceSource(spec)
+    import cv2
+    return cv2.VideoCapture(spec)
@@ -0,0 +1,66 @@
+import numpy as np
+
+
+class ThresholdStep:
+    # brightness_cont.py behaviour: (dist - 30) / 150 mapping, and the level
+    # only moves once it is `step` percent away from the current one.
+    name = "v1"
+    smooth = False
+    skip = False
+    regulate = False  # the 5% steps are its own dead band
+    announce = True
+
+    def __init__(self, low=30, span=150, step=5, start=50):
+        self.low = low
+        self.span = span
+        self.step = step
+        self.current = start
+
+    def level(self, dist):
+        # Plain mapping, also works on arrays of distances (batch timelines)
+        return np.clip(np.trunc((np.asarray(dist) - self.low) / self.span * 100), 0, 100)
+
+    def update(self, dist):
+        brightness = int(self.level(dist))
+        if abs(brightness - self.current) >= self.step:
+            self.current = brightness
+            return brightness
+        return None
+
+    def settle(self):
+        # Frame without a measurement; see control.BrightnessRegulator
+        return None
+
+    def report(self):
+        return ""
+
+
+class SmoothedContinuous:
+    # brightness_cont_v3.py behaviour: 30-180 px interpolated onto 0-100 on
+    # every frame. The smoothing happens upstream on the filtered tips.
+    name = "v3"
+    smooth = True
+    skip = True
+    regulate = True
+    announce = False
+
+    def __init__(self, low=30, high=180):
+        self.low = low
+        self.high = high
+        self.current = None
+
+    def level(self, dist):
+        return np.trunc(np.interp(dist, [self.low, self.high], [0, 100]))
+
+    def update(self, dist):
+        self.current = int(self.level(dist))
+        return self.current
+
+    def settle(self):
+        return None
+
+    def report(self):
+        return ""
+
+
+STRATEGIES = {s.name: s for s in (ThresholdStep, SmoothedContinuous)}
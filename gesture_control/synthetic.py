@@ -0,0 +1,65 @@
+import numpy as np
+
+from .sources import LandmarkTrace
+
+# Rough open right hand in pixels relative to the wrist, fingers pointing up
+HAND_TEMPLATE = np.array([
+    (0, 0),                                          # 0 wrist
+    (-35, -20), (-60, -45), (-75, -70), (-85, -95),  # 1-4 thumb
+    (-25, -85), (-28, -125), (-30, -150), (-32, -170),  # 5-8 index
+    (0, -90), (0, -135), (0, -162), (0, -185),       # 9-12 middle
+    (22, -85), (25, -125), (27, -150), (28, -168),   # 13-16 ring
+    (42, -75), (50, -105), (55, -125), (58, -142),   # 17-20 pinky
+], dtype=np.float64)
+
+PATTERNS = ("sine", "steps", "walk")
+
+
+def distance_profile(t, pattern, period, rng):
+    # 0..1 opening of the pinch over time
+    if pattern == "sine":
+        return 0.5 - 0.5 * np.cos(2 * np.pi * t / period)
+    if pattern == "steps":
+        return (np.floor(t / period * 2) % 4) / 3
+    if pattern == "walk":
+        steps = rng.normal(0, 0.03, len(t))
+        return np.clip(0.5 + np.cumsum(steps), 0, 1)
+    raise ValueError(f"unknown pattern {pattern!r}, expected one of {PATTERNS}")
+
+
+def synthetic_trace(seconds=10.0, fps=30.0, width=640, height=480, pattern="sine",
+                    period=4.0, min_dist=20.0, max_dist=200.0, drift=40.0,
+                    noise=1.5, dropout=0.0, absent=(), seed=0):
+    # Thumb/index pinch trajectory on a slowly drifting hand. `noise` is
+    # landmark jitter in px, `dropout` the share of frames with no hand and
+    # `absent` a list of (start, end) seconds where nobody is in view.
+    rng = np.random.default_rng(seed)
+    n = int(seconds * fps)
+    t = np.arange(n) / fps
+    dist = min_dist + distance_profile(t, pattern, period, rng) * (max_dist - min_dist)
+
+    wrist = np.stack([
+        width / 2 + drift * np.sin(2 * np.pi * t / (3 * period)),
+        height * 0.8 + drift / 2 * np.cos(2 * np.pi * t / (5 * period)),
+    ], axis=1)
+    pts = wrist[:, None, :] + HAND_TEMPLATE[None, :, :]
+
+    # Thumb and index tips open symmetrically around the pinch point,
+    # their middle joints follow halfway
+    pinch = wrist + (HAND_TEMPLATE[4] + HAND_TEMPLATE[8]) / 2
+    half = np.stack([dist / 2, np.zeros(n)], axis=1)
+    pts[:, 4] = pinch - half
+    pts[:, 8] = pinch + half
+    for mid, base, tip in ((3, 2, 4), (7, 6, 8)):
+        pts[:, mid] = (pts[:, base] + pts[:, tip]) / 2
+
+    pts += rng.normal(0, noise, pts.shape)
+
+    landmarks = np.zeros((n, 21, 3), dtype=np.float32)
+    landmarks[:, :, 0] = pts[:, :, 0] / width
+    landmarks[:, :, 1] = pts[:, :, 1] / height
+    if dropout:
+        landmarks[rng.random(n) < dropout] = np.nan
+    for start, end in absent:
+        landmarks[(t >= start) & (t < end)] = np.nan
+    return LandmarkTrace(t, landmarks, width, height, fps, truth=dist)
@@ -1,25 +1,34 @@
 import tkinter as tk
-from tkinter import colorchooser, filedialog
-import time
-import math
-from PIL import Image, ImageDraw, ImageGrab
+from tkinter import colorchooser
+from PIL import Image, ImageDraw
 
-class PaintApp:
+from paint_engine import BackingRaster, DocumentMixin, FrameTicker, History, Ink, SpeedMeter, StrokeCanvas
+
+class PaintApp(DocumentMixin):
     def __init__(self, root):
         self.root = root
         self.root.title("Mini Paint App")
         self.root.geometry("1000x700")
 
-        # Drawing canvas
-        self.canvas = tk.Canvas(self.root, bg='white', width=1000, height=600)
+        # Drawing canvas (an opened document brings its own background)
+        self.bg_color = 'white'
+        self.canvas = tk.Canvas(self.root, bg=self.bg_color, width=1000, height=600)
         self.canvas.pack()
+        # One growing polyline per stroke instead of an item per mouse event
+        self.engine = StrokeCanvas(self.canvas, BackingRaster(1000, 600, self.bg_color))
+        self.history = History(self.engine)
+        # Resampled, simplified and curve-fitted input instead of every raw sample
+        self.ink = Ink(self.engine)
+        self.loader = None  # StreamLoader while a document is coming in
+        self.root.bind('<Control-z>', self.undo)
+        self.root.bind('<Control-y>', self.redo)
 
         # Drawing attributes
         self.old_x = None
         self.old_y = None
         self.pen_width = 3
         self.pen_color = 'black'
-        self.last_time = None
+        self.meter = SpeedMeter()
         self.speed = 0
 
         # Bindings
@@ -33,6 +42,9 @@ class PaintApp:
         self.status = tk.Label(self.root, text="", anchor='w', font=("Arial", 9), fg="gray")
         self.status.pack(fill=tk.X)
 
+        # Status bar redraws at most once per frame, not once per event
+        self.ticker = FrameTicker(self.root)
+        self.ticker.add('status', self.update_status)
         self.update_status()
 
     def create_ui(self):
@@ -57,10 +69,20 @@ class PaintApp:
         self.slider.set(self.pen_width)
         self.slider.pack(side=tk.LEFT, padx=10)
 
+        # Undo / Redo (also Ctrl+Z / Ctrl+Y)
+        undo_btn = tk.Button(control_frame, text="↶ Undo", command=self.undo)
+        undo_btn.pack(side=tk.LEFT, padx=2)
+        redo_btn = tk.Button(control_frame, text="↷ Redo", command=self.redo)
+        redo_btn.pack(side=tk.LEFT, padx=2)
+
         # Clear button
         clear_btn = tk.Button(control_frame, text="🧽 Clear", command=self.clear_canvas)
         clear_btn.pack(side=tk.LEFT, padx=5)
 
+        # Open button (.pnt documents)
+        open_btn = tk.Button(control_frame, text="📂 Open", command=self.open_drawing)
+        open_btn.pack(side=tk.LEFT, padx=5)
+
         # Save button
         save_btn = tk.Button(control_frame, text="💾 Save", command=self.save_drawing)
         save_btn.pack(side=tk.LEFT, padx=5)
@@ -71,49 +93,43 @@ class PaintApp:
 
     def draw(self, event):
         self.pen_width = self.slider.get()
+        if self.loader is not None:
+            return  # loading strokes still get their z order, and loaded() resets history
 
-        if self.old_x and self.old_y:
-            self.canvas.create_line(
-                self.old_x, self.old_y, event.x, event.y,
-                width=self.pen_width, fill=self.pen_color,
-                capstyle=tk.ROUND, smooth=True
-            )
-
-            # Calculate distance and time delta
-            dist = math.sqrt((event.x - self.old_x)**2 + (event.y - self.old_y)**2)
-            time_now = time.time()
-            if self.last_time:
-                dt = time_now - self.last_time
-                if dt > 0:
-                    self.speed = dist / dt
-            self.last_time = time_now
+        if self.old_x is None:
+            self.ink.down(event.x, event.y, event.time / 1000, self.pen_color, self.pen_width)
+        else:
+            self.ink.move(event.x, event.y, event.time / 1000)
 
+        self.meter.add(event.x, event.y, event.time / 1000)
         self.old_x = event.x
         self.old_y = event.y
-        self.update_status()
+        self.ticker.mark('status')
 
     def reset(self, event):
+        self.history.commit(self.ink.up())
         self.old_x = None
         self.old_y = None
-        self.last_time = None
+        self.meter.reset()
         self.speed = 0
-        self.update_status()
+        self.ticker.mark('status')
+
+    def undo(self, event=None):
+        if not self.engine.drawing and self.loader is None:
+            self.history.undo()
+
+    def redo(self, event=None):
+        if not self.engine.drawing and self.loader is None:
+            self.history.redo()
 
     def clear_canvas(self):
-        self.canvas.delete("all")
-
-    def save_drawing(self):
-        x = self.root.winfo_rootx() + self.canvas.winfo_x()
-        y = self.root.winfo_rooty() + self.canvas.winfo_y()
-        x1 = x + self.canvas.winfo_width()
-        y1 = y + self.canvas.winfo_height()
-        img = ImageGrab.grab().crop((x, y, x1, y1))
-        file_path = filedialog.asksaveasfilename(defaultextension=".png",
-                                                 filetypes=[("PNG Files", "*.png")])
-        if file_path:
-            img.save(file_path)
+        if self.loader is not None:
+            return
+        self.engine.clear()
+        self.history.clear()
 
     def update_status(self):
+        self.speed = self.meter.update()
         status_text = f"🎨 Color: {self.pen_color}    ✏️ Width: {self.pen_width}    🏃 Speed: {self.speed:.2f} px/sec"
         self.status.config(text=status_text)
 
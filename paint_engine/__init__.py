@@ -0,0 +1,9 @@
+from . import document
+from .app import DocumentMixin, ViewMixin
+from .canvas import StrokeCanvas
+from .document import StreamLoader
+from .history import History
+from .ink import Ink, SpeedWidth
+from .raster import BackingRaster
+from .stroke import Stroke
+from .ticker import FrameTicker, SpeedMeter
@@ -0,0 +1,172 @@
+import os
+
+from . import document
+from .document import StreamLoader
+from .render import pixel_box, save_png_async
+
+
+class DocumentMixin:
+    # Save/Open for the PaintApps. Needs self.root, self.canvas, self.engine,
+    # self.history, self.status and self.bg_color; self.loader is set while a
+    # document streams in (the apps ignore edits until it is None again).
+    # Everything drawn is saved, strokes panned off the page included.
+
+    def save_drawing(self):
+        # .pnt keeps the strokes editable, .svg is vector, anything else a PNG
+        from tkinter import filedialog
+
+        file = filedialog.asksaveasfilename(defaultextension=".png", filetypes=[
+            ("PNG Image", "*.png"), ("Paint Document", "*.pnt"), ("SVG Image", "*.svg")
+        ])
+        if not file:
+            return
+        ext = os.path.splitext(file)[1].lower()
+        strokes, raster = self.engine.strokes, self.engine.raster
+        if ext not in (document.EXTENSION, ".svg"):
+            # Rendered from the strokes (the backing raster when they are all
+            # on the page), encoded in the background
+            self.wait_for_save(save_png_async(file, strokes, raster))
+            return
+        try:
+            if ext == document.EXTENSION:
+                document.save(file, strokes, raster.size, raster.bg)
+            else:
+                origin, size = pixel_box(strokes, raster.size)
+                document.export_svg(file, strokes, size, raster.bg, origin)
+        except OSError as e:
+            self.status.config(text=f"❌ Save failed: {e}")
+            return
+        self.status.config(text=f"💾 Saved {file}")
+
+    def open_drawing(self):
+        from tkinter import filedialog
+
+        file = filedialog.askopenfilename(filetypes=[("Paint Document", "*.pnt")])
+        if not file or self.engine.drawing:
+            return
+        self.stop_loading()
+        try:
+            self.loader = StreamLoader(self.root, self.engine, file, on_done=self.loaded)
+        except (OSError, ValueError) as e:
+            self.status.config(text=f"❌ Open failed: {e}")
+            return
+        # Document background replaces the theme colour
+        self.bg_color = self.loader.reader.bg
+        self.canvas.config(bg=self.bg_color)
+        self.canvas_cleared()
+        self.history.clear()
+        # Strokes show up a batch per event-loop turn instead of all at once
+        self.loader.start()
+
+    def loaded(self, loader):
+        self.loader = None
+        self.history.clear()
+        error = loader.error
+        self.status.config(text=f"❌ Open failed: {error}" if error else f"📂 Opened {loader.reader.loaded} strokes")
+
+    def stop_loading(self):
+        if self.loader is not None:
+            self.loader.cancel()
+            self.loader = None
+
+    def wait_for_save(self, future):
+        if not future.done():
+            self.root.after(50, self.wait_for_save, future)
+            return
+        error = future.exception()
+        self.status.config(text=f"❌ Save failed: {error}" if error else f"💾 Saved {future.result()}")
+
+    def canvas_cleared(self):
+        # Every canvas item is gone (clear, open); drop references to them
+        pass
+
+
+class ViewMixin:
+    # Pan with the middle/right button, zoom with the wheel, Ctrl+0 back to
+    # 1:1, plus the dashed preview segment. Needs self.root, self.canvas,
+    # self.engine and a self.ticker with 'view', 'status' and 'preview'
+    # jobs; the app's draw() ignores button 1 while self.pan_from is set.
+
+    def bind_view(self):
+        self.preview_line = None
+        self.preview_from = None  # start of the preview segment
+        self.pan_from = None  # last pointer position of a pan drag
+        self.pending_pan = [0, 0]
+        self.pending_zoom = None  # (factor, x, y) since the last frame
+        for button in (2, 3):
+            self.canvas.bind(f'<ButtonPress-{button}>', self.start_pan)
+            self.canvas.bind(f'<B{button}-Motion>', self.pan)
+            self.canvas.bind(f'<ButtonRelease-{button}>', self.end_pan)
+        self.canvas.bind('<MouseWheel>', self.zoom)
+        self.canvas.bind('<Button-4>', self.zoom)
+        self.canvas.bind('<Button-5>', self.zoom)
+        self.canvas.bind('<Configure>', self.resize)
+        self.root.bind('<Control-0>', self.reset_view)
+
+    def start_pan(self, event):
+        if not self.engine.drawing:
+            self.pan_from = (event.x, event.y)
+
+    def pan(self, event):
+        if self.pan_from is None:
+            return
+        self.pending_pan[0] += event.x - self.pan_from[0]
+        self.pending_pan[1] += event.y - self.pan_from[1]
+        self.pan_from = (event.x, event.y)
+        self.ticker.mark('view')
+
+    def end_pan(self, event):
+        self.pan_from = None
+
+    def zoom(self, event):
+        if self.engine.drawing:
+            return
+        up = event.num == 4 or getattr(event, 'delta', 0) > 0
+        factor = 1.25 if up else 0.8
+        if self.pending_zoom is not None:
+            factor *= self.pending_zoom[0]
+        self.pending_zoom = (factor, event.x, event.y)
+        self.ticker.mark('view', 'status')
+
+    def reset_view(self, event=None):
+        if not self.engine.drawing:
+            view = self.engine.view
+            self.pending_pan = [view.x * view.scale, view.y * view.scale]
+            self.pending_zoom = (1 / view.scale, 0, 0)
+            self.ticker.mark('view', 'status')
+
+    def resize(self, event):
+        self.engine.view.width, self.engine.view.height = event.width, event.height
+        self.ticker.mark('view')
+
+    def update_view(self):
+        # Pan/zoom input of one frame applied at once; a big zoom-out builds
+        # its canvas items over several frames instead of freezing the UI
+        dx, dy = self.pending_pan
+        self.pending_pan = [0, 0]
+        zoom, self.pending_zoom = self.pending_zoom, None
+        busy = self.engine.pan(dx, dy, budget=0.008)
+        if zoom is not None:
+            busy = self.engine.zoom(*zoom, budget=0.008)
+        if busy:
+            self.ticker.mark('view')
+
+    def update_preview(self):
+        # One dashed item, moved with coords() instead of recreated per event
+        if self.preview_from is None:
+            if self.preview_line:
+                self.canvas.delete(self.preview_line)
+                self.preview_line = None
+            return
+        coords = (*self.preview_from, self.old_x, self.old_y)
+        if self.preview_line is None:
+            self.preview_line = self.canvas.create_line(
+                *coords, fill=self.pen_color, width=1, dash=(2, 2)
+            )
+        else:
+            self.canvas.coords(self.preview_line, *coords)
+            self.canvas.tag_raise(self.preview_line)
+
+    def canvas_cleared(self):
+        self.preview_line = None
+        super().canvas_cleared()
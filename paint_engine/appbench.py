@@ -0,0 +1,255 @@
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .bench import peak_rss_mb, percentiles, pointer_path
+
+# Event handlers and button commands of the PaintApps; the apps that lack
+# one (paint.py has no eraser or theme) just skip it
+HANDLERS = ("draw", "track_mouse", "reset", "toggle_eraser", "toggle_theme", "clear_canvas")
+# Per-frame jobs, timed too so the cost hidden behind the ticker shows up
+FRAME_JOBS = ("update_status", "update_preview", "update_view")
+
+BUTTON1 = 0x100  # Button1Mask in Tk's event state
+
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def start_xvfb(display=":99", screen="1280x1024x24", timeout=10.0):
+    # Private X server for the run -> its process; DISPLAY now points at it
+    exe = shutil.which("Xvfb")
+    if exe is None:
+        raise SystemExit("Xvfb not found (apt install xvfb), or run with a DISPLAY and without --xvfb")
+    proc = subprocess.Popen([exe, display, "-screen", "0", screen, "-nolisten", "tcp"],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    sock = f"/tmp/.X11-unix/X{display.lstrip(':').split('.')[0]}"
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(sock):
+        if proc.poll() is not None:
+            raise SystemExit(f"Xvfb exited with status {proc.returncode}")
+        if time.monotonic() > deadline:
+            proc.kill()
+            raise SystemExit(f"Xvfb did not come up on {display}")
+        time.sleep(0.05)
+    os.environ["DISPLAY"] = display
+    return proc
+
+
+def timed_app(cls, latencies):
+    # Subclass of an app's PaintApp whose handlers log their run time in
+    # latencies[name]. Bindings and button commands are made on self, so
+    # they go through these. Nested calls (toggle_theme -> clear_canvas)
+    # count for both. Eraser drags are logged as "draw:erase"/"reset:erase".
+    def wrap(name):
+        inner = getattr(cls, name)
+
+        def handler(self, *args, **kwargs):
+            key = name
+            if name in ("draw", "reset") and getattr(self, "mode", "draw") == "erase":
+                key += ":erase"
+            t0 = time.perf_counter()
+            try:
+                return inner(self, *args, **kwargs)
+            finally:
+                latencies.setdefault(key, []).append(time.perf_counter() - t0)
+
+        handler.__name__ = name
+        return handler
+
+    names = [n for n in HANDLERS + FRAME_JOBS if hasattr(cls, n)]
+    return type("Timed" + cls.__name__, (cls,), {n: wrap(n) for n in names})
+
+
+class Storm:
+    # Queues synthetic pointer events on the app's canvas (event_generate
+    # with when="tail", as if they had all just arrived from the X server)
+    # and lets Tk drain them. Idle lag: from queueing a burst until Tk is
+    # idle again, i.e. how far the UI falls behind the input.
+
+    def __init__(self, app, rng, speed=800.0, rate=1000.0):
+        self.app = app
+        self.root = app.root
+        self.canvas = app.canvas
+        self.rng = rng
+        self.speed = speed
+        self.rate = rate
+        self.lag = []
+        self.events = 0
+        self._ms = 0  # event.time, ms
+
+    def _send(self, sequence, x, y, state=0):
+        self.canvas.event_generate(sequence, x=x, y=y, state=state, time=self._ms, when="tail")
+        self.events += 1
+
+    def pump(self):
+        t0 = time.perf_counter()
+        idle = []
+        self.root.after_idle(lambda: idle.append(time.perf_counter()))
+        while not idle:
+            self.root.update()
+        self.lag.append(idle[0] - t0)
+
+    def stroke(self):
+        # One button-1 drag of pointer_path() samples, then the release
+        _, samples = pointer_path(self.rng, self.speed, self.rate)
+        start = self._ms
+        x, y, _ = samples[0]
+        self._send("<ButtonPress-1>", x, y)
+        for x, y, t in samples:
+            self._ms = start + int(t * 1000)
+            self._send("<Motion>", x, y, BUTTON1)
+        self._send("<ButtonRelease-1>", x, y, BUTTON1)
+        self._ms += 20
+        self.pump()
+
+    def hover(self, count):
+        # Button-up pointer moves (status bar tracking)
+        x, y = 500, 300
+        for _ in range(count):
+            x = min(max(x + self.rng.randint(-8, 8), 0), 999)
+            y = min(max(y + self.rng.randint(-8, 8), 0), 599)
+            self._ms += 1
+            self._send("<Motion>", x, y)
+        self.pump()
+
+
+def summarize(latencies):
+    return {name: dict(percentiles(samples), count=len(samples))
+            for name, samples in sorted(latencies.items())}
+
+
+def run_app(name, args):
+    # Whole run for one app module (paint, paint_v2, ...) -> result dict
+    import tkinter as tk
+
+    module = importlib.import_module(name)
+    latencies = {}
+    root = tk.Tk()
+    app = timed_app(module.PaintApp, latencies)(root)
+    root.update()
+    storm = Storm(app, random.Random(args.seed), args.speed, args.rate)
+    rss_start = rss_mb()
+    stages = []
+    for target in args.stages:
+        # toggle_theme/clear_canvas at the end of the previous stage emptied
+        # the canvas, so every stage draws its drawing from scratch
+        latencies.clear()
+        storm.lag.clear()
+        storm.events = 0
+        t0 = time.perf_counter()
+        for _ in range(target):
+            storm.stroke()
+        draw_s = time.perf_counter() - t0
+        storm.hover(args.hover)
+        if hasattr(app, "toggle_eraser"):
+            app.toggle_eraser()
+            storm.pump()
+            for _ in range(args.erase):
+                storm.stroke()
+            app.toggle_eraser()
+            storm.pump()
+        items = len(app.canvas.find_all())
+        rss = rss_mb()
+        # Whole-drawing operations last: both clear the canvas
+        if hasattr(app, "toggle_theme"):
+            app.toggle_theme()
+            storm.pump()
+        app.clear_canvas()
+        storm.pump()
+        stages.append({
+            "strokes": target,
+            "events": storm.events,
+            "draw_wall_s": round(draw_s, 3),
+            "events_per_s": round(storm.events / draw_s, 1) if draw_s else None,
+            "canvas_items": items,
+            "rss_mb": round(rss, 1),
+            "idle_lag": percentiles(storm.lag),
+            "handlers": summarize(latencies),
+        })
+        if not args.quiet:
+            h = stages[-1]["handlers"].get("draw", {})
+            print(f"{name:10s} {target:6d} strokes  draw p50 {h.get('p50_ms', 0):7.3f} "
+                  f"p99 {h.get('p99_ms', 0):7.3f} ms  lag p99 {stages[-1]['idle_lag']['p99_ms']:8.2f} ms  "
+                  f"{items:6d} items  {rss:7.1f} MB", file=sys.stderr)
+    root.destroy()
+    return {
+        "harness": "paint_engine.appbench",
+        "app": name,
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "tk": tk.TkVersion,
+        "speed_px_s": args.speed,
+        "rate_hz": args.rate,
+        "rss_mb_start": round(rss_start, 1),
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": stages,
+    }
+
+
+def git_revision():
+    try:
+        out = subprocess.run(["git", "describe", "--always", "--dirty"], capture_output=True,
+                             text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m paint_engine.appbench",
+        description="Drive the Tk paint apps with synthetic event storms and record latencies.")
+    parser.add_argument("--app", nargs="+", default=["paint", "paint_v2", "paint_v3"],
+                        help="app modules to run, each in its own process")
+    parser.add_argument("--stages", type=lambda s: [int(v) for v in s.split(",")],
+                        default=[100, 1000, 5000], help="stroke counts, comma separated")
+    parser.add_argument("--hover", type=int, default=500, help="button-up moves per stage")
+    parser.add_argument("--erase", type=int, default=20, help="eraser drags per stage")
+    parser.add_argument("--speed", type=float, default=800.0, help="drag speed, px/s")
+    parser.add_argument("--rate", type=float, default=1000.0, help="pointer events per second")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--xvfb", action="store_true", help="start a private Xvfb for the run")
+    parser.add_argument("--display", default=":99", help="display number for --xvfb")
+    parser.add_argument("--quiet", action="store_true")
+    parser.add_argument("--json", metavar="PATH", help="append one JSON line per app")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    xvfb = start_xvfb(args.display) if args.xvfb else None
+    if not os.environ.get("DISPLAY"):
+        raise SystemExit("no DISPLAY; use --xvfb")
+    results = []
+    try:
+        # A fresh process per app: its own Tk, interpreter state and RSS
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx, max_tasks_per_child=1) as pool:
+            for name in args.app:
+                results.append(pool.submit(run_app, name, args).result())
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+            xvfb.wait()
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "a") as f:
+            for res in results:
+                f.write(json.dumps(res) + "\n")
+    return results
+
+
+if __name__ == "__main__":
+    main()
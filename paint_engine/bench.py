@@ -0,0 +1,338 @@
+import argparse
+import json
+import math
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from . import document
+from .canvas import StrokeCanvas
+from .history import History
+from .ink import Ink, SpeedWidth
+from .raster import BackingRaster
+from .spatial import distance_to_segment
+from .stroke import Stroke
+
+
+class NullCanvas:
+    # Just enough of tk.Canvas to drive StrokeCanvas without a display
+    def __init__(self):
+        self.items = {}
+        self._next = 0
+
+    def create_line(self, *coords, **options):
+        self._next += 1
+        self.items[self._next] = coords
+        return self._next
+
+    def coords(self, item, coords):
+        self.items[item] = coords
+
+    def move(self, tag, dx, dy):
+        # Tk shifts the items in C; positions are not tracked here
+        pass
+
+    def tag_lower(self, item, below):
+        pass
+
+    def delete(self, item):
+        if item == "all":
+            self.items.clear()
+        else:
+            self.items.pop(item, None)
+
+    def find_all(self):
+        return tuple(self.items)
+
+
+def random_strokes(n, width=1000, height=600, seed=0, points=(10, 80)):
+    # -> [(color, pen width, [(x, y), ...])], random walks inside the canvas
+    rng = random.Random(seed)
+    strokes = []
+    for _ in range(n):
+        x, y = rng.uniform(0, width), rng.uniform(0, height)
+        heading = rng.uniform(0, 6.283)
+        pts = []
+        for _ in range(rng.randint(*points)):
+            heading += rng.gauss(0, 0.3)
+            x = min(max(x + 6 * rng.uniform(0.5, 1.5) * math.cos(heading), 0), width)
+            y = min(max(y + 6 * rng.uniform(0.5, 1.5) * math.sin(heading), 0), height)
+            pts.append((round(x), round(y)))
+        color = "#%06X" % rng.randrange(0x1000000)
+        strokes.append((color, rng.randint(1, 20), pts))
+    return strokes
+
+
+def percentiles(samples):
+    s = sorted(samples)
+    if not s:
+        return {"p50_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+    pick = lambda q: s[min(int(q * len(s)), len(s) - 1)] * 1000
+    return {"p50_ms": round(pick(0.5), 3), "p99_ms": round(pick(0.99), 3), "max_ms": round(s[-1] * 1000, 3)}
+
+
+def peak_rss_mb():
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def bench_history(args):
+    engine = StrokeCanvas(NullCanvas(), BackingRaster(1000, 600))
+    history = History(engine, max_bytes=int(args.max_mb * 2**20), snapshot_every=args.snapshot_every)
+    draw, commit = [], []
+    peak_bytes = 0
+    for color, width, pts in random_strokes(args.strokes, seed=args.seed):
+        t0 = time.perf_counter()
+        engine.begin(*pts[0], color, width)
+        for x, y in pts[1:]:
+            engine.extend(x, y)
+        stroke = engine.end()
+        t1 = time.perf_counter()
+        history.commit(stroke)
+        t2 = time.perf_counter()
+        draw.append(t1 - t0)
+        commit.append(t2 - t1)
+        peak_bytes = max(peak_bytes, history.bytes)
+
+    undo, redo = [], []
+    for _ in range(min(args.undo, len(history.undo_stack))):
+        t0 = time.perf_counter()
+        history.undo()
+        undo.append(time.perf_counter() - t0)
+    for _ in range(len(history.redo_stack)):
+        t0 = time.perf_counter()
+        history.redo()
+        redo.append(time.perf_counter() - t0)
+    return {
+        "suite": "history",
+        "strokes": args.strokes,
+        "max_mb": args.max_mb,
+        "draw": percentiles(draw),
+        "commit": percentiles(commit),
+        "undo": percentiles(undo),
+        "redo": percentiles(redo),
+        "undo_entries": len(history.undo_stack),
+        "compactions": history.compactions,
+        "strokes_past_cap": history.dropped,
+        "history_mb": round(history.bytes / 2**20, 2),
+        "history_peak_mb": round(peak_bytes / 2**20, 2),
+        "canvas_items": engine.item_count(),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def bench_document(args):
+    # Save / streaming load / SVG export of a drawing with about args.points points
+    strokes, total = [], 0
+    seed = args.seed
+    while total < args.points:
+        for color, width, pts in random_strokes(200, seed=seed):
+            strokes.append(Stroke(color, width, [v for p in pts for v in p], len(strokes)))
+            total += len(pts)
+        seed += 1
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "drawing" + document.EXTENSION)
+        svg = os.path.join(tmp, "drawing.svg")
+        save, load, into, export = [], [], [], []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            size = document.save(path, strokes, (1000, 600))
+            save.append(time.perf_counter() - t0)
+
+            t0 = time.perf_counter()
+            reader = document.DocumentReader(path)
+            first = None
+            for _stroke in reader:
+                if first is None:
+                    first = time.perf_counter() - t0
+            load.append(time.perf_counter() - t0)
+
+            # Same load, materialised into an engine (canvas items + raster)
+            engine = StrokeCanvas(NullCanvas(), BackingRaster(1000, 600))
+            t0 = time.perf_counter()
+            for stroke in document.DocumentReader(path):
+                engine.add(stroke)
+            into.append(time.perf_counter() - t0)
+
+            t0 = time.perf_counter()
+            document.export_svg(svg, strokes, (1000, 600))
+            export.append(time.perf_counter() - t0)
+        svg_size = os.path.getsize(svg)
+    return {
+        "suite": "document",
+        "strokes": len(strokes),
+        "points": total,
+        "file_kb": round(size / 1024, 1),
+        "bytes_per_point": round(size / total, 2),
+        "svg_kb": round(svg_size / 1024, 1),
+        "save": percentiles(save),
+        "load": percentiles(load),
+        "first_stroke_ms": round(first * 1000, 3),
+        "load_into_engine": percentiles(into),
+        "svg_export": percentiles(export),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def bench_viewport(args):
+    # Pan/zoom over a document args.area screens big, through a 1000x600 view
+    side = math.sqrt(args.area)
+    engine = StrokeCanvas(NullCanvas(), BackingRaster(1000, 600))
+    t0 = time.perf_counter()
+    for color, width, pts in random_strokes(args.strokes, 1000 * side, 600 * side, args.seed):
+        engine.add(Stroke(color, width, [v for p in pts for v in p]))
+    build = time.perf_counter() - t0
+
+    # Pans at 1:1, then zoom out step by step until the whole document is
+    # in view, synchronously and with a per-frame budget
+    rng = random.Random(args.seed)
+    pan, shown = [], []
+    for _ in range(args.frames):
+        t0 = time.perf_counter()
+        engine.pan(rng.uniform(-40, 40), rng.uniform(-25, 25))
+        pan.append(time.perf_counter() - t0)
+        shown.append(len(engine.shown))
+    zoom_out = []
+    while engine.view.box()[2] - engine.view.box()[0] < 1000 * side:
+        t0 = time.perf_counter()
+        engine.zoom(0.5, 500, 300)
+        zoom_out.append({"scale": engine.view.scale, "ms": round((time.perf_counter() - t0) * 1000, 1),
+                         "shown": len(engine.shown)})
+    engine.zoom(1 / engine.view.scale, 500, 300)
+    budgeted = []
+    t0 = time.perf_counter()
+    busy = engine.zoom(1 / 64, 500, 300, budget=args.budget)
+    budgeted.append(time.perf_counter() - t0)
+    while busy:
+        t0 = time.perf_counter()
+        busy = engine.cull(args.budget)
+        budgeted.append(time.perf_counter() - t0)
+    return {
+        "suite": "viewport",
+        "strokes": args.strokes,
+        "screens": args.area,
+        "build_s": round(build, 2),
+        "pan": percentiles(pan),
+        "shown_max": max(shown),
+        "shown_mean": round(sum(shown) / len(shown), 1),
+        "zoom_out": zoom_out,
+        "budgeted_zoom_frames": len(budgeted),
+        "budgeted_frame": percentiles(budgeted),
+        "canvas_items": engine.item_count(),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def pointer_path(rng, speed, rate=125.0, width=1000, height=600):
+    # One smooth drag sampled like a mouse at `rate` Hz with integer coords
+    # -> (true (n, 2) path, [(x, y, t)] samples)
+    x, y = rng.uniform(100, width - 100), rng.uniform(100, height - 100)
+    heading = rng.uniform(0, 6.283)
+    true, samples = [], []
+    for i in range(rng.randint(60, 300)):
+        heading += rng.gauss(0, 0.06)
+        x += speed / rate * math.cos(heading)
+        y += speed / rate * math.sin(heading)
+        true.append((x, y))
+        samples.append((round(x), round(y), i / rate))
+    return np.array(true), samples
+
+
+def deviation(path, pts):
+    # Mean distance of the true path to the polyline through pts
+    d = np.full(len(path), np.inf)
+    for (x0, y0), (x1, y1) in zip(pts[:-1], pts[1:]):
+        d = np.minimum(d, distance_to_segment(path, x0, y0, x1, y1))
+    return float(d.mean())
+
+
+def bench_ink(args):
+    # Raw samples vs what the input pipeline keeps, per drag speed (px/s).
+    # "ok" is False when the strokes end up more than --max-deviation times
+    # as far from the true pointer path as the raw integer samples were
+    rng = random.Random(args.seed)
+    result = {"suite": "ink", "strokes_per_speed": args.strokes, "ok": True}
+    width = SpeedWidth()
+    for speed in (150, 600, 2400):
+        engine = StrokeCanvas(NullCanvas(), BackingRaster(1000, 600))
+        ink = Ink(engine)
+        raw = kept = runs = 0
+        move, up, dev_raw, dev_ink = [], [], [], []
+        for _ in range(args.strokes):
+            path, samples = pointer_path(rng, speed)
+            x, y, t = samples[0]
+            ink.down(x, y, t, "#000000", 8)
+            for x, y, t in samples[1:]:
+                t0 = time.perf_counter()
+                ink.move(x, y, t, width.width(8, speed) if args.velocity else None)
+                move.append(time.perf_counter() - t0)
+            t0 = time.perf_counter()
+            strokes = ink.up()
+            up.append(time.perf_counter() - t0)
+            width.reset()
+            raw += len(samples)
+            kept += sum(len(s) for s in strokes)
+            runs += len(strokes)
+            pts = np.concatenate([np.frombuffer(s.points, dtype=np.float32).reshape(-1, 2) for s in strokes])
+            dev_raw.append(deviation(path, [s[:2] for s in samples]))
+            dev_ink.append(deviation(path, pts))
+        raw_dev, ink_dev = sum(dev_raw) / len(dev_raw), sum(dev_ink) / len(dev_ink)
+        accurate = ink_dev <= raw_dev * args.max_deviation
+        result["ok"] = result["ok"] and accurate
+        result[f"{speed}px_s"] = {
+            "raw_points": raw,
+            "kept_points": kept,
+            "kept_ratio": round(kept / raw, 3),
+            "reduction_x": round(raw / kept, 1),
+            "runs": runs,
+            "move": percentiles(move),
+            "pen_up": percentiles(up),
+            "raw_deviation_px": round(raw_dev, 3),
+            "ink_deviation_px": round(ink_dev, 3),
+            "accurate": accurate,
+        }
+    return result
+
+
+SUITES = {"history": bench_history, "document": bench_document, "viewport": bench_viewport,
+          "ink": bench_ink}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m paint_engine.bench",
+        description="Benchmark the paint engine without a display.")
+    parser.add_argument("suite", choices=sorted(SUITES))
+    parser.add_argument("--strokes", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-mb", type=float, default=64.0, help="history memory cap")
+    parser.add_argument("--snapshot-every", type=int, default=50)
+    parser.add_argument("--undo", type=int, default=500, help="undo (then redo) this many steps")
+    parser.add_argument("--points", type=int, default=100000, help="document size")
+    parser.add_argument("--repeat", type=int, default=5, help="document runs")
+    parser.add_argument("--area", type=float, default=100.0, help="viewport: document size in screens")
+    parser.add_argument("--frames", type=int, default=500, help="viewport: pan steps")
+    parser.add_argument("--budget", type=float, default=0.008, help="viewport: seconds of cull() per frame")
+    parser.add_argument("--velocity", action="store_true", help="ink: speed-based width runs")
+    parser.add_argument("--max-deviation", type=float, default=1.5,
+                        help="ink: fail above this times the raw samples' deviation")
+    parser.add_argument("--json", metavar="PATH", help="append the result as a JSON line")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    result = SUITES[args.suite](args)
+    print(json.dumps(result, indent=2))
+    if args.json:
+        with open(args.json, "a") as f:
+            f.write(json.dumps(result) + "\n")
+    return result
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main().get("ok", True) else 1)
@@ -0,0 +1,404 @@
+import bisect
+import math
+import time
+from array import array
+
+import numpy as np
+
+from .spatial import SegmentGrid, as_xy, densify, distance_to_segment, split_runs
+from .stroke import Stroke
+from .viewport import Viewport
+
+# Tk re-parses every coordinate on each coords() call, so a very long stroke
+# is continued in a new item after this many points instead of growing forever
+CHUNK_POINTS = 256
+
+# Strokes get canvas items once they are within SHOW_MARGIN screens of the
+# view and lose them beyond KEEP_MARGIN, so panning back and forth a little
+# does not keep creating and deleting the same items
+SHOW_MARGIN = 0.25
+KEEP_MARGIN = 0.75
+
+
+class StrokeCanvas:
+    # Keeps strokes on a Tk canvas as one polyline item per stroke (per
+    # CHUNK_POINTS points for very long ones) that grows through
+    # canvas.coords(), instead of one create_line per motion event.
+    #
+    #   begin(x, y, color, width) -> pen down
+    #   extend(x, y)              -> each <B1-Motion>
+    #   tip(x, y)                 -> line shown up to (x, y), point not kept
+    #   end(points=None)          -> pen up, stroke frozen (optionally with
+    #                                its points replaced, e.g. by a fitted curve)
+    #
+    # With a BackingRaster every segment is mirrored into it as it is drawn,
+    # or with begin(..., mirror=False) the whole stroke once at end().
+    # remove()/add() take whole strokes off and put them back (undo/redo).
+    #
+    # The eraser (begin_erase / erase_to / end_erase) cuts the committed
+    # strokes it touches into pieces; `index` finds them without looking at
+    # the rest of the drawing. `strokes` stays sorted by z.
+    #
+    # All coordinates are document units; `view` maps them to the canvas.
+    # Only strokes near the view have canvas items (`shown`, sorted by z),
+    # simplified to the zoom, so pan/zoom cost follows what is on screen.
+    # The raster covers the document from (0, 0) at its own size (the page
+    # a PNG save exports).
+
+    def __init__(self, canvas, raster=None, view=None):
+        self.canvas = canvas
+        self.raster = raster
+        self.view = view if view is not None else Viewport(*(raster.size if raster else (1000, 600)))
+        self.strokes = []
+        self.shown = []
+        self.items = {}  # stroke -> its canvas item ids
+        self._todo = []  # strokes cull() has still to materialise
+        self._todo_view = None
+        self.index = SegmentGrid()
+        self.erasing = None
+        self._eraser = None
+        self._next_z = 0
+        self.current = None
+        self._item = None
+        self._chunk = None  # points of the live item (the tail of the stroke)
+        self._tip = False  # _chunk ends with a tip() point
+        self._mirror = True
+
+    @property
+    def drawing(self):
+        # Pen or eraser down
+        return self.current is not None or self.erasing is not None
+
+    def begin(self, x, y, color, width, mirror=True):
+        self.end()
+        self.end_erase()
+        self.current = Stroke(color, width, (x, y))
+        self._mirror = mirror
+        self._start_item(x, y)
+        if self.raster is not None and mirror:
+            self.raster.dot(x, y, color, width)
+        return self.current
+
+    def _create(self, stroke, coords):
+        item = self.canvas.create_line(
+            *coords, fill=stroke.color, width=max(stroke.width * self.view.scale, 1),
+            capstyle="round", joinstyle="round")
+        self.items.setdefault(stroke, []).append(item)
+        return item
+
+    def _start_item(self, x, y):
+        x, y = self.view.to_screen(x, y)
+        self._chunk = [x, y, x, y]
+        self._tip = False
+        self._item = self._create(self.current, self._chunk)
+
+    def extend(self, x, y):
+        if self.current is None:
+            return
+        if self.raster is not None and self._mirror:
+            x0, y0 = self.current.last()
+            self.raster.segment(x0, y0, x, y, self.current.color, self.current.width)
+        self.current.append(x, y)
+        sx, sy = self.view.to_screen(x, y)
+        if self._tip:
+            del self._chunk[-2:]
+            self._tip = False
+        if len(self._chunk) == 4 and self._chunk[:2] == self._chunk[2:]:
+            self._chunk[2:] = [sx, sy]  # replace the placeholder second point
+        else:
+            self._chunk += [sx, sy]
+        self.canvas.coords(self._item, self._chunk)
+        if len(self._chunk) >= 2 * CHUNK_POINTS:
+            # Freeze this item and carry on from its last point
+            self._start_item(x, y)
+
+    def tip(self, x, y):
+        # Live line runs on to (x, y) without the point joining the stroke
+        # (input that is still being simplified); the next extend/tip moves it
+        if self.current is None:
+            return
+        sx, sy = self.view.to_screen(x, y)
+        if self._tip or (len(self._chunk) == 4 and self._chunk[:2] == self._chunk[2:]):
+            self._chunk[-2:] = [sx, sy]
+        else:
+            self._chunk += [sx, sy]
+        self._tip = True
+        self.canvas.coords(self._item, self._chunk)
+
+    def end(self, points=None):
+        # Freezes the stroke; returns it (None if there was none). `points`
+        # (flat x, y, ...) replace what was drawn live
+        stroke = self.current
+        self.current = self._item = self._chunk = None
+        self._tip = False
+        if stroke is None:
+            return None
+        stroke.z = self._next_z
+        self._next_z += 1
+        old = self.box(stroke)
+        if points is not None:
+            for item in self.items.pop(stroke, ()):
+                self.canvas.delete(item)
+            stroke.points = array("f", points)
+        self.strokes.append(stroke)
+        self.index.insert(stroke)
+        if points is None:
+            self.shown.append(stroke)
+        else:
+            self._materialise(stroke)
+        if self._on_page(union(old, self.box(stroke))):
+            if not self._mirror:
+                self.raster.stroke(stroke.points, stroke.color, stroke.width)
+            elif points is not None:
+                # The live segments are in the raster; repaint over both shapes
+                self.redraw(union(old, self.box(stroke)))
+        self._mirror = True
+        return stroke
+
+    def remove(self, stroke):
+        # Canvas items only; the raster is restored by whoever owns its history
+        self._hide(stroke)
+        self.index.remove(stroke)
+        if self.strokes and self.strokes[-1] is stroke:
+            self.strokes.pop()
+        else:
+            del self.strokes[self._position(stroke)]
+
+    def add(self, stroke, draw=True):
+        # Puts a finished stroke back at its z: canvas items if it is near the
+        # view, plus raster pixels unless draw=False (the caller restores the
+        # raster itself)
+        if stroke.z is None:
+            stroke.z = self._next_z
+        self._next_z = max(self._next_z, stroke.z + 1)
+        box = self.box(stroke)
+        if self._near(box, SHOW_MARGIN):
+            self._materialise(stroke)
+        # Strokes off the page leave the raster alone (and skip the query)
+        draw = draw and self._on_page(box)
+        above = draw and any(s.z > stroke.z for s in self.index.query(*box))
+        self.index.insert(stroke)
+        self.strokes.insert(bisect.bisect_right(self.strokes, stroke.z, key=lambda s: s.z), stroke)
+        if draw:
+            if above:
+                self.redraw(box)
+            else:
+                self.raster.stroke(stroke.points, stroke.color, stroke.width)
+
+    def _position(self, stroke):
+        # Index in `strokes` (sorted by z; eraser pieces share their z)
+        i = bisect.bisect_left(self.strokes, stroke.z, key=lambda s: s.z)
+        while self.strokes[i] is not stroke:
+            i += 1
+        return i
+
+    def _materialise(self, stroke):
+        # Canvas items for a committed stroke, stacked under the next shown
+        # stroke above it
+        pts = self.view.screen_points(as_xy(stroke))
+        step = 2 * (CHUNK_POINTS - 1)
+        for i in range(0, max(len(pts) - 2, 1), step):
+            self._create(stroke, pts[i:i + step + 2])
+        i = bisect.bisect_right(self.shown, stroke.z, key=lambda s: s.z)
+        if i < len(self.shown):
+            above = self.items[self.shown[i]][0]
+            for item in self.items[stroke]:
+                self.canvas.tag_lower(item, above)
+        self.shown.insert(i, stroke)
+
+    def _hide(self, stroke):
+        items = self.items.pop(stroke, None)
+        if items is None:
+            return
+        for item in items:
+            self.canvas.delete(item)
+        i = bisect.bisect_left(self.shown, stroke.z, key=lambda s: s.z)
+        while self.shown[i] is not stroke:
+            i += 1
+        del self.shown[i]
+
+    def _on_page(self, box):
+        # Does `box` touch the raster at all?
+        if self.raster is None:
+            return False
+        w, h = self.raster.size
+        return box[0] < w and box[2] > 0 and box[1] < h and box[3] > 0
+
+    def _near(self, box, margin):
+        x0, y0, x1, y1 = self.view.box(margin)
+        return box[0] <= x1 and box[2] >= x0 and box[1] <= y1 and box[3] >= y0
+
+    def pan(self, dx, dy, budget=None):
+        # Drag by (dx, dy) screen pixels: existing items just move
+        if dx or dy:
+            self.view.pan(dx, dy)
+            self.canvas.move("all", dx, dy)
+        return self.cull(budget)
+
+    def zoom(self, factor, sx, sy, budget=None):
+        # Zoom around screen point (sx, sy); items are rebuilt for the new
+        # scale (widths and simplification both change)
+        if self.view.zoom(factor, sx, sy) != 1:
+            for stroke in self.shown:
+                for item in self.items.pop(stroke):
+                    self.canvas.delete(item)
+            self.shown = []
+        return self.cull(budget)
+
+    def resize(self, width, height, budget=None):
+        self.view.width, self.view.height = width, height
+        return self.cull(budget)
+
+    def cull(self, budget=None):
+        # Items for the strokes near the view, none for the rest. With a
+        # budget (seconds) it stops creating items when time is up
+        # -> True if some are still missing; call again next frame
+        view = (self.view.x, self.view.y, self.view.scale, self.view.width, self.view.height)
+        if view != self._todo_view:
+            self._todo_view = view
+            keep = self.index.query(*self.view.box(KEEP_MARGIN))
+            for stroke in [s for s in self.shown if s not in keep]:
+                for item in self.items.pop(stroke):
+                    self.canvas.delete(item)
+            self.shown = [s for s in self.shown if s in self.items]
+            near = self.index.query(*self.view.box(SHOW_MARGIN))
+            # Highest z last, popped first: the top of the drawing shows up first
+            self._todo = sorted((s for s in near if s not in self.items), key=lambda s: s.z)
+        stop = None if budget is None else time.perf_counter() + budget
+        while self._todo:
+            stroke = self._todo.pop()
+            if stroke not in self.items and stroke in self.index:
+                self._materialise(stroke)
+            if stop is not None and time.perf_counter() >= stop:
+                break
+        return bool(self._todo)
+
+    def box(self, stroke, pad=0):
+        # Integer pixel box around the stroke including its pen width
+        x0, y0, x1, y1 = stroke.bbox()
+        pad += stroke.width / 2 + 2
+        return (math.floor(x0 - pad), math.floor(y0 - pad),
+                math.ceil(x1 + pad), math.ceil(y1 + pad))
+
+    def redraw(self, box):
+        # Raster only: repaint `box` from the strokes that overlap it, in z order
+        if self.raster is None:
+            return None
+        w, h = self.raster.size
+        box = (max(box[0], 0), max(box[1], 0), min(box[2], w), min(box[3], h))
+        if box[2] <= box[0] or box[3] <= box[1]:
+            return None
+        strokes = sorted(self.index.query(*box), key=lambda s: s.z)
+        self.raster.redraw(box, strokes)
+        return box
+
+    def begin_erase(self, x, y, width):
+        self.end()
+        self.end_erase()
+        self.erasing = Erase()
+        self._eraser = (x, y)
+        self.erase_to(x, y, width)
+
+    def erase_to(self, x, y, width):
+        # Eraser moved to (x, y): cut every stroke within width/2 of the path
+        if self.erasing is None:
+            return self.begin_erase(x, y, width)
+        (x0, y0), self._eraser = self._eraser, (x, y)
+        r = width / 2
+        lo_x, lo_y, hi_x, hi_y = min(x0, x) - r, min(y0, y) - r, max(x0, x) + r, max(y0, y) + r
+        dirty = None
+        for stroke in self.index.query(lo_x, lo_y, hi_x, hi_y):
+            reach = r + stroke.width / 2
+            pts = as_xy(stroke)
+            if distance_to_segment(pts, x0, y0, x, y).min() > reach + self._longest(pts):
+                continue
+            # Only the segments near the eraser get extra points to cut between
+            step = max(reach / 2, 1.0)
+            lo = np.minimum(pts[:-1], pts[1:]) if len(pts) > 1 else pts
+            hi = np.maximum(pts[:-1], pts[1:]) if len(pts) > 1 else pts
+            near = ((lo[:, 0] <= hi_x + stroke.width) & (hi[:, 0] >= lo_x - stroke.width) &
+                    (lo[:, 1] <= hi_y + stroke.width) & (hi[:, 1] >= lo_y - stroke.width))
+            # Cut points on whole pixels: PIL's wide lines rasterise fractional
+            # points differently per tile. Zoomed in, whole screen pixels so the
+            # cut does not look jagged. The stroke's own points stay exact.
+            q = max(self.view.scale, 1.0)
+            dense = densify(pts, step, near if len(pts) > 1 else None, snap=q)
+            keep = distance_to_segment(dense, x0, y0, x, y) > reach
+            if keep.all():
+                continue
+            pieces = [Stroke(stroke.color, stroke.width, dense[a:b].ravel(), stroke.z)
+                      for a, b in split_runs(keep)]
+            self._replace(stroke, pieces)
+            pad = stroke.width + step + 2
+            box = (math.floor(lo_x - pad), math.floor(lo_y - pad), math.ceil(hi_x + pad), math.ceil(hi_y + pad))
+            dirty = box if dirty is None else union(dirty, box)
+        if dirty is not None:
+            box = self.redraw(dirty)
+            if box is not None:
+                self.erasing.box = box if self.erasing.box is None else union(self.erasing.box, box)
+        return dirty
+
+    @staticmethod
+    def _longest(pts):
+        # Longest segment: a far-away sample can still have a segment under the eraser
+        if len(pts) < 2:
+            return 0.0
+        seg = np.diff(pts, axis=0)
+        return float(np.hypot(seg[:, 0], seg[:, 1]).max())
+
+    def _replace(self, stroke, pieces):
+        self._hide(stroke)
+        self.index.remove(stroke)
+        i = self._position(stroke)
+        self.strokes[i:i + 1] = pieces
+        for piece in pieces:
+            self._materialise(piece)
+            self.index.insert(piece)
+        self.erasing.replace(stroke, pieces)
+
+    def end_erase(self):
+        # -> the Erase record of the drag (None if not erasing or nothing was hit)
+        erase, self.erasing, self._eraser = self.erasing, None, None
+        if erase is None or not erase.removed:
+            return None
+        return erase
+
+    def clear(self, bg=None):
+        # bg: new background colour for the raster (theme change)
+        self.current = self._item = self._chunk = None
+        self.erasing = self._eraser = None
+        self.strokes.clear()
+        self.shown.clear()
+        self.items.clear()
+        self._todo, self._todo_view = [], None
+        self.index.clear()
+        self.canvas.delete("all")
+        if self.raster is not None:
+            self.raster.clear(bg)
+
+    def item_count(self):
+        return len(self.canvas.find_all())
+
+
+class Erase:
+    # One eraser drag, net: strokes it took away, pieces it left behind and
+    # the raster box it repainted. A piece cut again later in the same drag
+    # just drops out of `added`.
+
+    __slots__ = ("removed", "added", "box")
+
+    def __init__(self):
+        self.removed = []
+        self.added = []
+        self.box = None
+
+    def replace(self, stroke, pieces):
+        if stroke in self.added:
+            self.added.remove(stroke)
+        else:
+            self.removed.append(stroke)
+        self.added.extend(pieces)
+
+
+def union(a, b):
+    return min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])
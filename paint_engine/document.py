@@ -0,0 +1,230 @@
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+from contextlib import contextmanager
+from xml.sax.saxutils import quoteattr
+
+import numpy as np
+
+from .stroke import Stroke
+
+# Native drawing file: editable strokes instead of pixels.
+#
+#   MAGIC, <H version, <I header length, JSON header (size, bg, counts)
+#   then one zlib stream of stroke records, in z order:
+#     <B point type, <f width, <I point count, <B colour length, colour,
+#     flat x, y, ... points (little-endian int16 or float32)
+#
+# The body is decompressed chunk by chunk, so strokes can be handed out
+# while the rest of the file is still being read.
+MAGIC = b"PAINTDOC"
+VERSION = 1
+EXTENSION = ".pnt"
+
+INT16, FLOAT32 = 0, 1
+_TYPECODES = {INT16: "h", FLOAT32: "f"}
+_RECORD = struct.Struct("<BfIB")
+_PREFIX = struct.Struct("<HI")
+
+READ_CHUNK = 1 << 16
+
+
+def _packed(points):
+    # int16 when every coordinate is a whole number that fits (mouse input,
+    # eraser pieces), float32 otherwise
+    pts = np.frombuffer(points, dtype=np.float32)
+    if len(pts) and np.abs(pts).max() <= 32767 and np.array_equal(pts, np.rint(pts)):
+        return INT16, pts.astype("<i2")
+    return FLOAT32, pts.astype("<f4", copy=False)
+
+
+@contextmanager
+def _replacing(path, mode, **kwargs):
+    # File object for a temporary file next to `path` that only replaces it
+    # once completely written, so a failed or interrupted save leaves the
+    # previous drawing intact
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, mode, **kwargs) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def save(path, strokes, size, bg="white", level=6):
+    # Writes `strokes` (already in z order) -> number of bytes written
+    strokes = list(strokes)
+    header = json.dumps({
+        "size": list(size), "bg": bg, "strokes": len(strokes),
+        "points": sum(len(s) for s in strokes),
+    }).encode()
+    z = zlib.compressobj(level)
+    with _replacing(path, "wb") as f:
+        f.write(MAGIC + _PREFIX.pack(VERSION, len(header)) + header)
+        for stroke in strokes:
+            kind, pts = _packed(stroke.points)
+            color = stroke.color.encode()
+            f.write(z.compress(_RECORD.pack(kind, stroke.width, len(pts) // 2, len(color)) + color))
+            f.write(z.compress(pts.tobytes()))
+        f.write(z.flush())
+        return f.tell()
+
+
+class DocumentReader:
+    # Streams strokes out of a document: `header` is read up front, then
+    # iterating yields Stroke objects (z = file order) as their bytes get
+    # decompressed. Raises ValueError on a file that is not a document or
+    # is from a newer version.
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        try:
+            prefix = self.file.read(len(MAGIC) + _PREFIX.size)
+            if prefix[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"{path}: not a paint document")
+            version, length = _PREFIX.unpack(prefix[len(MAGIC):])
+            if version > VERSION:
+                raise ValueError(f"{path}: document version {version}, this build reads up to {VERSION}")
+            self.version = version
+            self.header = json.loads(self.file.read(length))
+            self.size = tuple(self.header["size"])
+            self.bg = self.header["bg"]
+        except (struct.error, KeyError, TypeError) as e:
+            self.file.close()
+            raise ValueError(f"{path}: damaged document header") from e
+        except Exception:
+            self.file.close()
+            raise
+        self.loaded = 0
+
+    def __iter__(self):
+        z = zlib.decompressobj()
+        buf = bytearray()
+        pos = 0
+        with self.file:
+            while True:
+                chunk = self.file.read(READ_CHUNK)
+                buf += z.decompress(chunk) if chunk else z.flush()
+                while len(buf) - pos >= _RECORD.size:
+                    kind, width, count, clen = _RECORD.unpack_from(buf, pos)
+                    typecode = _TYPECODES[kind]
+                    nbytes = 2 * count * array(typecode).itemsize
+                    end = pos + _RECORD.size + clen + nbytes
+                    if len(buf) < end:
+                        break
+                    start = pos + _RECORD.size
+                    color = buf[start:start + clen].decode()
+                    pts = array(typecode)
+                    pts.frombytes(buf[start + clen:end])
+                    if sys.byteorder != "little":
+                        pts.byteswap()
+                    # Slider widths are whole numbers; keep them ints for Tk/PIL
+                    width = int(width) if width.is_integer() else width
+                    stroke = Stroke(color, width, pts, self.loaded)
+                    self.loaded += 1
+                    pos = end
+                    yield stroke
+                # Drop what was parsed so the buffer stays about one chunk big
+                del buf[:pos]
+                pos = 0
+                if not chunk:
+                    break
+        if buf or not z.eof:
+            raise ValueError("truncated paint document")
+
+    def close(self):
+        self.file.close()
+
+
+def load(path):
+    # Whole document at once -> (reader with header/size/bg, [Stroke])
+    reader = DocumentReader(path)
+    return reader, list(reader)
+
+
+class StreamLoader:
+    # Loads a document into a StrokeCanvas from Tk's event loop: each
+    # after() callback adds strokes for at most `budget` seconds, so a big
+    # drawing fills in progressively and the window stays responsive.
+    # on_done(loader) runs at the end; `error` is set if reading failed.
+
+    def __init__(self, root, engine, path, on_done=None, budget=0.008):
+        self.root = root
+        self.engine = engine
+        self.reader = DocumentReader(path)
+        self.on_done = on_done
+        self.budget = budget
+        self.error = None
+        self.done = False
+        self._strokes = iter(self.reader)
+        self._pending = None
+
+    @property
+    def progress(self):
+        total = self.reader.header["strokes"]
+        return self.reader.loaded / total if total else 1.0
+
+    def start(self):
+        self.engine.clear(self.reader.bg)
+        self._pending = self.root.after_idle(self.step)
+        return self
+
+    def step(self):
+        self._pending = None
+        stop = time.perf_counter() + self.budget
+        try:
+            for stroke in self._strokes:
+                self.engine.add(stroke)
+                if time.perf_counter() >= stop:
+                    self._pending = self.root.after(1, self.step)
+                    return
+        except (OSError, ValueError, KeyError, zlib.error) as e:
+            self.error = e
+        self._finish()
+
+    def cancel(self):
+        if self._pending is not None:
+            self.root.after_cancel(self._pending)
+            self._pending = None
+        self.reader.close()
+        self.done = True
+
+    def _finish(self):
+        self.done = True
+        if self.on_done is not None:
+            self.on_done(self)
+
+
+def export_svg(path, strokes, size, bg="white", origin=(0, 0)):
+    # Round-capped polylines like the canvas, one element per stroke. The
+    # image shows `size` document units from `origin` (render.pixel_box()
+    # for everything drawn)
+    w, h = size
+    x, y = origin
+    with _replacing(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{w}" height="{h}" '
+                f'viewBox="{x} {y} {w} {h}">\n')
+        f.write(f'<rect x="{x}" y="{y}" width="{w}" height="{h}" fill={quoteattr(bg)}/>\n')
+        f.write('<g fill="none" stroke-linecap="round" stroke-linejoin="round">\n')
+        for stroke in strokes:
+            color = quoteattr(stroke.color)
+            pts = stroke.points
+            if len(pts) == 2 or all(v == pts[i % 2] for i, v in enumerate(pts)):
+                f.write(f'<circle cx="{pts[0]:g}" cy="{pts[1]:g}" r="{stroke.width / 2:g}" '
+                        f'fill={color}/>\n')
+                continue
+            coords = " ".join(f"{x:g},{y:g}" for x, y in zip(pts[0::2], pts[1::2]))
+            f.write(f'<polyline points="{coords}" stroke={color} stroke-width="{stroke.width:g}"/>\n')
+        f.write("</g>\n</svg>\n")
@@ -0,0 +1,284 @@
+import math
+import time
+import zlib
+
+from PIL import Image
+
+
+class Entry:
+    # One undo step: the strokes it added and removed plus the raster pixels
+    # of its box from before it happened. A plain entry is one stroke or one
+    # eraser drag with a rectangular RGB patch; a snapshot entry is many old
+    # entries compacted into one zlib-packed patch of their union box, with
+    # a 1-bit mask of the pixels under their strokes.
+
+    __slots__ = ("added", "removed", "box", "patch", "mask", "size")
+
+    def __init__(self, added, box, patch, mask=None, removed=()):
+        self.added = added
+        self.removed = list(removed)
+        self.box = box
+        self.patch = patch
+        self.mask = mask
+        self.size = None
+
+    @property
+    def snapshot(self):
+        return self.mask is not None
+
+    def image(self):
+        if not self.snapshot:
+            return self.patch, None
+        w, h = self.box[2] - self.box[0], self.box[3] - self.box[1]
+        patch = Image.frombytes("RGB", (w, h), zlib.decompress(self.patch))
+        mask = Image.frombytes("1", (w, h), zlib.decompress(self.mask))
+        return patch, mask
+
+    def nbytes(self):
+        if self.size is None:
+            if self.patch is None:
+                pixels = 0
+            elif self.snapshot:
+                pixels = len(self.patch) + len(self.mask)
+            else:
+                pixels = self.patch.width * self.patch.height * 3
+            strokes = self.added + self.removed
+            self.size = pixels + sum(s.points.itemsize * len(s.points) + 64 for s in strokes)
+        return self.size
+
+
+class History:
+    # Command-log undo/redo over a StrokeCanvas with a BackingRaster.
+    #
+    # Undo pastes one stroke's before-patch back and deletes its canvas
+    # items; redo redraws just that stroke. Eraser drags are entries too:
+    # undo puts the cut strokes back, redo swaps the pieces in again. When
+    # the log (redo side included) goes over `max_bytes`, the oldest
+    # `snapshot_every` plain entries are compacted into one snapshot entry;
+    # when only snapshots are left the oldest is dropped and can no longer
+    # be undone. Compaction runs a piece at a time, `budget` seconds of it
+    # per commit (pen up stays quick), so the log may sit above the cap for
+    # a few strokes; compact() does the rest on demand.
+    #
+    # `_base` is the raster as of the last commit, so the before-patch of a
+    # stroke that was drawn incrementally can still be cut out at pen up.
+
+    def __init__(self, engine, max_bytes=64 * 2**20, snapshot_every=50, budget=0.004):
+        self.engine = engine
+        self.raster = engine.raster
+        self.max_bytes = max_bytes
+        self.snapshot_every = snapshot_every
+        self.budget = budget
+        self.undo_stack = []
+        self.redo_stack = []
+        self.bytes = 0
+        self.compactions = 0
+        self.dropped = 0
+        self._job = None  # Compaction in progress
+        self._base = self.raster.snapshot()
+
+    def stroke_box(self, stroke):
+        x0, y0, x1, y1 = stroke.bbox()
+        pad = stroke.width / 2 + 2
+        w, h = self.raster.size
+        box = (max(int(math.floor(x0 - pad)), 0), max(int(math.floor(y0 - pad)), 0),
+               min(int(math.ceil(x1 + pad)), w), min(int(math.ceil(y1 + pad)), h))
+        return box if box[2] > box[0] and box[3] > box[1] else None
+
+    def commit(self, strokes):
+        # Call with engine.end()'s result on pen up, or Ink.up()'s list of
+        # width runs (one undo step for the whole gesture)
+        if strokes is None:
+            return
+        if not isinstance(strokes, list):
+            strokes = [strokes]
+        boxes = [b for b in map(self.stroke_box, strokes) if b is not None]
+        if not strokes:
+            return
+        box = None
+        if boxes:
+            box = (min(b[0] for b in boxes), min(b[1] for b in boxes),
+                   max(b[2] for b in boxes), max(b[3] for b in boxes))
+        self._record(strokes, [], box)
+
+    def commit_erase(self, erase):
+        # Call with engine.end_erase()'s result on pen up
+        if erase is None:
+            return
+        self._record(erase.added, erase.removed, erase.box)
+
+    def _record(self, added, removed, box):
+        patch = None
+        if box is not None:
+            patch = self._base.crop(box)
+            self._base.paste(self.raster.image.crop(box), box[:2])
+        for entry in self.redo_stack:
+            self.bytes -= entry.nbytes()
+        self.redo_stack.clear()
+        self._push(self.undo_stack, Entry(added, box, patch, removed=removed))
+        self.compact(self.budget)
+
+    def _push(self, stack, entry):
+        stack.append(entry)
+        self.bytes += entry.nbytes()
+
+    def _restore(self, entry):
+        if entry.box is None:
+            return
+        patch, mask = entry.image()
+        for img in (self.raster.image, self._base):
+            img.paste(patch, entry.box[:2], mask)
+
+    def undo(self):
+        if not self.undo_stack:
+            return False
+        entry = self.undo_stack.pop()
+        for stroke in reversed(entry.added):
+            self.engine.remove(stroke)
+        for stroke in entry.removed:
+            self.engine.add(stroke, draw=False)
+        self._restore(entry)
+        self.redo_stack.append(entry)
+        return True
+
+    def redo(self):
+        if not self.redo_stack:
+            return False
+        entry = self.redo_stack.pop()
+        for stroke in entry.removed:
+            self.engine.remove(stroke)
+        for stroke in entry.added:
+            self.engine.add(stroke, draw=not entry.removed)
+        if entry.removed and entry.box is not None:
+            self.engine.redraw(entry.box)
+        if entry.box is not None:
+            self._base.paste(self.raster.image.crop(entry.box), entry.box[:2])
+        self.undo_stack.append(entry)
+        return True
+
+    def compact(self, budget=None):
+        # Works the log back under max_bytes, for about `budget` seconds
+        # (None: until done) -> True while there is still work left
+        deadline = None if budget is None else time.perf_counter() + budget
+        while True:
+            if self._job is None:
+                if self.bytes <= self.max_bytes or not self.undo_stack:
+                    return False
+                self._job = self._plan()
+            elif self._job.step():
+                job, self._job = self._job, None
+                self._replace(job.group, job.entry())
+            if deadline is not None and time.perf_counter() >= deadline:
+                return self._job is not None or self.bytes > self.max_bytes
+
+    def _plan(self):
+        # Next step towards the cap -> Compaction, or None when it dropped
+        # the oldest entry instead
+        stack = self.undo_stack
+        # Oldest run of plain entries, never touching the newest one
+        start = next((i for i, e in enumerate(stack) if not e.snapshot), len(stack))
+        stop = start
+        while stop < len(stack) - 1 and not stack[stop].snapshot and stop - start < self.snapshot_every:
+            stop += 1
+        if stop - start >= 2:
+            return Compaction(stack[start:stop], self.raster)
+        entry = stack.pop(0)
+        self.bytes -= entry.nbytes()
+        self.dropped += len(entry.added)
+        return None
+
+    def _replace(self, group, merged):
+        # Swaps the group for its snapshot entry, unless undo/redo/commit
+        # moved or discarded any of it meanwhile (the work is then lost)
+        stack = self.undo_stack
+        start = next((i for i, e in enumerate(stack) if e is group[0]), None)
+        if start is None or len(stack) < start + len(group) or any(
+                a is not b for a, b in zip(stack[start:start + len(group)], group)):
+            return
+        for entry in group:
+            self.bytes -= entry.nbytes()
+        stack[start:start + len(group)] = [merged]
+        self.bytes += merged.nbytes()
+        self.compactions += 1
+
+    def clear(self):
+        # After the canvas itself was cleared (clear button, theme change)
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.bytes = 0
+        self._job = None
+        self._base = self.raster.snapshot()
+
+    def report(self):
+        return (f"{len(self.undo_stack)} undo / {len(self.redo_stack)} redo, "
+                f"{self.bytes / 2**20:.1f} MB, {self.compactions} compactions, "
+                f"{self.dropped} strokes past the cap")
+
+
+class Compaction:
+    # Several old entries -> one snapshot entry, built an entry per step()
+    # and then packed a chunk per step(), so it can be spread over commits.
+    # Reads only the entries' own patches and strokes, never the live
+    # raster, so undo/redo in between is fine.
+
+    CHUNK = 1 << 18  # patch bytes packed per step
+
+    def __init__(self, group, raster):
+        self.group = group
+        self.raster = raster
+        # Net effect of the group: a piece cut again later never existed for it
+        self.added, self.removed = [], []
+        for e in group:
+            for s in e.removed:
+                if s in self.added:
+                    self.added.remove(s)
+                else:
+                    self.removed.append(s)
+            self.added.extend(e.added)
+        boxes = [e.box for e in group if e.box is not None]
+        self.box = None
+        if boxes:
+            self.box = (min(b[0] for b in boxes), min(b[1] for b in boxes),
+                        max(b[2] for b in boxes), max(b[3] for b in boxes))
+            size = (self.box[2] - self.box[0], self.box[3] - self.box[1])
+            self.patch = Image.new("RGB", size)
+            self.mask = Image.new("1", size, 0)
+        # Union before-image: paste newest first so the oldest patch, which
+        # holds the pixels from before the whole group, wins
+        self.todo = [e for e in reversed(group) if e.box is not None]
+        self._raw = None  # patch bytes, once every entry is pasted
+        self._at = 0
+        self._packed = []
+        self._zip = zlib.compressobj(1)
+
+    def step(self):
+        # Pastes one entry's patch, or packs a chunk -> True once done
+        if self.box is None:
+            return True
+        if self._raw is not None:
+            self._packed.append(self._zip.compress(self._raw[self._at:self._at + self.CHUNK]))
+            self._at += self.CHUNK
+            if self._at >= len(self._raw):
+                self._packed.append(self._zip.flush())
+                self._raw = None
+                return True
+            return False
+        if self.todo:
+            entry = self.todo.pop(0)
+            img, emask = entry.image()
+            if emask is None:
+                # Only the pixels under the stroke matter; the rest of the
+                # box stays zero and packs down to almost nothing
+                emask = self.raster.footprint(entry.added + entry.removed, entry.box)
+            at = (entry.box[0] - self.box[0], entry.box[1] - self.box[1])
+            self.patch.paste(img, at, emask)
+            self.mask.paste(1, at, emask)
+        if not self.todo:
+            self._raw = memoryview(self.patch.tobytes())
+        return False
+
+    def entry(self):
+        if self.box is None:
+            return Entry(self.added, None, None, removed=self.removed)
+        return Entry(self.added, self.box, b"".join(self._packed),
+                     zlib.compress(self.mask.tobytes(), 1), self.removed)
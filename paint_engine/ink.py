@@ -0,0 +1,269 @@
+import math
+
+import numpy as np
+
+
+class Resampler:
+    # Drops pointer samples that add nothing: a sample is kept once it is
+    # `spacing` away from the last kept one, or, for slow careful moves,
+    # `spacing / 4` away after `max_gap` seconds
+
+    def __init__(self, spacing=2.0, max_gap=0.05):
+        self.spacing = spacing
+        self.max_gap = max_gap
+        self.last = None
+
+    def reset(self, x, y, t):
+        self.last = (x, y, t)
+
+    def accept(self, x, y, t):
+        lx, ly, lt = self.last
+        d = math.hypot(x - lx, y - ly)
+        if d >= self.spacing or (d >= self.spacing / 4 and t - lt >= self.max_gap):
+            self.last = (x, y, t)
+            return True
+        return False
+
+
+class OnlineSimplifier:
+    # Ramer-Douglas-Peucker as the points come in: points since the last
+    # kept one wait in `pending` while they all stay within `tolerance` of
+    # the chord to the newest point; when one would not, the point before
+    # the newest is kept and becomes the new anchor. `max_pending` bounds
+    # the per-point cost on long straight runs.
+
+    def __init__(self, tolerance=1.0, max_pending=64):
+        self.tolerance = tolerance
+        self.max_pending = max_pending
+        self.anchor = None
+        self.pending = []
+
+    def reset(self, x, y):
+        self.anchor = (x, y)
+        self.pending = []
+
+    def add(self, x, y):
+        # -> the point that got kept, or None
+        kept = None
+        if self.pending and (len(self.pending) >= self.max_pending or not self._fits(x, y)):
+            kept = self.pending[-1]
+            self.anchor = kept
+            self.pending = []
+        self.pending.append((x, y))
+        return kept
+
+    def _fits(self, x, y):
+        ax, ay = self.anchor
+        dx, dy = x - ax, y - ay
+        length = math.hypot(dx, dy)
+        tol = self.tolerance
+        for px, py in self.pending:
+            if length:
+                # Distance to the chord, clamped to its ends
+                t = min(max(((px - ax) * dx + (py - ay) * dy) / (length * length), 0.0), 1.0)
+                d = math.hypot(px - ax - t * dx, py - ay - t * dy)
+            else:
+                d = math.hypot(px - ax, py - ay)
+            if d > tol:
+                return False
+        return True
+
+    def finish(self):
+        # -> the last point, which is always kept (None if nothing pending)
+        kept = self.pending[-1] if self.pending else None
+        self.pending = []
+        return kept
+
+
+def simplify(pts, tolerance):
+    # Classic RDP over a whole (n, 2) array -> the kept points. Every open
+    # interval of one recursion level is split in the same numpy pass, so
+    # the Python overhead goes with the depth, not the number of points kept
+    n = len(pts)
+    if n < 3:
+        return pts
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    a, b = np.array([0]), np.array([n - 1])
+    while len(a):
+        inner = b - a - 1
+        a, b, inner = a[inner > 0], b[inner > 0], inner[inner > 0]
+        if not len(a):
+            break
+        # Interior points of all intervals, flat; group = which interval
+        group = np.repeat(np.arange(len(a)), inner)
+        first = np.cumsum(inner) - inner
+        idx = a[group] + 1 + np.arange(len(group)) - first[group]
+        start = pts[a][group]
+        seg = pts[b][group] - start
+        rel = pts[idx] - start
+        den = (seg * seg).sum(axis=1)
+        t = np.clip((rel * seg).sum(axis=1) / np.where(den, den, 1), 0.0, 1.0)
+        d = np.hypot(rel[:, 0] - t * seg[:, 0], rel[:, 1] - t * seg[:, 1])
+        # Farthest point per interval (the first one on a tie, like argmax)
+        worst = np.maximum.reduceat(d, first)
+        at = np.flatnonzero(d == worst[group])
+        at = at[np.r_[True, group[at[1:]] != group[at[:-1]]]]
+        split = worst > tolerance
+        mid = idx[at][split]
+        keep[mid] = True
+        a, b = np.concatenate([a[split], mid]), np.concatenate([mid, b[split]])
+    return pts[keep]
+
+
+def catmull_rom(pts, step=3.0, max_steps=12, tolerance=0.25):
+    # Centripetal Catmull-Rom spline through the (n, 2) points (no cusps or
+    # loops on uneven spacing), sampled about every `step` units and pruned
+    # back with RDP at `tolerance` -> (m, 2) float array
+    pts = np.asarray(pts, dtype=np.float64)
+    if len(pts) < 3:
+        return pts
+    # Phantom end points mirror the first/last segment
+    ext = np.vstack([2 * pts[0] - pts[1], pts, 2 * pts[-1] - pts[-2]])
+    lengths = np.hypot(*(pts[1:] - pts[:-1]).T)
+    steps = np.clip(np.ceil(lengths / step), 1, max_steps).astype(np.intp)
+    # All spans at once: span k (p_k -> p_k+1) sampled at u = 1/n .. n/n
+    span = np.repeat(np.arange(len(steps)), steps)
+    first = np.cumsum(steps) - steps
+    u = (np.arange(len(span)) - first[span] + 1) / steps[span]
+    curve = _centripetal(ext[span], ext[span + 1], ext[span + 2], ext[span + 3], u)
+    return simplify(np.vstack([pts[:1], curve]), tolerance)
+
+
+def _centripetal(p0, p1, p2, p3, u):
+    # Points of the p1 -> p2 spans at fractions u (Barry-Goldman pyramid),
+    # one row per sample
+    def knot(a, b):
+        return np.maximum(np.hypot(*(b - a).T) ** 0.5, 1e-6)[:, None]
+
+    t1 = knot(p0, p1)
+    t2 = t1 + knot(p1, p2)
+    t3 = t2 + knot(p2, p3)
+    t = t1 + u[:, None] * (t2 - t1)
+    a1 = ((t1 - t) * p0 + t * p1) / t1
+    a2 = ((t2 - t) * p1 + (t - t1) * p2) / (t2 - t1)
+    a3 = ((t3 - t) * p2 + (t - t2) * p3) / (t3 - t2)
+    b1 = ((t2 - t) * a1 + t * a2) / t2
+    b2 = ((t3 - t) * a2 + (t - t1) * a3) / (t3 - t1)
+    return ((t2 - t) * b1 + (t - t1) * b2) / (t2 - t1)
+
+
+class SpeedWidth:
+    # Pen width from pointer speed, like a nib: the full width when slow,
+    # down to `thin` times it at `fast` px/s. Only moves in steps of at
+    # least `step` of the base width so a stroke is not cut into a new
+    # width run for every small speed wobble.
+
+    def __init__(self, fast=1500.0, thin=0.4, step=0.15):
+        self.fast = fast
+        self.thin = thin
+        self.step = step
+        self.current = None
+
+    def width(self, base, speed):
+        target = base * (1 - (1 - self.thin) * min(speed / self.fast, 1.0))
+        if self.current is None or abs(target - self.current) >= max(1.0, self.step * base):
+            self.current = max(1, round(target))
+        return self.current
+
+    def reset(self):
+        self.current = None
+
+
+class Ink:
+    # Pointer input -> strokes with few points and smooth curves:
+    #
+    #   down(x, y, t, color, width) / move(x, y, t, width) / up() -> [Stroke]
+    #
+    # Samples are resampled, simplified online (only the kept points enter
+    # the stroke; the canvas line still runs to the pointer through
+    # engine.tip) and, at pen up, replaced by a Catmull-Rom fit through every
+    # resampled point, pruned back to `fit_tolerance` (a sub-pixel budget on
+    # average: bench.py ink checks it against the raw samples). Fitting the
+    # simplified points instead would stack both tolerances. A width
+    # change mid-gesture ends the current run and starts a new stroke at the
+    # same point, so up() can return several strokes; commit them together.
+    # Distances are screen pixels, converted with the engine's zoom.
+
+    def __init__(self, engine, spacing=2.0, max_gap=0.05, tolerance=1.0, fit=True, fit_tolerance=1.0):
+        self.engine = engine
+        self.spacing = spacing
+        self.tolerance = tolerance
+        self.fit = fit
+        self.fit_tolerance = fit_tolerance
+        self.resampler = Resampler(spacing, max_gap)
+        self.simplifier = OnlineSimplifier(tolerance)
+        self.strokes = []
+        self.color = None
+        self.width = None
+        self.raw = 0  # samples seen this gesture
+        self.accepted = []  # resampled points of the current run, for the fit
+        self._last = None
+        self._pointer = None  # newest sample, accepted or not
+        self._fit_tol = fit_tolerance
+
+    def down(self, x, y, t, color, width):
+        self.strokes = []
+        self.color = color
+        self.raw = 1
+        per_unit = 1 / self.engine.view.scale
+        self.resampler.spacing = self.spacing * per_unit
+        self.simplifier.tolerance = self.tolerance * per_unit
+        self._fit_tol = self.fit_tolerance * per_unit
+        self.resampler.reset(x, y, t)
+        self._pointer = (x, y)
+        self._start(x, y, width)
+
+    def _start(self, x, y, width):
+        self.width = width
+        self.engine.begin(x, y, self.color, width, mirror=not self.fit)
+        self.simplifier.reset(x, y)
+        self.accepted = [(x, y)]
+        self._last = (x, y)
+
+    def move(self, x, y, t, width=None):
+        if self.engine.current is None:
+            return
+        self.raw += 1
+        self._pointer = (x, y)
+        if not self.resampler.accept(x, y, t):
+            self.engine.tip(x, y)
+            return
+        if width is not None and width != self.width:
+            # New width run from the last accepted point
+            self._finish_run()
+            self._start(*self._last, width)
+        self._take(x, y)
+        self.engine.tip(x, y)
+
+    def _take(self, x, y):
+        kept = self.simplifier.add(x, y)
+        if kept is not None:
+            self.engine.extend(*kept)
+        self.accepted.append((x, y))
+        self._last = (x, y)
+
+    def _finish_run(self):
+        last = self.simplifier.finish()
+        if last is not None:
+            self.engine.extend(*last)
+        points = None
+        stroke = self.engine.current
+        if self.fit and stroke is not None and len(self.accepted) >= 3:
+            fitted = catmull_rom(self.accepted, step=1.5 * self.resampler.spacing, tolerance=self._fit_tol)
+            points = fitted.astype(np.float32).ravel()
+        self.accepted = []
+        stroke = self.engine.end(points)
+        if stroke is not None:
+            self.strokes.append(stroke)
+
+    def up(self):
+        # -> the finished strokes of the gesture ([] if there was none)
+        if self.engine.current is not None:
+            # The stroke ends where the pointer did, even if the resampler
+            # had not taken that sample yet
+            if self._pointer != self._last:
+                self._take(*self._pointer)
+            self._finish_run()
+        strokes, self.strokes = self.strokes, []
+        return strokes
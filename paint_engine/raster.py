@@ -0,0 +1,101 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageDraw
+
+TILE_MARGIN = 16
+
+# PNG encoding happens off the Tk thread; one worker keeps saves in order
+_encoder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="png-save")
+
+
+class BackingRaster:
+    # In-memory RGB copy of the canvas. Every segment drawn on screen is
+    # mirrored here as it happens, so saving never needs a screen grab.
+
+    def __init__(self, width, height, bg="white"):
+        self.bg = bg
+        self.image = Image.new("RGB", (width, height), bg)
+        self._draw = ImageDraw.Draw(self.image)
+
+    @property
+    def size(self):
+        return self.image.size
+
+    def dot(self, x, y, color, width):
+        r = width / 2
+        self._draw.ellipse((x - r, y - r, x + r, y + r), fill=color)
+
+    def segment(self, x0, y0, x1, y1, color, width):
+        # Round-capped like the Tk line; the start cap is the previous end cap
+        self._draw.line((x0, y0, x1, y1), fill=color, width=int(width))
+        self.dot(x1, y1, color, width)
+
+    def stroke(self, points, color, width):
+        # Whole flat x, y, ... sequence at once (replays, redraws)
+        draw_polyline(self._draw, points, color, width)
+
+    def redraw(self, box, strokes):
+        # Repaints `box` from scratch: background, then `strokes` in the
+        # order given, clipped to the box (erasing, out-of-order redo)
+        # The tile gets a margin: PIL rasterises wide lines slightly differently
+        # where they get clipped, so the clip edge must be outside the box
+        x0, y0, x1, y1 = box
+        m = TILE_MARGIN
+        tile = Image.new("RGB", (x1 - x0 + 2 * m, y1 - y0 + 2 * m), self.bg)
+        draw = ImageDraw.Draw(tile)
+        for stroke in strokes:
+            draw_polyline(draw, stroke.points, stroke.color, stroke.width, x0 - m, y0 - m)
+        self.image.paste(tile.crop((m, m, m + x1 - x0, m + y1 - y0)), (x0, y0))
+
+    def footprint(self, strokes, box, grow=2):
+        # 1-bit mask of the pixels `strokes` cover inside `box`, a little fat
+        x0, y0 = box[:2]
+        mask = Image.new("1", (box[2] - x0, box[3] - y0), 0)
+        draw = ImageDraw.Draw(mask)
+        for stroke in strokes:
+            draw_polyline(draw, stroke.points, 1, stroke.width + grow, x0, y0)
+        return mask
+
+    def clear(self, bg=None):
+        if bg is not None:
+            self.bg = bg
+        self._draw.rectangle((0, 0) + self.image.size, fill=self.bg)
+
+    def array(self):
+        import numpy as np
+        return np.asarray(self.image)
+
+    def snapshot(self):
+        return self.image.copy()
+
+    def save(self, path):
+        self.image.save(path)
+
+    def save_async(self, path):
+        # Copies the pixels now (cheap) and encodes on a worker thread.
+        # -> concurrent.futures.Future resolving to `path`
+        img = self.image.copy()
+
+        def encode():
+            img.save(path, optimize=False)
+            return path
+        return encode_async(encode)
+
+
+def encode_async(job):
+    # Runs job() on the save worker, after any save queued before it -> Future
+    return _encoder.submit(job)
+
+
+def draw_polyline(draw, points, color, width, dx=0, dy=0):
+    # Round caps and joins like the Tk line: the polyline plus a dot per point.
+    # (dx, dy) is subtracted from every point, for drawing into a tile.
+    if len(points) < 2:
+        return
+    if dx or dy:
+        points = [v - (dy if i % 2 else dx) for i, v in enumerate(points)]
+    r = width / 2
+    if len(points) >= 4:
+        draw.line(list(points), fill=color, width=int(width), joint="curve")
+    for x, y in zip(points[0::2], points[1::2]):
+        draw.ellipse((x - r, y - r, x + r, y + r), fill=color)
@@ -0,0 +1,211 @@
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+
+from . import document
+from .raster import BackingRaster, draw_polyline, encode_async
+from .spatial import as_xy
+
+# Supersampled pixels drawn per band at most, so a large export does not
+# need the whole supersampled image in memory at once
+BAND_PIXELS = 1 << 24
+# Largest PNG the apps save (RGB, ~200 MB in memory); a drawing spread
+# wider than that is scaled down to fit
+MAX_SAVE_PIXELS = 1 << 26
+
+
+def render(strokes, size, bg="white", scale=1.0, origin=(0, 0), supersample=4):
+    # Replays strokes (in z order) into a new RGB image without Tk.
+    #   size        output pixels (width, height)
+    #   scale       output pixels per document unit
+    #   origin      document point at the top-left pixel
+    #   supersample draw at N x N and box-filter down (antialiasing); 1 draws
+    #               exactly like the on-screen BackingRaster
+    # Round caps and joins as on the canvas; eraser edits are already in the
+    # strokes (the eraser cuts them), so nothing is painted over.
+    w, h = size
+    ss = max(int(supersample), 1)
+    k = scale * ss
+    out = Image.new("RGB", (w, h), bg)
+    # Pixel x of the output covers x*ss .. x*ss + ss-1 of the big image, so
+    # its centre is (ss - 1) / 2 further on
+    shift = (ss - 1) / 2
+    strokes = [(s, (as_xy(s) - origin) * k + shift, s.width * k) for s in strokes]
+    band = max(1, min(h, BAND_PIXELS // (w * ss * ss)))
+    for y0 in range(0, h, band):
+        y1 = min(y0 + band, h)
+        top, bottom = y0 * ss, y1 * ss
+        tile = Image.new("RGB", (w * ss, bottom - top), bg)
+        draw = ImageDraw.Draw(tile)
+        for stroke, pts, width in strokes:
+            r = width / 2 + 1
+            ys = pts[:, 1]
+            if ys.max() < top - r or ys.min() > bottom + r:
+                continue
+            xs = pts[:, 0]
+            if xs.max() < -r or xs.min() > w * ss + r:
+                continue
+            draw_polyline(draw, pts.ravel().tolist(), stroke.color, width, 0, top)
+        if ss > 1:
+            tile = tile.resize((w, y1 - y0), Image.BOX)
+        out.paste(tile, (0, y0))
+    return out
+
+
+def render_array(strokes, size, **options):
+    # Same as render(), as an (h, w, 3) uint8 array
+    return np.asarray(render(strokes, size, **options))
+
+
+def fit(strokes, page, margin=0):
+    # -> (origin, size in document units) covering the page and every stroke
+    x0, y0, x1, y1 = 0, 0, page[0], page[1]
+    for s in strokes:
+        pts = as_xy(s)
+        r = s.width / 2
+        x0, y0 = min(x0, pts[:, 0].min() - r), min(y0, pts[:, 1].min() - r)
+        x1, y1 = max(x1, pts[:, 0].max() + r), max(y1, pts[:, 1].max() + r)
+    return (x0 - margin, y0 - margin), (x1 - x0 + 2 * margin, y1 - y0 + 2 * margin)
+
+
+def pixel_box(strokes, page):
+    # fit() rounded out to whole document units -> (origin, size), both ints,
+    # so an export of the page lines up with the screen pixel for pixel
+    (x0, y0), (w, h) = fit(strokes, page)
+    left, top = math.floor(x0), math.floor(y0)
+    return (left, top), (math.ceil(x0 + w) - left, math.ceil(y0 + h) - top)
+
+
+def save_png_async(path, strokes, raster):
+    # The apps' PNG save -> Future resolving to `path`. When every stroke is
+    # on the page that is the backing raster as is; strokes drawn off it
+    # (after panning) get everything rendered like the screen instead,
+    # page included, on the raster's save worker.
+    origin, size = pixel_box(strokes, raster.size)
+    if origin == (0, 0) and size == raster.size:
+        return raster.save_async(path)
+    strokes = list(strokes)
+    scale = min(1.0, math.sqrt(MAX_SAVE_PIXELS / (size[0] * size[1])))
+    size = (max(1, round(size[0] * scale)), max(1, round(size[1] * scale)))
+    bg = raster.bg
+
+    def encode():
+        render(strokes, size, bg, scale, origin, supersample=1).save(path, optimize=False)
+        return path
+    return encode_async(encode)
+
+
+def render_file(path, out, scale=1.0, supersample=4, whole=False):
+    # Document -> image file. The page (raster size in the header) by
+    # default, or with whole=True everything drawn, off-page strokes included
+    # -> (out, seconds, strokes)
+    t0 = time.perf_counter()
+    reader, strokes = document.load(path)
+    origin, extent = (0, 0), reader.size
+    if whole:
+        origin, extent = fit(strokes, reader.size)
+    size = (max(1, round(extent[0] * scale)), max(1, round(extent[1] * scale)))
+    image = render(strokes, size, reader.bg, scale, origin, supersample)
+    image.save(out)
+    return out, time.perf_counter() - t0, len(strokes)
+
+
+def _render_job(job):
+    return render_file(*job)
+
+
+def render_many(jobs, workers=None):
+    # jobs: [(path, out, scale, supersample, whole)], rendered across a
+    # process pool (rendering is CPU bound; threads would share one GIL)
+    # -> results in job order
+    jobs = list(jobs)
+    if workers == 1 or len(jobs) < 2:
+        return [_render_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_render_job, jobs))
+
+
+def check(strokes=300, seed=0, tolerance=0.001):
+    # Renderer vs on-screen pixels: draws random strokes and eraser drags
+    # through StrokeCanvas + BackingRaster (the canvas mirror a PNG save
+    # writes), then re-renders the resulting strokes headless and compares.
+    # Without supersampling the pixels must match; antialiased output is
+    # compared after a 3x3 blur of both, since the aliased screen raster
+    # rounds edge pixels to fully on or off. -> report, "ok" False on failure
+    from .bench import NullCanvas, random_strokes
+    from .canvas import StrokeCanvas
+
+    engine = StrokeCanvas(NullCanvas(), BackingRaster(1000, 600))
+    for n, (color, width, pts) in enumerate(random_strokes(strokes, seed=seed)):
+        if n % 5 == 4:
+            for x, y in pts:
+                engine.erase_to(x, y, width)
+            engine.end_erase()
+        else:
+            engine.begin(*pts[0], color, width)
+            for x, y in pts[1:]:
+                engine.extend(x, y)
+            engine.end()
+    screen = engine.raster.image
+    size = engine.raster.size
+    blur = lambda img: np.asarray(img.filter(ImageFilter.BoxBlur(1)), dtype=np.int16)
+
+    exact = np.abs(render_array(engine.strokes, size, supersample=1).astype(np.int16)
+                   - np.asarray(screen, dtype=np.int16)).max(axis=2)
+    smooth = np.abs(blur(render(engine.strokes, size, supersample=4)) - blur(screen)).max(axis=2)
+    report = {
+        "strokes": len(engine.strokes),
+        "supersample_1_differing": round(float((exact > 0).mean()), 6),
+        "supersample_4_off": round(float((smooth > 96).mean()), 6),
+        "supersample_4_mean_abs": round(float(smooth.mean()), 3),
+    }
+    report["ok"] = (report["supersample_1_differing"] <= tolerance
+                    and report["supersample_4_off"] <= tolerance)
+    return report
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m paint_engine.render",
+        description="Render .pnt documents to images without a display.")
+    parser.add_argument("documents", nargs="*", help=".pnt files")
+    parser.add_argument("-o", "--out-dir", default=".", help="where the images go")
+    parser.add_argument("--format", default="png", help="image file extension")
+    parser.add_argument("--scale", type=float, default=1.0, help="output pixels per document unit")
+    parser.add_argument("--supersample", type=int, default=4, help="antialiasing factor, 1 = off")
+    parser.add_argument("--whole", action="store_true", help="everything drawn, not just the page")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: CPUs)")
+    parser.add_argument("--check", action="store_true",
+                        help="compare renderer output with the on-screen raster and exit")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.check:
+        report = check()
+        print(json.dumps(report, indent=2))
+        return 0 if report["ok"] else 1
+    if not args.documents:
+        build_parser().error("no documents given")
+    os.makedirs(args.out_dir, exist_ok=True)
+    jobs = []
+    for path in args.documents:
+        name = os.path.splitext(os.path.basename(path))[0] + "." + args.format
+        jobs.append((path, os.path.join(args.out_dir, name), args.scale, args.supersample, args.whole))
+    t0 = time.perf_counter()
+    for out, seconds, count in render_many(jobs, args.jobs):
+        print(f"{out}: {count} strokes in {seconds * 1000:.0f} ms")
+    print(f"{len(jobs)} documents in {time.perf_counter() - t0:.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
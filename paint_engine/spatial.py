@@ -0,0 +1,127 @@
+import math
+
+import numpy as np
+
+
+def as_xy(stroke):
+    # (n, 2) float32 view of the stroke's points, no copy
+    return np.frombuffer(stroke.points, dtype=np.float32).reshape(-1, 2)
+
+
+def distance_to_segment(pts, x0, y0, x1, y1):
+    # Distance from each of `pts` (n, 2) to the segment (x0, y0)-(x1, y1)
+    d = np.array([x1 - x0, y1 - y0], dtype=np.float64)
+    rel = pts - (x0, y0)
+    den = d @ d
+    t = np.clip(rel @ d / den, 0.0, 1.0) if den else np.zeros(len(pts))
+    return np.hypot(rel[:, 0] - t * d[0], rel[:, 1] - t * d[1])
+
+
+def densify(pts, step, near=None, snap=None):
+    # Extra points every `step` px along the segments flagged in `near`
+    # (all of them by default), so a cut can land between two far-apart
+    # samples. With `snap`, the extra points (only) are rounded to 1/snap
+    if len(pts) < 2:
+        return pts
+    seg = np.diff(pts, axis=0)
+    counts = np.maximum(np.ceil(np.hypot(seg[:, 0], seg[:, 1]) / step).astype(int), 1)
+    if near is not None:
+        counts[~near] = 1
+    if counts.max() == 1:
+        return pts
+    t = np.concatenate([np.arange(c) / c for c in counts])
+    start = np.repeat(np.arange(len(seg)), counts)
+    out = pts[start] + seg[start] * t[:, None]
+    if snap is not None:
+        extra = t > 0
+        out[extra] = np.rint(out[extra] * snap) / snap
+    return np.vstack([out, pts[-1:]]).astype(np.float32)
+
+
+def split_runs(keep):
+    # Boolean mask -> [(start, stop)] of the True runs
+    edges = np.diff(np.concatenate([[0], keep.astype(np.int8), [0]]))
+    return list(zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)))
+
+
+class SegmentGrid:
+    # Uniform grid over stroke segments: each cell lists the strokes with a
+    # segment (pen width included) passing through it. Queries only look at
+    # the cells under the query box, so the cost follows the eraser's size,
+    # not the size of the drawing.
+
+    def __init__(self, cell=64):
+        self.cell = cell
+        self.cells = {}
+        self._keys = {}  # stroke -> cells it is in
+        self._bounds = None  # cell range ever used, grows only
+
+    def _cells(self, stroke):
+        pts = as_xy(stroke)
+        pad = stroke.width / 2
+        c = self.cell
+        if len(pts) == 1:
+            pts = np.vstack([pts, pts])
+        lo = np.minimum(pts[:-1], pts[1:]) - pad
+        hi = np.maximum(pts[:-1], pts[1:]) + pad
+        keys = set()
+        for (ax, ay), (bx, by) in zip(np.floor(lo / c).astype(int).tolist(),
+                                      np.floor(hi / c).astype(int).tolist()):
+            for cx in range(ax, bx + 1):
+                for cy in range(ay, by + 1):
+                    keys.add((cx, cy))
+        return keys
+
+    def insert(self, stroke):
+        keys = self._cells(stroke)
+        self._keys[stroke] = keys
+        xs = [k[0] for k in keys]
+        ys = [k[1] for k in keys]
+        b = (min(xs), min(ys), max(xs), max(ys))
+        self._bounds = b if self._bounds is None else (
+            min(b[0], self._bounds[0]), min(b[1], self._bounds[1]),
+            max(b[2], self._bounds[2]), max(b[3], self._bounds[3]))
+        for key in keys:
+            self.cells.setdefault(key, set()).add(stroke)
+
+    def remove(self, stroke):
+        for key in self._keys.pop(stroke, ()):
+            bucket = self.cells[key]
+            bucket.discard(stroke)
+            if not bucket:
+                del self.cells[key]
+
+    def query(self, x0, y0, x1, y1):
+        # Strokes that may touch the box; callers do the exact test
+        c = self.cell
+        found = set()
+        cx0, cy0, cx1, cy1 = math.floor(x0 / c), math.floor(y0 / c), math.floor(x1 / c), math.floor(y1 / c)
+        b = self._bounds
+        if b is None:
+            return found
+        if cx0 <= b[0] and cy0 <= b[1] and cx1 >= b[2] and cy1 >= b[3]:
+            # The whole drawing is in the box
+            return set(self._keys)
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self.cells):
+            # Zoomed far out: fewer occupied cells than cells in the box
+            for (cx, cy), bucket in self.cells.items():
+                if cx0 <= cx <= cx1 and cy0 <= cy <= cy1:
+                    found |= bucket
+            return found
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                bucket = self.cells.get((cx, cy))
+                if bucket:
+                    found |= bucket
+        return found
+
+    def clear(self):
+        self.cells.clear()
+        self._keys.clear()
+        self._bounds = None
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, stroke):
+        return stroke in self._keys
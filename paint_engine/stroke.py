@@ -0,0 +1,31 @@
+from array import array
+
+
+class Stroke:
+    # One pen-down .. pen-up gesture: flat x0, y0, x1, y1, ... float32 points
+    # plus the pen it was drawn with. Points only ever get appended. `z` is
+    # the stacking order, set when the stroke is committed; pieces left by
+    # the eraser keep the z of the stroke they came from.
+
+    __slots__ = ("points", "color", "width", "z")
+
+    def __init__(self, color, width, points=(), z=None):
+        self.points = array("f", points)
+        self.color = color
+        self.width = width
+        self.z = z
+
+    def __len__(self):
+        return len(self.points) // 2
+
+    def append(self, x, y):
+        self.points.append(x)
+        self.points.append(y)
+
+    def last(self):
+        return self.points[-2], self.points[-1]
+
+    def bbox(self):
+        # (x0, y0, x1, y1) of the centre line, not counting the pen width
+        xs, ys = self.points[0::2], self.points[1::2]
+        return min(xs), min(ys), max(xs), max(ys)
@@ -0,0 +1,78 @@
+import math
+import time
+
+
+class FrameTicker:
+    # Coalesces UI refreshes. Event handlers mark() jobs dirty; every dirty
+    # job then runs once from a single after() callback, at most once per
+    # frame, however many events came in since the last one.
+
+    def __init__(self, root, fps=60):
+        self.root = root
+        self.interval = 1.0 / fps
+        self.jobs = {}
+        self.dirty = set()
+        self.flushes = 0
+        self.marks = 0
+        self._pending = None
+        self._last = 0.0
+
+    def add(self, name, job):
+        self.jobs[name] = job
+
+    def mark(self, *names):
+        self.dirty.update(names)
+        self.marks += 1
+        if self._pending is not None:
+            return
+        wait = self._last + self.interval - time.perf_counter()
+        if wait > 0:
+            self._pending = self.root.after(max(1, int(wait * 1000)), self.flush)
+        else:
+            self._pending = self.root.after_idle(self.flush)
+
+    def flush(self):
+        self._pending = None
+        self._last = time.perf_counter()
+        dirty, self.dirty = self.dirty, set()
+        self.flushes += 1
+        for name, job in self.jobs.items():
+            if name in dirty:
+                job()
+
+    def cancel(self):
+        if self._pending is not None:
+            self.root.after_cancel(self._pending)
+            self._pending = None
+        self.dirty.clear()
+
+
+class SpeedMeter:
+    # Pointer speed from the samples batched up between two ticks: path
+    # length over elapsed time, continuing from the last sample of the
+    # previous batch. Timestamps in seconds (Tk's event.time / 1000).
+
+    def __init__(self):
+        self.samples = []
+        self.speed = 0.0
+        self._anchor = None
+
+    def add(self, x, y, t):
+        self.samples.append((x, y, t))
+
+    def update(self):
+        pts = self.samples if self._anchor is None else [self._anchor] + self.samples
+        if len(pts) >= 2:
+            dist = sum(math.hypot(b[0] - a[0], b[1] - a[1]) for a, b in zip(pts, pts[1:]))
+            dt = pts[-1][2] - pts[0][2]
+            if dt > 0:
+                self.speed = dist / dt
+        if self.samples:
+            self._anchor = self.samples[-1]
+            self.samples = []
+        return self.speed
+
+    def reset(self):
+        self.samples = []
+        self._anchor = None
+        self.speed = 0.0
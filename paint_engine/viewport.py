@@ -0,0 +1,59 @@
+import numpy as np
+
+MIN_SCALE = 0.01
+MAX_SCALE = 32.0
+
+
+class Viewport:
+    # Which part of the (unbounded) document the canvas shows: (x, y) is the
+    # document point at the canvas's top-left corner, `scale` screen pixels
+    # per document unit. Strokes live in document units; only canvas items
+    # are in screen pixels.
+
+    def __init__(self, width, height, x=0.0, y=0.0, scale=1.0):
+        self.width = width
+        self.height = height
+        self.x = x
+        self.y = y
+        self.scale = scale
+
+    def to_doc(self, sx, sy):
+        return self.x + sx / self.scale, self.y + sy / self.scale
+
+    def to_screen(self, x, y):
+        return (x - self.x) * self.scale, (y - self.y) * self.scale
+
+    def box(self, margin=0.0):
+        # Visible document box, grown by `margin` screens on every side
+        w, h = self.width / self.scale, self.height / self.scale
+        return (self.x - margin * w, self.y - margin * h,
+                self.x + (1 + margin) * w, self.y + (1 + margin) * h)
+
+    def pan(self, dx, dy):
+        # Screen-pixel drag -> the document moves with the pointer
+        self.x -= dx / self.scale
+        self.y -= dy / self.scale
+
+    def zoom(self, factor, sx=0.0, sy=0.0):
+        # Zoom keeping the document point under (sx, sy) in place
+        # -> the factor actually applied after clamping
+        scale = min(max(self.scale * factor, MIN_SCALE), MAX_SCALE)
+        x, y = self.to_doc(sx, sy)
+        factor, self.scale = scale / self.scale, scale
+        self.x, self.y = x - sx / scale, y - sy / scale
+        return factor
+
+    def screen_points(self, pts):
+        # (n, 2) document points -> flat screen coords for a canvas item,
+        # simplified for this zoom: runs of points that land on the same
+        # screen pixel collapse to one, the end point is always kept
+        xy = np.rint((pts - (self.x, self.y)) * self.scale)
+        if len(xy) > 2:
+            keep = np.empty(len(xy), dtype=bool)
+            keep[0] = True
+            keep[1:] = (xy[1:] != xy[:-1]).any(axis=1)
+            keep[-1] = True
+            xy = xy[keep]
+        if len(xy) == 1:
+            xy = np.vstack([xy, xy])
+        return xy.ravel().tolist()
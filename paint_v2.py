@@ -1,10 +1,9 @@
 import tkinter as tk
-from tkinter import filedialog
-from PIL import ImageGrab
-import time
-import math
 
-class PaintApp:
+from paint_engine import (BackingRaster, DocumentMixin, FrameTicker, History, Ink, SpeedMeter, StrokeCanvas,
+                          ViewMixin)
+
+class PaintApp(ViewMixin, DocumentMixin):
     def __init__(self, root):
         self.root = root
         self.root.title("Mini Paint Pro")
@@ -13,12 +12,11 @@ class PaintApp:
         # === Drawing variables ===
         self.old_x = None
         self.old_y = None
-        self.last_time = None
+        self.meter = SpeedMeter()
         self.speed = 0
         self.pen_width = 3
         self.pen_color = '#000000'
         self.mode = 'draw'  # or 'erase'
-        self.preview_line = None
         self.bg_color = 'white'
         self.canvas_fg = 'white'
 
@@ -33,13 +31,29 @@ class PaintApp:
         self.setup_ui()
 
     def setup_ui(self):
+        # Status bar and preview redraw at most once per frame
+        self.ticker = FrameTicker(self.root)
+        self.ticker.add('view', self.update_view)
+        self.ticker.add('status', self.update_status)
+        self.ticker.add('preview', self.update_preview)
+
         # === Canvas ===
         self.canvas = tk.Canvas(self.root, bg=self.bg_color, width=1000, height=600, cursor="cross")
-        self.canvas.pack()
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+        # One polyline item per stroke, mirrored into an off-screen raster for saving
+        self.engine = StrokeCanvas(self.canvas, BackingRaster(1000, 600, self.bg_color))
+        self.history = History(self.engine)
+        # Resampled, simplified and curve-fitted input instead of every raw sample
+        self.ink = Ink(self.engine)
+        self.loader = None  # StreamLoader while a document is coming in
 
         self.canvas.bind('<B1-Motion>', self.draw)
         self.canvas.bind('<Motion>', self.track_mouse)
         self.canvas.bind('<ButtonRelease-1>', self.reset)
+        self.root.bind('<Control-z>', self.undo)
+        self.root.bind('<Control-y>', self.redo)
+        # Pan with the middle/right button, zoom with the wheel, Ctrl+0 back to 1:1
+        self.bind_view()
 
         # === Control Panel ===
         control = tk.Frame(self.root)
@@ -53,7 +67,7 @@ class PaintApp:
         self.slider = tk.Scale(control, from_=1, to=20, orient=tk.HORIZONTAL,
                                showvalue=0, length=100, width=8, sliderlength=10,
                                troughcolor="#ddd", bd=0, highlightthickness=0,
-                               command=lambda val: self.update_status())
+                               command=lambda val: self.ticker.mark('status'))
         self.slider.set(self.pen_width)
         self.slider.pack(side=tk.LEFT, padx=10)
 
@@ -61,11 +75,19 @@ class PaintApp:
         eraser_btn = tk.Button(control, text="🧽 Eraser", command=self.toggle_eraser)
         eraser_btn.pack(side=tk.LEFT, padx=5)
 
+        # Undo / Redo
+        undo_btn = tk.Button(control, text="↶ Undo", command=self.undo)
+        undo_btn.pack(side=tk.LEFT, padx=2)
+        redo_btn = tk.Button(control, text="↷ Redo", command=self.redo)
+        redo_btn.pack(side=tk.LEFT, padx=2)
+
         # Clear button
         clear_btn = tk.Button(control, text="🗑 Clear", command=self.clear_canvas)
         clear_btn.pack(side=tk.LEFT, padx=5)
 
         # Save button
+        open_btn = tk.Button(control, text="📂 Open", command=self.open_drawing)
+        open_btn.pack(side=tk.LEFT, padx=5)
         save_btn = tk.Button(control, text="💾 Save", command=self.save_drawing)
         save_btn.pack(side=tk.LEFT, padx=5)
 
@@ -89,6 +111,8 @@ class PaintApp:
         self.update_status()
 
     def toggle_theme(self):
+        if self.loader is not None:
+            return
         if self.bg_color == 'white':
             self.bg_color = '#2b2b2b'
             self.canvas_fg = 'black'
@@ -102,69 +126,66 @@ class PaintApp:
     def draw(self, event):
         self.pen_width = self.slider.get()
 
-        color = self.bg_color if self.mode == 'erase' else self.pen_color
-
-        if self.old_x and self.old_y:
-            self.canvas.create_line(
-                self.old_x, self.old_y, event.x, event.y,
-                fill=color, width=self.pen_width,
-                capstyle=tk.ROUND, smooth=True
-            )
-
-            dist = math.sqrt((event.x - self.old_x) ** 2 + (event.y - self.old_y) ** 2)
-            t = time.time()
-            if self.last_time:
-                dt = t - self.last_time
-                if dt > 0:
-                    self.speed = dist / dt
-            self.last_time = t
+        # Nothing drawn or erased while a document loads: its strokes still
+        # get their z order, and loaded() starts the history afresh
+        if self.pan_from is not None or self.loader is not None:
+            return
+        # Strokes are stored in document units; the pen keeps its on-screen width
+        view = self.engine.view
+        x, y = view.to_doc(event.x, event.y)
+        width = self.pen_width / view.scale
+
+        if self.mode == 'erase':
+            # Cuts the strokes under the eraser instead of painting background over them
+            self.engine.erase_to(x, y, width)
+        elif self.old_x is None:
+            self.ink.down(x, y, event.time / 1000, self.pen_color, width)
+        else:
+            self.ink.move(x, y, event.time / 1000)
 
+        self.meter.add(event.x, event.y, event.time / 1000)
+        self.preview_from = (event.x, event.y) if self.old_x is None else (self.old_x, self.old_y)
         self.old_x = event.x
         self.old_y = event.y
-        self.update_status()
-
-        # Line preview
-        if self.preview_line:
-            self.canvas.delete(self.preview_line)
-        self.preview_line = self.canvas.create_line(
-            self.old_x, self.old_y, event.x, event.y,
-            fill=self.pen_color, width=1, dash=(2, 2)
-        )
+        self.ticker.mark('status', 'preview')
 
     def reset(self, event):
+        self.history.commit(self.ink.up())
+        self.history.commit_erase(self.engine.end_erase())
         self.old_x = None
         self.old_y = None
-        self.last_time = None
+        self.meter.reset()
         self.speed = 0
-        if self.preview_line:
-            self.canvas.delete(self.preview_line)
-            self.preview_line = None
-        self.update_status()
+        self.preview_from = None
+        self.ticker.mark('status', 'preview')
+
+    def undo(self, event=None):
+        if not self.engine.drawing and self.loader is None:
+            self.history.undo()
+
+    def redo(self, event=None):
+        if not self.engine.drawing and self.loader is None:
+            self.history.redo()
 
     def clear_canvas(self, redraw=True):
-        self.canvas.delete("all")
+        if self.loader is not None:
+            return
+        self.engine.clear(self.bg_color)
+        self.history.clear()
+        self.canvas_cleared()
         if redraw:
             self.update_status()
 
-    def save_drawing(self):
-        x = self.root.winfo_rootx() + self.canvas.winfo_x()
-        y = self.root.winfo_rooty() + self.canvas.winfo_y()
-        x1 = x + self.canvas.winfo_width()
-        y1 = y + self.canvas.winfo_height()
-        img = ImageGrab.grab().crop((x, y, x1, y1))
-        file = filedialog.asksaveasfilename(defaultextension=".png", filetypes=[("PNG Image", "*.png")])
-        if file:
-            img.save(file)
-
     def track_mouse(self, event):
         self.mouse_x = event.x
         self.mouse_y = event.y
-        self.update_status()
+        self.ticker.mark('status')
 
     def update_status(self):
+        self.speed = self.meter.update()
         color_name = self.COLOR_NAMES.get(self.pen_color.upper(), "Custom")
         mode_icon = "✏️" if self.mode == 'draw' else "🧽"
-        status = f"{mode_icon} Mode | 🎨 {color_name} ({self.pen_color.upper()}) | ✏️ Width: {self.pen_width} | 🏃 Speed: {self.speed:.2f} px/s | 🖱 {getattr(self, 'mouse_x', 0)}, {getattr(self, 'mouse_y', 0)}"
+        status = f"{mode_icon} Mode | 🎨 {color_name} ({self.pen_color.upper()}) | ✏️ Width: {self.pen_width} | 🏃 Speed: {self.speed:.2f} px/s | 🔍 {self.engine.view.scale * 100:.0f}% | 🖱 {getattr(self, 'mouse_x', 0)}, {getattr(self, 'mouse_y', 0)}"
         self.status.config(text=status)
 
 if __name__ == "__main__":
@@ -1,10 +1,9 @@
 import tkinter as tk
-from tkinter import filedialog
-from PIL import ImageGrab
-import time
-import math
 
-class PaintApp:
+from paint_engine import (BackingRaster, DocumentMixin, FrameTicker, History, Ink, SpeedMeter, SpeedWidth, StrokeCanvas,
+                          ViewMixin)
+
+class PaintApp(ViewMixin, DocumentMixin):
     def __init__(self, root):
         self.root = root
         self.root.title("Mini Paint Pro")
@@ -13,12 +12,13 @@ class PaintApp:
         # Drawing ke liye kuch initial values
         self.old_x = None
         self.old_y = None
-        self.last_time = None
+        self.meter = SpeedMeter()
         self.speed = 0
         self.pen_width = 3
         self.pen_color = '#000000'
         self.mode = 'draw'  # ya 'erase'
-        self.preview_line = None
+        self.nib = SpeedWidth()  # tez chalao to line patli
+        self.speed_width = True
         self.bg_color = 'white'  # Light mode default
         self.canvas_fg = 'white'  # Eraser ke liye background color
 
@@ -34,14 +34,30 @@ class PaintApp:
         self.setup_ui()
 
     def setup_ui(self):
+        # Status bar aur preview har event pe nahi, frame me ek baar redraw
+        self.ticker = FrameTicker(self.root)
+        self.ticker.add('view', self.update_view)
+        self.ticker.add('status', self.update_status)
+        self.ticker.add('preview', self.update_preview)
+
         # === Canvas ===
         self.canvas = tk.Canvas(self.root, bg=self.bg_color, width=1000, height=600, cursor="cross")
-        self.canvas.pack()
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+        # Har stroke ek hi polyline item, har mouse event pe naya item nahi
+        self.engine = StrokeCanvas(self.canvas, BackingRaster(1000, 600, self.bg_color))
+        self.history = History(self.engine)
+        # Har raw sample nahi: resample, simplify, aur pen up pe smooth curve
+        self.ink = Ink(self.engine)
+        self.loader = None  # document load chal raha ho to StreamLoader
 
         # Mouse bindings for drawing
         self.canvas.bind('<B1-Motion>', self.draw)
         self.canvas.bind('<Motion>', self.track_mouse)
         self.canvas.bind('<ButtonRelease-1>', self.reset)
+        self.root.bind('<Control-z>', self.undo)
+        self.root.bind('<Control-y>', self.redo)
+        # Middle/right button se pan, wheel se zoom, Ctrl+0 se wapas 1:1
+        self.bind_view()
 
         # === Control buttons & tools ===
         control = tk.Frame(self.root)
@@ -70,10 +86,24 @@ class PaintApp:
         eraser_btn = tk.Button(control, text="🧽 Eraser", command=self.toggle_eraser)
         eraser_btn.pack(side=tk.LEFT, padx=5)
 
+        # Speed se width (nib jaisa) on/off
+        nib_btn = tk.Button(control, text="✒️ Nib", command=self.toggle_nib)
+        nib_btn.pack(side=tk.LEFT, padx=5)
+
+        # Undo / Redo (Ctrl+Z / Ctrl+Y)
+        undo_btn = tk.Button(control, text="↶ Undo", command=self.undo)
+        undo_btn.pack(side=tk.LEFT, padx=2)
+        redo_btn = tk.Button(control, text="↷ Redo", command=self.redo)
+        redo_btn.pack(side=tk.LEFT, padx=2)
+
         # Clear button
         clear_btn = tk.Button(control, text="🗑 Clear", command=self.clear_canvas)
         clear_btn.pack(side=tk.LEFT, padx=5)
 
+        # Open button (.pnt document)
+        open_btn = tk.Button(control, text="📂 Open", command=self.open_drawing)
+        open_btn.pack(side=tk.LEFT, padx=5)
+
         # Save button
         save_btn = tk.Button(control, text="💾 Save", command=self.save_drawing)
         save_btn.pack(side=tk.LEFT, padx=5)
@@ -102,8 +132,14 @@ class PaintApp:
         self.mode = 'erase' if self.mode != 'erase' else 'draw'
         self.update_status()
 
+    def toggle_nib(self):
+        self.speed_width = not self.speed_width
+        self.update_status()
+
     def toggle_theme(self):
         # Light/Dark background toggle
+        if self.loader is not None:
+            return
         if self.bg_color == 'white':
             self.bg_color = '#2b2b2b'
             self.canvas_fg = 'black'
@@ -116,79 +152,85 @@ class PaintApp:
 
     def draw(self, event):
         self.pen_width = self.slider.get()
-        color = self.bg_color if self.mode == 'erase' else self.pen_color
-
-        # Drawing line
-        if self.old_x and self.old_y:
-            self.canvas.create_line(
-                self.old_x, self.old_y, event.x, event.y,
-                fill=color, width=self.pen_width,
-                capstyle=tk.ROUND, smooth=True
-            )
-
-            # Speed calculation
-            dist = math.sqrt((event.x - self.old_x) ** 2 + (event.y - self.old_y) ** 2)
-            t = time.time()
-            if self.last_time:
-                dt = t - self.last_time
-                if dt > 0:
-                    self.speed = dist / dt
-            self.last_time = t
+
+        # Document load ke beech draw/erase nahi: uske strokes ka z order abhi
+        # ban raha hai, aur loaded() history naye sire se shuru karta hai
+        if self.pan_from is not None or self.loader is not None:
+            return
+        # Screen se document coords; width screen pe same dikhe, zoom kuch bhi ho
+        view = self.engine.view
+        x, y = view.to_doc(event.x, event.y)
+        width = self.pen_width / view.scale
+
+        # Eraser ab background se paint nahi karta, strokes ko kaat deta hai
+        if self.mode == 'erase':
+            self.engine.erase_to(x, y, width)
+        else:
+            # Status bar wali speed (px/s) se hi pen ki width
+            if self.speed_width:
+                width = self.nib.width(self.pen_width, self.speed) / view.scale
+            # Pen down pe naya stroke, warna usi stroke ko aage badhao
+            if self.old_x is None:
+                self.ink.down(x, y, event.time / 1000, self.pen_color, width)
+            else:
+                self.ink.move(x, y, event.time / 1000, width)
+
+        # Speed ke liye sample, calculation tick pe batch me
+        self.meter.add(event.x, event.y, event.time / 1000)
+        self.preview_from = (event.x, event.y) if self.old_x is None else (self.old_x, self.old_y)
 
         # Update previous coords
         self.old_x = event.x
         self.old_y = event.y
-        self.update_status()
-
-        # Show preview line
-        if self.preview_line:
-            self.canvas.delete(self.preview_line)
-        self.preview_line = self.canvas.create_line(
-            self.old_x, self.old_y, event.x, event.y,
-            fill=self.pen_color, width=1, dash=(2, 2)
-        )
+        self.ticker.mark('status', 'preview')
 
     def reset(self, event):
-        # Mouse button chhoda gaya
+        # Mouse button chhoda gaya, stroke freeze
+        self.history.commit(self.ink.up())
+        self.history.commit_erase(self.engine.end_erase())
         self.old_x = None
         self.old_y = None
-        self.last_time = None
+        self.meter.reset()
+        self.nib.reset()
         self.speed = 0
-        if self.preview_line:
-            self.canvas.delete(self.preview_line)
-            self.preview_line = None
-        self.update_status()
+        self.preview_from = None
+        self.ticker.mark('status', 'preview')
+
+    def undo(self, event=None):
+        # Pichla stroke hatao (drag ke beech me nahi)
+        if not self.engine.drawing and self.loader is None:
+            self.history.undo()
+
+    def redo(self, event=None):
+        if not self.engine.drawing and self.loader is None:
+            self.history.redo()
 
     def clear_canvas(self, redraw=True):
         # Sab kuch clean kar do
-        self.canvas.delete("all")
+        if self.loader is not None:
+            return
+        self.engine.clear(self.bg_color)
+        self.history.clear()
+        self.canvas_cleared()
         if redraw:
             self.update_status()
 
-    def save_drawing(self):
-        # Drawing ko image me save karo
-        x = self.root.winfo_rootx() + self.canvas.winfo_x()
-        y = self.root.winfo_rooty() + self.canvas.winfo_y()
-        x1 = x + self.canvas.winfo_width()
-        y1 = y + self.canvas.winfo_height()
-        img = ImageGrab.grab().crop((x, y, x1, y1))
-        file = filedialog.asksaveasfilename(defaultextension=".png", filetypes=[("PNG Image", "*.png")])
-        if file:
-            img.save(file)
-
     def track_mouse(self, event):
         # Mouse position track kar rahe hain
         self.mouse_x = event.x
         self.mouse_y = event.y
-        self.update_status()
+        self.ticker.mark('status')
 
     def update_status(self):
         # Neeche status bar update ho
+        self.speed = self.meter.update()
         color_name = self.COLOR_NAMES.get(self.pen_color.upper(), "Custom")
         mode_icon = "✏️" if self.mode == 'draw' else "🧽"
+        nib = " ✒️" if self.speed_width else ""
         status = (
-            f"{mode_icon} Mode | 🎨 {color_name} ({self.pen_color.upper()}) | "
+            f"{mode_icon}{nib} Mode | 🎨 {color_name} ({self.pen_color.upper()}) | "
             f"✏️ Width: {self.slider.get()} | 🏃 Speed: {self.speed:.2f} px/s | "
+            f"🔍 {self.engine.view.scale * 100:.0f}% | "
             f"🖱 {getattr(self, 'mouse_x', 0)}, {getattr(self, 'mouse_y', 0)}"
         )
         self.status.config(text=status)
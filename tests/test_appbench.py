@@ -0,0 +1,39 @@
+import json
+import os
+
+import pytest
+
+from paint_engine.appbench import build_parser, run_app
+
+
+def need_display():
+    if not os.environ.get("DISPLAY"):
+        pytest.skip("no display")
+    tk = pytest.importorskip("tkinter")
+    try:
+        tk.Tk().destroy()
+    except tk.TclError as e:
+        pytest.skip(f"no Tk: {e}")
+
+
+@pytest.mark.parametrize("app", ["paint", "paint_v2", "paint_v3"])
+def test_run_app_smoke(app):
+    # A tiny event storm through the real app: generated events must reach
+    # the timed handlers through the app's own bindings
+    need_display()
+    args = build_parser().parse_args(["--stages", "2,3", "--hover", "20", "--erase", "2", "--quiet"])
+    result = run_app(app, args)
+    json.dumps(result)
+    assert result["app"] == app
+    assert [stage["strokes"] for stage in result["stages"]] == [2, 3]
+    for stage in result["stages"]:
+        handlers = stage["handlers"]
+        # <Motion> with Button1Mask dispatches to <B1-Motion> -> draw
+        assert handlers["draw"]["count"] > stage["strokes"]
+        assert handlers["reset"]["count"] == stage["strokes"]
+        assert stage["canvas_items"] > 0
+        assert stage["events_per_s"] > 0
+        if app != "paint":
+            assert handlers["track_mouse"]["count"] == args.hover
+            assert handlers["reset:erase"]["count"] == args.erase
+            assert handlers["toggle_eraser"]["count"] == 2
@@ -0,0 +1,158 @@
+import os
+import random
+
+import numpy as np
+import pytest
+from PIL import ImageColor
+
+from paint_engine import BackingRaster, StrokeCanvas, Stroke
+from paint_engine.render import check, render, render_array
+
+SIZE = (240, 160)
+COLORS = ("#000000", "#FF0000", "#0000FF", "#008000")
+# Pixels closer than this to an ink edge may go either way in any correct
+# rasterizer; aliased output snaps vertices to whole pixels on top
+FRINGE = {"smooth": 1.0, "aliased": 2.0}
+
+
+def random_strokes(n, seed):
+    rng = random.Random(seed)
+    strokes = []
+    for z in range(n):
+        x, y = rng.uniform(20, SIZE[0] - 20), rng.uniform(20, SIZE[1] - 20)
+        points = [x, y]
+        for _ in range(rng.randint(0, 5)):
+            x = min(max(x + rng.uniform(-40, 40), 0), SIZE[0])
+            y = min(max(y + rng.uniform(-40, 40), 0), SIZE[1])
+            points += [x, y]
+        strokes.append(Stroke(COLORS[z % len(COLORS)], rng.choice((1, 3, 6, 11)), points, z))
+    return strokes
+
+
+def distance(stroke, px, py):
+    # Distance from points to the stroke's centre line, computed directly
+    # from the geometry (no drawing library involved)
+    pts = np.asarray(stroke.points, dtype=np.float64).reshape(-1, 2)
+    if len(pts) == 1:
+        pts = np.vstack([pts, pts])
+    best = np.full(px.shape, np.inf)
+    for (x0, y0), (x1, y1) in zip(pts[:-1], pts[1:]):
+        dx, dy = x1 - x0, y1 - y0
+        den = dx * dx + dy * dy
+        t = np.clip(((px - x0) * dx + (py - y0) * dy) / den, 0, 1) if den else 0
+        best = np.minimum(best, np.hypot(px - x0 - t * dx, py - y0 - t * dy))
+    return best
+
+
+def reference(strokes, size, fringe, bg="white"):
+    # Round-capped, round-joined strokes painted in z order -> (expected RGB,
+    # mask of the pixels every correct rasterizer must agree on). Pixel (x, y)
+    # is centred on the point (x, y), as on the Tk canvas
+    w, h = size
+    py, px = np.mgrid[0:h, 0:w].astype(np.float64)
+    image = np.empty((h, w, 3), dtype=np.int16)
+    image[:] = ImageColor.getrgb(bg)
+    sure = np.ones((h, w), dtype=bool)
+    for stroke in strokes:
+        d = distance(stroke, px, py) - stroke.width / 2
+        inside = d < -fringe
+        image[inside] = ImageColor.getrgb(stroke.color)
+        sure[inside] = True
+        sure[np.abs(d) <= fringe] = False
+    return image, sure
+
+
+def coverage(strokes, size, ss=4):
+    # Analytic ink coverage per pixel, from ss x ss samples: a pixel is as
+    # dark as the share of its area under some stroke
+    w, h = size
+    py, px = (np.mgrid[0:h * ss, 0:w * ss] + 0.5) / ss - 0.5
+    ink = np.zeros(px.shape, dtype=bool)
+    for stroke in strokes:
+        ink |= distance(stroke, px, py) <= stroke.width / 2
+    return ink.reshape(h, ss, w, ss).mean(axis=(1, 3))
+
+
+def compare(actual, strokes, size, fringe):
+    # -> (share of the sure pixels that are wrong, share of pixels that are sure)
+    expected, sure = reference(strokes, size, fringe)
+    off = np.abs(actual.astype(np.int16) - expected).max(axis=2) > 48
+    return off[sure].mean(), sure.mean()
+
+
+@pytest.mark.parametrize("supersample, fringe", [(1, "aliased"), (4, "smooth")])
+@pytest.mark.parametrize("seed", range(3))
+def test_render_matches_geometry(supersample, fringe, seed):
+    strokes = random_strokes(40, seed)
+    off, checked = compare(render_array(strokes, SIZE, supersample=supersample),
+                           strokes, SIZE, FRINGE[fringe])
+    assert checked > 0.5
+    assert off == 0
+
+
+def test_render_antialiased_coverage():
+    strokes = [Stroke("#000000", w, pts, z) for z, (w, pts) in enumerate([
+        (1, [10, 10, 200, 40]), (3, [20, 140, 120, 60, 220, 150]), (6, [30, 80, 30, 80]),
+        (11, [60, 20, 180, 120]),
+    ])]
+    grey = render_array(strokes, SIZE, supersample=4)[..., 0] / 255.0
+    err = np.abs((1 - grey) - coverage(strokes, SIZE))
+    assert err.mean() < 0.01
+    assert np.quantile(err, 0.999) < 0.5
+
+
+def test_render_view_transform():
+    # scale/origin map document units to pixels like the canvas view does
+    stroke = Stroke("#000000", 4, [1000, 1000, 1060, 1030], 0)
+    moved = Stroke("#000000", 8, [20, 20, 140, 80], 0)
+    got = render_array([stroke], SIZE, scale=2.0, origin=(990, 990), supersample=1)
+    off, _ = compare(got, [moved], SIZE, FRINGE["aliased"])
+    assert off == 0
+
+
+def test_render_matches_backing_raster():
+    assert check(strokes=60)["ok"]
+
+
+def tk_root():
+    if not os.environ.get("DISPLAY"):
+        pytest.skip("no display")
+    tk = pytest.importorskip("tkinter")
+    try:
+        return tk, tk.Tk()
+    except tk.TclError as e:
+        pytest.skip(f"no Tk: {e}")
+
+
+def test_render_matches_tk_canvas():
+    # The same strokes on a real Tk canvas, grabbed from the screen
+    ImageGrab = pytest.importorskip("PIL.ImageGrab")
+    tk, root = tk_root()
+    try:
+        root.overrideredirect(True)
+        root.geometry(f"{SIZE[0]}x{SIZE[1]}+0+0")
+        canvas = tk.Canvas(root, bg="white", width=SIZE[0], height=SIZE[1],
+                           highlightthickness=0, borderwidth=0)
+        canvas.pack()
+        engine = StrokeCanvas(canvas, BackingRaster(*SIZE))
+        for stroke in random_strokes(40, seed=2):
+            pts = list(stroke.points)
+            engine.begin(pts[0], pts[1], stroke.color, stroke.width)
+            for x, y in zip(pts[2::2], pts[3::2]):
+                engine.extend(x, y)
+            engine.end()
+        root.update()
+        root.after(200, root.quit)
+        root.mainloop()
+        x, y = canvas.winfo_rootx(), canvas.winfo_rooty()
+        try:
+            grab = ImageGrab.grab((x, y, x + SIZE[0], y + SIZE[1]), xdisplay=os.environ["DISPLAY"])
+        except OSError as e:
+            pytest.skip(f"cannot grab the screen: {e}")
+        screen = np.asarray(grab.convert("RGB"))
+        strokes = engine.strokes
+    finally:
+        root.destroy()
+    fringe = FRINGE["aliased"]
+    assert compare(screen, strokes, SIZE, fringe)[0] < 0.001
+    assert compare(render_array(strokes, SIZE, supersample=1), strokes, SIZE, fringe)[0] == 0